@@ -12,14 +12,46 @@ from tkinter import messagebox, ttk, filedialog
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import matplotlib.pyplot as plt
 
+from exportar import exportar_columnas, guardar_figura_async, exportar_barrido_figuras, Progreso, seguir_exportacion
+from calculo_async import CalculoAsync
+from friccion import TuberiasSerieDW
+from golpe_ariete import cierre_valvula_moc
+from transitorio_bomba import CurvasHomologas, MotorInduccion, simular_arranque_parada
+from curvas_bomba import curva_bomba, CURVA_TABLA, CURVAS_BOMBA
+from intersecciones import intersecciones
+from propiedades_fluido import AGUA, FLUIDOS
+from atmosfera import presion_isa
+from viscosidad_bomba import correccion_hi
+from rendimiento_electrico import (CadenaElectrica, Motor, Variador, motor_normalizado, CARGA_MOTOR, ETA_MOTOR_IE3,
+                                   clave_tablas)
+from dialogos_tablas import pedir_tablas_csv
+
 ctk.set_appearance_mode("light")
 ctk.set_default_color_theme("blue")
 
 # ----------- Utilidades hidráulicas ----------- #
+FRICCION_HW = "Hazen-Williams"
+FRICCION_DW = "Darcy-Weisbach (Colebrook)"
+FRICCION_MODELOS = [FRICCION_HW, FRICCION_DW]
+
 def hazen_williams_k_per_length(D_m, C):
     """Devuelve k_L tal que hf = k_L * L * Q^1.852 (Q en m³/s, L en m, hf en m)."""
     return 10.67 / (C**1.852 * D_m**4.87)
 
+def hf_tuberias_lps(q_lps, k_lps):
+    """Pérdidas en tuberías (m) para Q en l/s.
+    k_lps: coeficiente de Hazen-Williams (hf = k·Q^1.852) o un TuberiasSerieDW."""
+    if isinstance(k_lps, TuberiasSerieDW):
+        return k_lps.hf(q_lps)
+    return k_lps*(q_lps**1.852)
+
+def dhf_tuberias_lps(q_lps, k_lps):
+    """d(hf)/dQ (m por l/s), analítica con Hazen-Williams y con Darcy-Weisbach."""
+    q = np.asarray(q_lps, dtype=float)
+    if isinstance(k_lps, TuberiasSerieDW):
+        return k_lps.dhf(np.maximum(q, 0.0))
+    return 1.852*k_lps*np.maximum(q, 0.0)**0.852
+
 def choose_CHW_from_eps_over_D(eps_cm, D_m):
     """Asigna C_HW según ε/D (tabla del enunciado)."""
     eps_m = eps_cm / 100.0
@@ -52,6 +84,52 @@ def bisect_root(f, a, b, tol=1e-8, itmax=200):
         else: a, fa = m, fm
     return 0.5*(a+b)
 
+def bisect_root_vec(f, a, b, tol=1e-8, itmax=200):
+    """
+    Bisección simultánea sobre arrays: f(x) se evalúa elemento a elemento y cada
+    componente tiene su propio intervalo [a, b]. Devuelve NaN donde f(a) y f(b)
+    tienen el mismo signo (equivalente al None de bisect_root).
+    """
+    a, b = np.broadcast_arrays(np.asarray(a, dtype=float), np.asarray(b, dtype=float))
+    a = a.copy(); b = b.copy()
+    fa, fb = f(a), f(b)
+    valido = fa*fb <= 0
+    for _ in range(itmax):
+        m = 0.5*(a+b); fm = f(m)
+        izq = fa*fm <= 0
+        b = np.where(izq, m, b)
+        a = np.where(izq, a, m); fa = np.where(izq, fa, fm)
+        if np.all((b-a) < tol): break
+    raiz = 0.5*(a+b)
+    raiz[~valido] = np.nan
+    return raiz
+
+def newton_root_vec(f, df, a, b, tol=1e-8, itmax=50):
+    """
+    Newton simultáneo con salvaguarda: cada componente conserva su intervalo [a, b]
+    con cambio de signo y, si el paso de Newton se sale de él, se toma el punto medio.
+    Necesita la derivada, pero converge en pocas iteraciones con curvas suaves.
+    NaN donde f(a) y f(b) tienen el mismo signo, como bisect_root_vec.
+    """
+    a, b = np.broadcast_arrays(np.asarray(a, dtype=float), np.asarray(b, dtype=float))
+    a = a.copy(); b = b.copy()
+    fa, fb = f(a), f(b)
+    valido = fa*fb <= 0
+    x = 0.5*(a+b)
+    for _ in range(itmax):
+        fx = f(x)
+        izq = fa*fx <= 0
+        b = np.where(izq, x, b)
+        a = np.where(izq, a, x); fa = np.where(izq, fa, fx)
+        d = df(x)
+        xn = x - fx/np.where(d == 0.0, np.nan, d)
+        xn = np.where((xn >= a) & (xn <= b), xn, 0.5*(a+b))
+        paso = np.abs(xn - x)
+        x = xn
+        if np.all(paso[valido] < tol): break
+    x[~valido] = np.nan
+    return x
+
 # ----------- Curva de la bomba base (Fija a 1490 rpm) ----------- #
 Qb_ls = np.array([0, 5, 10, 15, 20, 25, 30, 35, 40, 45, 50, 55, 60, 65], dtype=float)
 Hb_m  = np.array([38,38,38,38,38,37,36,34,32,30,26,20,13,0], dtype=float)
@@ -63,6 +141,67 @@ def H_bomba(Ql):
 def eta_bomba(Ql):
     return interp_xy(Qb_ls, eta_p, Ql)/100.0
 
+def tabla_bomba(nu=None):
+    """Tabla (Q, H, η %) de la bomba; con ν (m²/s) corregida por viscosidad (HI, en caché)."""
+    if nu is None:
+        return Qb_ls, Hb_m, eta_p
+    c = correccion_hi(Qb_ls, Hb_m, eta_p, nu, N_BOMBA_RPM)
+    return c.Q, c.H, c.eta
+
+def bomba_ajustada(modelo=CURVA_TABLA, nu=None):
+    """Curvas H/η de la tabla (corregida por ν si se da) en la representación pedida
+    (ajuste en caché, ver curvas_bomba)."""
+    return curva_bomba(*tabla_bomba(nu), modelo)
+
+N_BOMBA_RPM = 1490.0
+
+# ----------- Cadena eléctrica (motor y variador) ----------- #
+ACCIONAMIENTO_DIRECTO = "Arranque directo"
+ACCIONAMIENTO_VARIADOR = "Variador (a n0)"
+ACCIONAMIENTOS = [ACCIONAMIENTO_DIRECTO, ACCIONAMIENTO_VARIADOR]
+
+# Maniobras de la ventana de arranque y disparo (transitorio con inercia)
+MANIOBRA_DISPARO = "Disparo (fallo de red)"
+MANIOBRA_ARRANQUE = "Arranque"
+
+def cadena_bomba(bomba, s_rel, tabla_motor=(CARGA_MOTOR, ETA_MOTOR_IE3), variador=None):
+    """Motor normalizado para la máxima potencia en el eje de la bomba con este líquido,
+    con la tabla η(carga) dada, y el variador si lo hay."""
+    q = bomba.curva_H.x
+    eta = bomba.eta(q)
+    P = 9800.0*s_rel*(q/1000.0)*bomba.H(q) / np.maximum(eta, 1e-9) / 1000.0
+    return CadenaElectrica(Motor(motor_normalizado(np.max(P[eta > 0])), *tabla_motor), variador)
+
+# ----------- NPSH en la aspiración (tubería 1) ----------- #
+# El enunciado no da la curva NPSH_req de esta bomba: se toma una de forma típica
+# (casi constante a caudal bajo y creciendo con ~Q² pasado el rendimiento máximo)
+NPSH_req_m = np.array([1.5,1.5,1.6,1.8,2.0,2.3,2.7,3.2,3.8,4.5,5.4,6.5,7.8,9.3], dtype=float)
+
+def npsh_req_bomba(Ql):
+    """NPSH requerido (m), vectorizado; NaN donde Q es NaN (sin punto de funcionamiento)."""
+    return np.interp(Ql, Qb_ls, NPSH_req_m)
+
+def hf_aspiracion_lps(q_lps, k_lps, J1_lps, L1):
+    """Pérdida en la tubería 1 (m): J1·L1·Q^1.852 con Hazen-Williams o el primer tramo del TuberiasSerieDW."""
+    if isinstance(k_lps, TuberiasSerieDW):
+        return k_lps.hf_tramos(q_lps)[..., 0]
+    return J1_lps*L1*np.maximum(q_lps, 0.0)**1.852
+
+def npsh_instalacion(Q_lps, hf_asp_m, z_bomba_m, s_rel, T_C=20.0, z_sitio_m=0.0, fluido=AGUA):
+    """
+    NPSH disponible y requerido en la brida de aspiración, vectorizado con broadcasting
+    (aperturas × temperaturas × cotas... en una sola llamada):
+        NPSH_disp = (P_atm(z_sitio) - P_v(T))/γ - z_bomba - hf_asp(Q),   γ = 9800·s
+    z_bomba: cota del eje de la bomba sobre la lámina de A (negativa si la bomba está en carga).
+    Retorna un dict de arrays: disp, req, margen (m.c.l.) y cavita (margen < 0; False sin caudal).
+    """
+    Q = np.asarray(Q_lps, dtype=float)
+    gamma = 9800.0 * np.asarray(s_rel, dtype=float)
+    disp = (presion_isa(z_sitio_m) - fluido.pv(T_C)) / gamma - np.asarray(z_bomba_m, dtype=float) - hf_asp_m
+    req = npsh_req_bomba(Q)
+    margen = disp - req
+    return dict(disp=disp, req=req, margen=margen, cavita=(margen < 0.0) & (Q > 0.0))
+
 # ----------- Válvula en tubería de impulsión ----------- #
 # Diámetros comerciales de la válvula (mm): 100, 150, 200, 250, 300
 # Grados de apertura: 0 a 90 grados (pasos de 10°)
@@ -136,6 +275,408 @@ def hf_valve_new(Q_lps, s_rel, D_valve_mm, aperture_deg):
     hf = (Q_m3h**2 / Kv**2) * (10.0 / s_rel)
     return hf
 
+def Kv_arr(D_mm, aperture_deg):
+    """Kv para un array de aperturas (mismo criterio de diámetro que get_Kv_from_diameter_and_aperture)."""
+    D_int = int(round(D_mm))
+    if D_int not in VALVE_KV_TABLES:
+        D_int = min(VALVE_DIAMETERS, key=lambda x: abs(x - D_mm))
+    ap = np.clip(np.asarray(aperture_deg, dtype=float), 0.0, 90.0)
+    return np.interp(ap, VALVE_APERTURE_DEG, VALVE_KV_TABLES[D_int])
+
+def theta_para_Kv(D_mm, Kv):
+    """
+    Inversa de Kv_arr: menor apertura (°) con ese Kv, vectorizada sobre Kv y diámetros
+    (se difunden entre sí; cada diámetro usa la tabla comercial más cercana).
+    NaN si el Kv pedido supera el máximo de la tabla de ese diámetro.
+    """
+    D = np.asarray(D_mm, dtype=float)
+    cerca = np.abs(D[..., None] - np.array(VALVE_DIAMETERS, dtype=float)).argmin(axis=-1)
+    tablas = np.stack([VALVE_KV_TABLES[d] for d in VALVE_DIAMETERS])[cerca]   # (..., 10)
+    Kv = np.asarray(Kv, dtype=float)
+    tablas, Kv = np.broadcast_arrays(tablas, Kv[..., None])
+    Kv = Kv[..., 0]
+    # Primer punto de la tabla con Kv ≥ objetivo; se interpola en el tramo anterior
+    i = np.clip(np.sum(tablas < Kv[..., None], axis=-1), 1, VALVE_APERTURE_DEG.size - 1)
+    k0 = np.take_along_axis(tablas, (i - 1)[..., None], axis=-1)[..., 0]
+    k1 = np.take_along_axis(tablas, i[..., None], axis=-1)[..., 0]
+    th = VALVE_APERTURE_DEG[i - 1] + (Kv - k0) / np.where(k1 > k0, k1 - k0, 1.0) * (VALVE_APERTURE_DEG[i] - VALVE_APERTURE_DEG[i - 1])
+    return np.where(Kv > tablas[..., -1]*(1.0 + 1e-6), np.nan, np.clip(th, 0.0, 90.0))
+
+def hf_valve_arr(Q_lps, s_rel, D_valve_mm, aperture_deg):
+    """Versión vectorizada de hf_valve_new para un array de caudales (l/s)."""
+    Q = np.asarray(Q_lps, dtype=float)
+    if aperture_deg >= 90:
+        return np.zeros_like(Q)
+    Kv = get_Kv_from_diameter_and_aperture(D_valve_mm, aperture_deg) if aperture_deg > 0 else 0.0
+    if Kv < 1e-6:
+        return np.where(Q <= 1e-12, 0.0, 1e9)
+    Q_m3h = Q * 3.6
+    return (Q_m3h**2 / Kv**2) * (10.0 / s_rel)
+
+# ----------- Barrido de apertura (característica instalada de la válvula) ----------- #
+def curva_apertura(k_lps, s_rel, D2_mm, delta_z, dH0=0.0, aperturas=None, bomba=None):
+    """
+    Resuelve el punto de funcionamiento para todas las aperturas a la vez
+    (por defecto 0..90° en grados enteros) con la instalación fija.
+    Retorna un dict de arrays: theta, Kv, Q (l/s), H (m), eta (-), Pabs_kW, y en
+    "raices" todas las intersecciones de cada apertura (ver intersecciones.py).
+    Q es NaN donde no hay intersección (p.ej. P_B por encima del límite); si hay
+    varias (bomba con joroba o tramo plano) se toma la menor estable.
+    bomba: CurvaBomba (por defecto la tabla); con una curva ajustada se resuelve por Newton.
+    """
+    bomba = bomba_ajustada() if bomba is None else bomba
+    th = np.arange(0.0, 91.0) if aperturas is None else np.asarray(aperturas, dtype=float)
+    Kv = Kv_arr(D2_mm, th)
+    cerrada = (th <= 0) | (Kv < 1e-6)
+    # hf_válvula = c·Q² con Q en l/s: c = 3.6²·10/(s·Kv²); a 90° la válvula no tiene pérdidas
+    c = np.where((th >= 90) | cerrada, 0.0, 3.6**2 * 10.0 / (s_rel * np.where(cerrada, 1.0, Kv)**2))
+
+    def f(q):
+        return bomba.H(q) - (delta_z + dH0 + hf_tuberias_lps(q, k_lps) + c*q**2)
+
+    def df(q):
+        return bomba.dH(q) - dhf_tuberias_lps(q, k_lps) - 2.0*c*q
+
+    if bomba.tabulada:
+        Q = bisect_root_vec(f, np.zeros_like(th), np.full_like(th, 65.0))
+    else:
+        Q = newton_root_vec(f, df, np.zeros_like(th), np.full_like(th, 65.0))
+    # Todas las intersecciones (la curva ajustada se recorre como tabla densa; la tabla es la de la bomba en uso)
+    Qx = bomba.curva_H.x
+    Qt = Qx if bomba.tabulada else np.linspace(Qx[0], Qx[-1], 131)
+    raices = intersecciones(Qt, bomba.H(Qt), lambda q: delta_z + dH0 + hf_tuberias_lps(q, k_lps) + c[:, None]*q**2)
+    estable = raices.primera_estable()
+    varias = (raices.n > 1) & ~np.isnan(Q) & ~np.isnan(estable)
+    if not bomba.tabulada and varias.any():
+        # La raíz de la tabla densa solo sirve de arranque: se afina con Newton sobre el mismo ajuste
+        # (bomba.H, bomba.dH) en el tramo de la tabla que la contiene, para no mezclar representaciones
+        paso = Qt[1] - Qt[0]
+        fina = newton_root_vec(f, df, np.maximum(estable - paso, Qt[0]), np.minimum(estable + paso, Qt[-1]))
+        estable = np.where(np.isnan(fina), estable, fina)
+    Q = np.where(varias, estable, Q)
+    # Válvula cerrada: caudal nulo si la bomba vence la cota, como en hf_valve_new
+    Q = np.where(cerrada & ~np.isnan(Q), 0.0, Q)
+    H = bomba.H(Q)
+    eta = bomba.eta(Q)
+    Pabs_kW = 9800.0*s_rel*(Q/1000.0)*H / np.maximum(eta, 1e-9) / 1000.0
+    return dict(theta=th, Kv=Kv, Q=Q, H=H, eta=eta, Pabs_kW=Pabs_kW, raices=raices)
+
+def apertura_objetivo(k_lps, s_rel, D2_mm, delta_z, Q_obj=None, H_obj=None, dH0=0.0, bomba=None):
+    """
+    Problema inverso de la válvula: apertura y Kv que llevan el punto de
+    funcionamiento a un caudal (Q_obj, l/s) o a una altura de bomba (H_obj, m).
+    Los objetivos y los diámetros de válvula D2_mm se difunden entre sí (p.ej.
+    Q_obj[:, None] con D2_mm[None, :] da la rejilla objetivo × diámetro); la
+    instalación (k_lps) no cambia con el diámetro de la válvula.
+    Retorna un dict de arrays: Q, H, theta, Kv, hv (altura disipada en la válvula, m),
+    P_disipada_kW (γ·Q·hv), P_perdida_kW (la misma en el eje, γ·Q·hv/η) y alcanzable.
+    theta = 90 cuando la válvula abierta basta y NaN si el objetivo no se alcanza:
+    caudal mayor que el de válvula abierta, Kv por encima de la tabla del diámetro o
+    altura fuera de la rama descendente de la bomba (por encima de la de cierre o por
+    debajo del final de la curva).
+    """
+    bomba = bomba_ajustada() if bomba is None else bomba
+    if (Q_obj is None) == (H_obj is None):
+        raise ValueError("Indica un caudal objetivo o una altura objetivo (solo uno).")
+    if Q_obj is None:
+        # H(Q) de la bomba solo es invertible en la rama descendente (tras el tramo plano)
+        Qx = bomba.curva_H.x
+        Qt = Qx if bomba.tabulada else np.linspace(Qx[0], Qx[-1], 131)
+        Ht = bomba.H(Qt)
+        i0 = int(np.flatnonzero(Ht >= Ht.max() - 1e-9)[-1])
+        H_obj = np.asarray(H_obj, dtype=float)
+        # np.interp recorta a los extremos: fuera de [H_min, H_max] daría un punto con otra altura
+        en_rango = (H_obj >= Ht[i0:].min() - 1e-9) & (H_obj <= Ht.max() + 1e-9)
+        Q = np.interp(-H_obj, -Ht[i0:], Qt[i0:])
+    else:
+        Q = np.asarray(Q_obj, dtype=float)
+        en_rango = True
+    Q, D, en_rango = np.broadcast_arrays(Q, np.asarray(D2_mm, dtype=float), en_rango)
+    H = bomba.H(Q)
+    hv = H - (delta_z + dH0 + hf_tuberias_lps(Q, k_lps))
+    # hv = (3.6·Q/Kv)²·10/s  ->  Kv = 3.6·Q / √(hv·s/10)
+    Kv = np.where(hv > 0.0, 3.6*Q / np.sqrt(np.maximum(hv, 1e-300) * s_rel / 10.0), np.inf)
+    th = np.where(np.abs(hv) < 1e-9, 90.0, theta_para_Kv(D, Kv))
+    alcanzable = en_rango & (hv > -1e-9) & (Q >= 0.0) & (Q <= Qb_ls[-1]) & ~np.isnan(th)
+    th = np.where(alcanzable, th, np.nan)
+    Kv = np.where(alcanzable, Kv, np.nan)
+    hv = np.where(alcanzable, np.maximum(hv, 0.0), np.nan)
+    gamma = 9800.0 * s_rel
+    P_dis = gamma * (Q/1000.0) * hv / 1000.0
+    return dict(Q=Q, H=H, theta=th, Kv=Kv, hv=hv, P_disipada_kW=P_dis,
+                P_perdida_kW=P_dis / np.maximum(bomba.eta(Q), 1e-9), alcanzable=alcanzable)
+
+def curva_presion_B(k_lps, s_rel, D2_mm, open_deg, delta_z, PB_kgcm2=None, n=201, bomba=None):
+    """
+    Punto de funcionamiento para todas las presiones de B a la vez (apertura fija).
+    Por defecto P_B recorre de 0 al límite sin circulación en n pasos.
+    Retorna un dict de arrays: PB (kg/cm²), dH0 (m), Q (l/s), H (m), eta (-), Pabs_kW y PB_lim.
+    Q = 0 por encima del límite (la bomba ya no vence la cota más la presión).
+    """
+    bomba = bomba_ajustada() if bomba is None else bomba
+    PB_lim = max(float(bomba.H(0.0)) - delta_z, 0.0) * s_rel / 10.0
+    PB = np.linspace(0.0, PB_lim, n) if PB_kgcm2 is None else np.asarray(PB_kgcm2, dtype=float)
+    dH0 = 10.0 * PB / s_rel
+    Qmax = float(Qb_ls[-1])
+
+    def f(q):
+        return bomba.H(q) - (delta_z + dH0 + hf_tuberias_lps(q, k_lps) + hf_valve_arr(q, s_rel, D2_mm, open_deg))
+
+    if bomba.tabulada:
+        Q = bisect_root_vec(f, np.zeros_like(PB), np.full_like(PB, Qmax))
+    else:
+        Kv = get_Kv_from_diameter_and_aperture(D2_mm, open_deg) if 0 < open_deg < 90 else 0.0
+        c = 3.6**2 * 10.0 / (s_rel * Kv**2) if Kv > 1e-6 else 0.0
+        Q = newton_root_vec(f, lambda q: bomba.dH(q) - dhf_tuberias_lps(q, k_lps) - 2.0*c*q,
+                            np.zeros_like(PB), np.full_like(PB, Qmax))
+    # Sin circulación (válvula cerrada o P_B en el límite): Q = 0 y P_abs = 0, como en el caso cerrado
+    Q = np.where(np.isnan(Q) | (Q < 1e-6) | (open_deg <= 0), 0.0, Q)
+    H = bomba.H(Q)
+    eta = bomba.eta(Q)
+    Pabs_kW = 9800.0*s_rel*(Q/1000.0)*H / np.maximum(eta, 1e-9) / 1000.0
+    Pabs_kW = np.where(Q > 0.0, Pabs_kW, 0.0)
+    return dict(PB=PB, dH0=dH0, Q=Q, H=H, eta=eta, Pabs_kW=Pabs_kW, PB_lim=PB_lim)
+
+# ----------- Gráfica de curvas (pantalla y exportación) ----------- #
+def H_inst_arr(q_lps, k_lps, s_rel, D2_mm, open_deg, delta_z, dH0=0.0):
+    """CCI para un array de caudales (l/s): cota + presión + tuberías + válvula."""
+    q = np.asarray(q_lps, dtype=float)
+    return (delta_z + dH0) + hf_tuberias_lps(q, k_lps) + hf_valve_arr(q, s_rel, D2_mm, open_deg)
+
+def dibujar_curvas(ax, ax2, bomba, k_lps, s, D2_mm, open_deg, delta_z, dH0, Q_plot, k_lps_default, defaults,
+                   Qpf=None, Hpf=None):
+    """
+    Curvas características y punto de funcionamiento sobre ax (H) y ax2 (η).
+    Solo usa sus argumentos: sirve para el lienzo en pantalla y para las figuras
+    que se exportan en el hilo de trabajo. defaults: valores por defecto de la
+    instalación (para la curva de referencia), k_lps_default su coeficiente.
+    """
+    ax.cla(); ax2.cla(); ax.grid(True)
+    ax2.yaxis.tick_right()
+    ax2.yaxis.set_label_position('right')
+    ax.set_xlabel(r"$Q$ (L/s)"); ax.set_ylabel(r"$H_m$ (m.c.l.)")
+    ax2.set_ylabel(r"$\eta$ (%)")
+    ax.set_title("Curvas características y punto de funcionamiento")
+
+    d = defaults
+    # Valores por defecto
+    s_def = d["s"]
+    D2_def = d["D2"]  # mm
+    open_deg_def = d["open_deg"]  # grados
+    
+    # === DEFINIR TODAS LAS CURVAS ===
+    # Curva por defecto (todo en valores iniciales)
+    H_inst_default = H_inst_arr(Q_plot, k_lps_default, s_def, D2_def, open_deg_def, delta_z, dH0=0.0)
+    
+    # Curva con parámetros modificados (sin presión, apertura máxima)
+    H_inst_params = H_inst_arr(Q_plot, k_lps, s, D2_mm, 90, delta_z, dH0=0.0)
+    
+    # Curva con parámetros + presión (apertura máxima)
+    H_inst_params_pres = H_inst_arr(Q_plot, k_lps, s, D2_mm, 90, delta_z, dH0=dH0)
+    
+    # Curva ACTIVA (parámetros + presión + apertura) - SIEMPRE NARANJA
+    H_inst_active = H_inst_arr(Q_plot, k_lps, s, D2_mm, open_deg, delta_z, dH0=dH0)
+    
+    # Curva de RENDIMIENTO de la bomba
+    eta_plot = bomba.eta(Q_plot) * 100.0  # En %
+    
+    # === DETECTAR QUÉ HA CAMBIADO ===
+    params_changed = isinstance(k_lps, TuberiasSerieDW) or \
+                     (k_lps_default is not None and
+                      abs(k_lps - k_lps_default) > 1e-12) or \
+                      abs(s - s_def) > 1e-9 or \
+                      abs(D2_mm - D2_def) > 1e-9
+    presion_changed = dH0 > 1e-9
+    apertura_changed = open_deg < 90
+    any_change = params_changed or presion_changed or apertura_changed
+    
+    # Curva Bomba Fija: con una curva ajustada se dibuja el ajuste y la tabla solo como puntos.
+    # La tabla es la de la bomba en uso (corregida por viscosidad si procede)
+    Qs, Hs = bomba.curva_H.x, bomba.curva_H.y
+    viscosa = not (np.array_equal(Qs, Qb_ls) and np.array_equal(Hs, Hb_m))
+    def dibujar_bomba():
+        if viscosa:
+            ax.plot(Qb_ls, Hb_m, ":", color="tab:green", linewidth=1.2, alpha=0.7, label=r"CC bomba con agua")
+        if bomba.tabulada:
+            ax.plot(Qs, Hs, "o-", color="tab:green", linewidth=2,
+                    label=r"CC bomba corregida por $\nu$" if viscosa else r"CC bomba (1490 rpm)")
+        else:
+            ax.plot(Q_plot, bomba.H(Q_plot), "-", color="tab:green", label=r"CC bomba ajustada (1490 rpm)", linewidth=2)
+            ax.plot(Qs, Hs, "o", color="tab:green", markersize=4, label=r"Tabla del fabricante")
+
+    if open_deg == 0:
+        # === CASO VÁLVULA CERRADA ===
+        
+        # 1. Curva de RENDIMIENTO en eje DERECHO (roja)
+        ax2.plot(Q_plot, eta_plot, "^-", color="tab:red", label=r"$\eta$ (%)", 
+                    linewidth=1.5, markersize=4, markevery=20)
+        
+        # 2. Curva por defecto (azul discontinuo) - solo si hay cambios
+        if any_change:
+            ax.plot(Q_plot, H_inst_default, linestyle="--", color="tab:blue", 
+                        label=r"CCI (por defecto)", linewidth=1.5, alpha=0.7)
+        
+        # 3. Curvas intermedias (gris discontinuo)
+        if params_changed and presion_changed:
+            ax.plot(Q_plot, H_inst_params, linestyle="--", color="gray",
+                        label=r"CCI (sin presión)", linewidth=1.2, alpha=0.6)
+        
+        if (params_changed or presion_changed) and apertura_changed:
+            ax.plot(Q_plot, H_inst_params_pres, linestyle="--", color="dimgray",
+                        label=r"CCI (apertura 90°)", linewidth=1.2, alpha=0.6)
+        
+        # 4. Curva Bomba
+        dibujar_bomba()
+        
+        # 5. LÍNEA VERTICAL (válvula cerrada) - NARANJA (curva activa)
+        y_techo = max(Hs) * 1.1
+        ax.plot([0, 0], [delta_z + dH0, y_techo], color="tab:orange", linewidth=3, 
+                    label=r"CCI activa (válvula cerrada)")
+        
+        # Punto de funcionamiento en rendimiento (Q=0) en eje derecho
+        eta_pf = float(bomba.eta(0.0)) * 100
+        ax2.plot([0], [eta_pf], "^", markersize=10, color="darkred", zorder=5)
+        
+        # Cartel rojo translúcido
+        ax.text(
+            0.5, 0.5, "CAUDAL NULO!",
+            transform=ax.transAxes, ha="center", va="center",
+            color="red", fontsize=22, fontweight="bold",
+            bbox=dict(facecolor="red", alpha=0.15, edgecolor="red", boxstyle="round,pad=0.6")
+        )
+        ax.set_ylim(bottom=0, top=y_techo)
+
+    else:
+        # === CASO NORMAL (apertura > 0) ===
+        
+        # 1. Curva de RENDIMIENTO en eje DERECHO (roja)
+        ax2.plot(Q_plot, eta_plot, "^-", color="tab:red", label=r"$\eta$ (%)", 
+                    linewidth=1.5, markersize=4, markevery=20)
+        
+        # 2. Curva por defecto (azul discontinuo) - solo si hay cambios
+        if any_change:
+            ax.plot(Q_plot, H_inst_default, linestyle="--", color="tab:blue", 
+                        label=r"CCI (por defecto)", linewidth=1.5, alpha=0.7)
+        
+        # 3. Curvas intermedias (gris discontinuo) - mostrar progresión
+        if params_changed and presion_changed:
+            ax.plot(Q_plot, H_inst_params, linestyle="--", color="gray",
+                        label=r"CCI (sin presión)", linewidth=1.2, alpha=0.6)
+        
+        if (params_changed or presion_changed) and apertura_changed:
+            ax.plot(Q_plot, H_inst_params_pres, linestyle="--", color="dimgray",
+                        label=r"CCI (apertura 90°)", linewidth=1.2, alpha=0.6)
+        
+        # 4. CURVA ACTIVA - SIEMPRE NARANJA CONTINUO
+        label_activa = r"CCI activa" if not apertura_changed else rf"CCI activa ({open_deg:.0f}°)"
+        ax.plot(Q_plot, H_inst_active, linestyle="-", color="tab:orange",
+                    label=label_activa, linewidth=2.5)
+        
+        # 5. Curva de la bomba
+        dibujar_bomba()
+        
+        # 6. Puntos de funcionamiento
+        if Qpf is not None and Hpf is not None:
+            # Punto en la curva H (eje izquierdo)
+            ax.plot([Qpf], [Hpf], "^", markersize=10, 
+                        label=r"Punto funcionamiento", color="darkred", zorder=5)
+            
+            # Punto en la curva de rendimiento (eje derecho)
+            eta_pf = float(bomba.eta(Qpf)) * 100
+            ax2.plot([Qpf], [eta_pf], "^", markersize=10, 
+                        color="darkred", zorder=5)
+
+        ax2.set_ylim(bottom=0, top=max(eta_plot) * 1.1)
+
+    # Cota piezométrica (incluyendo presión)
+    cota_total = delta_z + dH0
+    ax.axhline(cota_total, linestyle=":", linewidth=1, color="gray")
+    label_cota = "Cota piezométrica" if dH0 < 1e-9 else f"Cota + presión ({cota_total:.1f} m)"
+    ax.text(Q_plot.max()*0.02, cota_total+0.5, label_cota, fontsize=9, color="gray")
+
+    # Combinar leyendas de ambos ejes
+    lines1, labels1 = ax.get_legend_handles_labels()
+    lines2, labels2 = ax2.get_legend_handles_labels()
+    ax.legend(lines1 + lines2, labels1 + labels2, loc='upper right', fontsize=8)
+
+# ----------- Tabla virtual (solo se pintan las filas visibles) ----------- #
+class TablaVirtual:
+    """
+    Envuelve un ttk.Treeview con un número fijo de filas (las visibles) que
+    actúan como ventana sobre columnas numéricas de cualquier longitud.
+    Al actualizar los datos solo se reescriben las celdas que cambian.
+    """
+    def __init__(self, tree, scrollbar, formatos, n_visibles):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.formatos = formatos          # un formato por columna, p.ej. "{:5.0f}"
+        self.n_visibles = n_visibles
+        self.columnas = [np.empty(0) for _ in formatos]
+        self.n_filas = 0
+        self.offset = 0
+        vacio = ("",) * len(formatos)
+        self._iids = [tree.insert("", "end", values=vacio) for _ in range(n_visibles)]
+        self._mostrado = [None] * n_visibles   # tupla de textos pintada en cada fila
+        self._adjunta = [True] * n_visibles
+
+        scrollbar.configure(command=self.yview)
+        tree.bind("<MouseWheel>", self._on_wheel)
+        tree.bind("<Button-4>", lambda e: self._scroll(-1))
+        tree.bind("<Button-5>", lambda e: self._scroll(+1))
+
+    def set_data(self, *columnas):
+        """Sustituye los datos (arrays de igual longitud) y repinta la ventana visible."""
+        self.columnas = [np.asarray(c, dtype=float) for c in columnas]
+        self.n_filas = len(self.columnas[0]) if self.columnas else 0
+        self.offset = min(self.offset, max(self.n_filas - self.n_visibles, 0))
+        self._render()
+
+    def clear(self):
+        self.set_data(*[np.empty(0) for _ in self.formatos])
+
+    def _render(self):
+        for i, iid in enumerate(self._iids):
+            r = self.offset + i
+            if r >= self.n_filas:
+                if self._adjunta[i]:
+                    self.tree.detach(iid)
+                    self._adjunta[i] = False
+                    self._mostrado[i] = None
+                continue
+            if not self._adjunta[i]:
+                self.tree.move(iid, "", i)
+                self._adjunta[i] = True
+            vals = tuple(fmt.format(col[r]) for fmt, col in zip(self.formatos, self.columnas))
+            if vals != self._mostrado[i]:
+                self.tree.item(iid, values=vals)
+                self._mostrado[i] = vals
+        if self.n_filas > 0:
+            self.scrollbar.set(self.offset / self.n_filas,
+                               min(self.offset + self.n_visibles, self.n_filas) / self.n_filas)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _scroll(self, paso):
+        nuevo = min(max(self.offset + paso, 0), max(self.n_filas - self.n_visibles, 0))
+        if nuevo != self.offset:
+            self.offset = nuevo
+            self._render()
+
+    def _on_wheel(self, event):
+        self._scroll(-1 if event.delta > 0 else 1)
+        return "break"
+
+    def yview(self, *args):
+        """Protocolo de la scrollbar de Tk: ("moveto", f) o ("scroll", n, "units"|"pages")."""
+        if not args:
+            return
+        if args[0] == "moveto":
+            destino = int(round(float(args[1]) * self.n_filas))
+            self._scroll(destino - self.offset)
+        elif args[0] == "scroll":
+            n = int(args[1])
+            self._scroll(n * (self.n_visibles if args[2] == "pages" else 1))
+
 # ============================ GUI ============================ #
 class App(ctk.CTk):
     # Valores por defecto para referencia
@@ -148,7 +689,13 @@ class App(ctk.CTk):
         "L2": 500,  # m
         "eps": 0.01,  # cm
         "open_deg": 90,  # grados (0-90)
+        "friccion": FRICCION_HW,
+        "curva_bomba": CURVA_TABLA,
     }
+    # Resolución de la tabla Hmi/η (l/s) y filas visibles del Treeview
+    PASOS_TABLA_LPS = ["5", "1", "0.5", "0.1", "0.01"]
+    FILAS_TABLA = 8
+    Q_TABLA_MAX = 60.0
     
     def __init__(self):
         super().__init__()
@@ -165,8 +712,13 @@ class App(ctk.CTk):
         self.k_lps = None
         self.k_lps_default = None  # k para valores por defecto
         self.dH0_applied = 0.0  # Presión aplicada en depósito B (en mcl)
-        self.last_Qpf = None; self.last_Hpf = None; self.last_eta = None
+        self.pf_base = None      # Punto base (sin presión) del último cálculo: Q, H, eta, Pabs_kW
+        self.tabla_datos = None  # Columnas de la tabla (arrays) para exportar
+        self.curva_ap = None     # Barrido de apertura vigente (se reutiliza mientras no cambie la instalación)
         self._update_job = None
+        self.calculo = CalculoAsync(self)  # Resolución fuera del hilo de Tk
+        self.tabla_motor = (CARGA_MOTOR, ETA_MOTOR_IE3)  # η(carga) del motor; se puede cargar de CSV
+        self.variador = Variador()                       # mapa η(n/n0, par) del variador
 
         # Fuentes generales
         self.font_h1 = ctk.CTkFont(family="Segoe UI", size=20, weight="bold")
@@ -254,6 +806,12 @@ class App(ctk.CTk):
         self.L2_var  = ctk.StringVar(value="500")
         self.eps_var = ctk.StringVar(value="0.01")  # cm
         self.PB_var  = ctk.StringVar(value="")
+        self.z_bomba_var = ctk.StringVar(value="2")   # m, eje de la bomba sobre la lámina de A
+        self.z_sitio_var = ctk.StringVar(value="0")   # m, cota de la instalación (P_atm ISA)
+        self.friccion_var = ctk.StringVar(value=FRICCION_HW)
+        self.curva_bomba_var = ctk.StringVar(value=CURVA_TABLA)
+        self.accionamiento_var = ctk.StringVar(value=ACCIONAMIENTO_DIRECTO)
+        self.bomba = bomba_ajustada()
         
         # Válvula
         self.open_var  = ctk.StringVar(value="90")   # grados (0-90)
@@ -319,6 +877,43 @@ class App(ctk.CTk):
         ctk.CTkLabel(row_nu, text="ν (m²/s)", font=self.font_body).pack(side="left")
         ctk.CTkEntry(row_nu, textvariable=self.nu_var, width=100, justify="right").pack(side="left", padx=6)
         ctk.CTkLabel(row_nu, text="m²/s", font=self.font_body).pack(side="left")
+        self.nu_var.trace_add("write", lambda *_: self._schedule_recalc())
+
+        # ν y s a partir de la temperatura con las propiedades tabuladas del fluido
+        row_T = ctk.CTkFrame(controls); row_T.pack(fill="x", padx=6, pady=(0,8))
+        self.fluido_var = ctk.StringVar(value=AGUA.nombre)
+        self.T_fluido_var = ctk.StringVar(value="20")
+        ctk.CTkOptionMenu(row_T, variable=self.fluido_var, values=list(FLUIDOS), width=90).pack(side="left")
+        ctk.CTkEntry(row_T, textvariable=self.T_fluido_var, width=50, justify="right").pack(side="left", padx=(6,2))
+        ctk.CTkLabel(row_T, text="°C", font=self.font_body).pack(side="left")
+        ctk.CTkButton(row_T, text="ν y s a esta T", width=110, command=self.aplicar_fluido,
+                      fg_color="#555555", hover_color="#333333").pack(side="left", padx=6)
+
+        # Aspiración: NPSH con las pérdidas reales de la tubería 1 (P_v a la T del fluido)
+        row_asp = ctk.CTkFrame(controls); row_asp.pack(fill="x", padx=6, pady=(0,8))
+        ctk.CTkLabel(row_asp, text="z bomba", font=self.font_body).pack(side="left")
+        ctk.CTkEntry(row_asp, textvariable=self.z_bomba_var, width=50, justify="right").pack(side="left", padx=(6,2))
+        ctk.CTkLabel(row_asp, text="m   cota", font=self.font_body).pack(side="left")
+        ctk.CTkEntry(row_asp, textvariable=self.z_sitio_var, width=60, justify="right").pack(side="left", padx=(6,2))
+        ctk.CTkLabel(row_asp, text="m s.n.m.", font=self.font_body).pack(side="left")
+        for var in (self.z_bomba_var, self.z_sitio_var):
+            var.trace_add("write", lambda *_: self._schedule_recalc())
+
+        row_fr = ctk.CTkFrame(controls); row_fr.pack(fill="x", padx=6, pady=(0,8))
+        ctk.CTkLabel(row_fr, text="Fricción", font=self.font_body).pack(side="left")
+        ctk.CTkOptionMenu(row_fr, variable=self.friccion_var, values=FRICCION_MODELOS, width=210,
+                          command=lambda _: self._schedule_recalc()).pack(side="left", padx=6)
+
+        row_cb = ctk.CTkFrame(controls); row_cb.pack(fill="x", padx=6, pady=(0,8))
+        ctk.CTkLabel(row_cb, text="Curva bomba", font=self.font_body).pack(side="left")
+        ctk.CTkOptionMenu(row_cb, variable=self.curva_bomba_var, values=CURVAS_BOMBA, width=210,
+                          command=lambda _: self._schedule_recalc()).pack(side="left", padx=6)
+
+        row_el = ctk.CTkFrame(controls); row_el.pack(fill="x", padx=6, pady=(0,8))
+        ctk.CTkOptionMenu(row_el, variable=self.accionamiento_var, values=ACCIONAMIENTOS, width=150,
+                          command=lambda _: self._schedule_recalc()).pack(side="left")
+        ctk.CTkButton(row_el, text="Tablas motor / variador", width=170, command=self.cargar_tablas_electricas,
+                      fg_color="#555555", hover_color="#333333").pack(side="left", padx=6)
 
         # DIAMETROS COMERCIALES
         self.ent_D1, self.sl_D1 = add_entry_slider(controls, "D1 (comercial)", self.D1_var, "mm", 50.0, 400.0, 25.0, "{:.0f}")
@@ -346,6 +941,8 @@ class App(ctk.CTk):
         ctk.CTkEntry(pb_row, textvariable=self.PB_var, width=120, justify="right").pack(side="left", padx=4)
         self.d_btn = ctk.CTkButton(pb_row, text="Aplicar d) presurización", command=self.aplicar_presion_B, state="disabled")
         self.d_btn.pack(side="left", padx=4)
+        ctk.CTkButton(pres, text="Barrido P_B (0 → P_B,lím)", fg_color="#555555", hover_color="#333333",
+                      command=self.ventana_barrido_PB).pack(fill="x", padx=4, pady=(0,4))
 
         # Boton para restaurar valores por defecto
         reset_btn = ctk.CTkButton(controls, text="Restaurar valores iniciales", fg_color="#555555", hover_color="#333333", command=self.reset_valores)
@@ -353,19 +950,36 @@ class App(ctk.CTk):
 
         # Tabla Hmi y rendimiento
         table_frame = ctk.CTkFrame(controls); table_frame.pack(fill="both", expand=False, padx=6, pady=6)
-        ctk.CTkLabel(table_frame, text="Tabla cada 5 l/s", font=self.font_h2).pack(anchor="w", padx=6, pady=6)
+        head_tab = ctk.CTkFrame(table_frame, fg_color="transparent"); head_tab.pack(fill="x", padx=6, pady=6)
+        ctk.CTkLabel(head_tab, text="Tabla cada", font=self.font_h2).pack(side="left")
+        self.paso_tabla_var = ctk.StringVar(value="5")
+        ctk.CTkOptionMenu(head_tab, variable=self.paso_tabla_var, values=self.PASOS_TABLA_LPS, width=80,
+                          command=lambda _: self._schedule_recalc()).pack(side="left", padx=6)
+        ctk.CTkLabel(head_tab, text="l/s", font=self.font_h2).pack(side="left")
+        tree_row = ctk.CTkFrame(table_frame, fg_color="transparent"); tree_row.pack(fill="both", expand=True, padx=6, pady=6)
         columns = ("Q_lps", "Hmi_m", "eta_pct")
-        self.tree = ttk.Treeview(table_frame, columns=columns, show="headings", height=8)
+        self.tree = ttk.Treeview(tree_row, columns=columns, show="headings", height=self.FILAS_TABLA)
         self.tree.heading("Q_lps", text="Q (l/s)")
         self.tree.heading("Hmi_m", text="Hmi (m)")
         self.tree.heading("eta_pct", text="η (%)")
         self.tree.column("Q_lps", width=70, anchor="center")
         self.tree.column("Hmi_m", width=80, anchor="center")
         self.tree.column("eta_pct", width=70, anchor="center")
-        self.tree.pack(fill="both", expand=True, padx=6, pady=6)
+        tree_sb = ttk.Scrollbar(tree_row, orient="vertical")
+        self.tree.pack(side="left", fill="both", expand=True)
+        tree_sb.pack(side="right", fill="y")
+        self.tabla = TablaVirtual(self.tree, tree_sb, ("{:g}", "{:6.2f}", "{:.0f}"), self.FILAS_TABLA)
         export_row = ctk.CTkFrame(controls); export_row.pack(fill="x", padx=6, pady=6)
-        ctk.CTkButton(export_row, text="Exportar tabla a CSV", command=self.exportar_csv).pack(side="left", padx=4)
+        ctk.CTkButton(export_row, text="Exportar tabla", command=self.exportar_csv).pack(side="left", padx=4)
         ctk.CTkButton(export_row, text="Guardar gráfica", command=self.guardar_grafica).pack(side="left", padx=4)
+        ctk.CTkButton(controls, text="Exportar barrido de apertura (PDF/PNG)", fg_color="#555555", hover_color="#333333",
+                      command=self.exportar_barrido_apertura).pack(fill="x", padx=6, pady=(0,6))
+        ctk.CTkButton(controls, text="Apertura para un Q / H objetivo", fg_color="#555555", hover_color="#333333",
+                      command=self.ventana_apertura_objetivo).pack(fill="x", padx=6, pady=(0,6))
+        ctk.CTkButton(controls, text="Golpe de ariete (cierre de válvula)", fg_color="#555555", hover_color="#333333",
+                      command=self.ventana_golpe_ariete).pack(fill="x", padx=6, pady=(0,6))
+        ctk.CTkButton(controls, text="Arranque / disparo de la bomba", fg_color="#555555", hover_color="#333333",
+                      command=self.ventana_arranque_parada).pack(fill="x", padx=6, pady=(0,10))
 
         # Derecha: gráfico y resultados (resumidos lado izquierdo)
         right = ctk.CTkFrame(root)
@@ -378,8 +992,13 @@ class App(ctk.CTk):
         plot_frame = ctk.CTkFrame(right)
         plot_frame.grid(row=0, column=0, sticky="nsew", padx=4, pady=(4,2))
         self.fig = plt.Figure(figsize=(6.8, 4.8))
-        self.ax = self.fig.add_subplot(111)
+        gs = self.fig.add_gridspec(2, 1, height_ratios=[3.0, 1.3], hspace=0.45)
+        self.ax = self.fig.add_subplot(gs[0, 0])
         self.ax2 = self.ax.twinx()
+        # Gráfica secundaria: barrido de apertura Q(θ), H(θ), η(θ), P_abs(θ)
+        self.ax_ap = self.fig.add_subplot(gs[1, 0])
+        self.ax_ap2 = self.ax_ap.twinx()
+        self._ap_dibujada = None; self._ap_npsh = None; self._ap_electrica = None; self._ap_marcas = []
         self.ax.set_xlabel("Q (l/s)"); self.ax.set_ylabel(r"$H_m$ (m.c.l.)")
         self.ax2.set_ylabel(r"$\eta$ (%)")
         self.ax.set_title("Curvas características y punto de funcionamiento"); self.ax.grid(True)
@@ -517,7 +1136,9 @@ class App(ctk.CTk):
         add_note_section("Modelo Hidráulico", [
             "Bernoulli entre A y B: Hmi = Δz + hf (con Δz = 10 m).",
             "Pérdidas por fricción (Hazen-Williams): hf = Σ 10.67·L·Q^1.852 / (C^1.852·D^4.87).",
-            "Coeficiente C_HW asignado dinámicamente según rugosidad relativa ε/D (Tabla del enunciado)."
+            "Coeficiente C_HW asignado dinámicamente según rugosidad relativa ε/D (Tabla del enunciado).",
+            "Alternativa Darcy-Weisbach: hf = Σ f·(L/D)·V²/2g, con f de Colebrook-White según Re = V·D/ν y ε/D "
+            "(semilla de Swamee-Jain + Newton, vectorizado sobre todos los caudales)."
         ])
 
         # Sección 2: Equipos
@@ -525,13 +1146,22 @@ class App(ctk.CTk):
             "Bomba centrífuga funcionando a velocidad nominal constante (1490 rpm).",
             "Válvula de asiento (Globo, Parabolic Plug) modelada según catálogo Fisher/Emerson.",
             "Valve Sizing: Kv_max fijado internamente en 300 m³/h para garantizar autoridad de control.",
-            "Comportamiento límite: A 0% apertura (cerrada), la resistencia es infinita y el caudal es estrictamente nulo."
+            "Comportamiento límite: A 0% apertura (cerrada), la resistencia es infinita y el caudal es estrictamente nulo.",
+            "Curva de la bomba: tabla interpolada linealmente (referencia), polinomio de mínimos cuadrados o spline "
+            "monótono PCHIP; las curvas ajustadas tienen derivada analítica y el punto de funcionamiento se resuelve por Newton.",
+            "Apertura para un objetivo: hv = H_bomba(Q) - H_inst(Q) sin válvula, Kv = 3.6·Q/√(hv·s/10) y θ se lee "
+            "invirtiendo la tabla Kv(θ) del diámetro; P perdida = γ·Q·hv/η en el eje de la bomba."
         ])
 
         # Sección 3: Cálculos Avanzados
         add_note_section("Análisis de Presión", [
             "Presurización del depósito B: Se modela añadiendo una altura piezométrica equivalente ΔH0 = 10·PB/s.",
-            "PB Límite: Es la presión mínima en B necesaria para igualar la altura de la bomba a caudal cero (Shut-off head), impidiendo la circulación."
+            "PB Límite: Es la presión mínima en B necesaria para igualar la altura de la bomba a caudal cero (Shut-off head), impidiendo la circulación.",
+            "Barrido P_B: todas las presiones de 0 a P_B,lím se resuelven en una pasada vectorizada; el deslizador solo lee los arrays.",
+            "Golpe de ariete: método de las características en la impulsión D2/L2, con la bomba (menos pérdidas de aspiración) aguas arriba "
+            "y la válvula descargando a B; la ley de cierre recorre Kv(θ) linealmente en el tiempo.",
+            "Arranque / disparo: columna rígida (Σ L/gA) acoplada a la inercia del grupo; la bomba sigue las leyes de "
+            "semejanza a partir de la curva a 1490 rpm y el motor de arranque se modela con la fórmula de Kloss."
         ])
 
     # -------------------- Helpers -------------------- #
@@ -559,6 +1189,7 @@ class App(ctk.CTk):
         self.k_lps_default = k_total_lps
     
     def _draw_static_ccb(self):
+        self.ax_ap.cla(); self.ax_ap2.cla(); self._ap_dibujada = None
         self.ax.cla(); self.ax2.cla(); self.ax.grid(True)
         self.ax2.yaxis.tick_right()
         self.ax2.yaxis.set_label_position('right')
@@ -571,7 +1202,7 @@ class App(ctk.CTk):
     def _parse_inputs(self):
         try:
             s   = float(self.s_var.get().replace(",", "."))
-            nu  = float(self.nu_var.get().replace(",", "."))  # informativo
+            nu  = float(self.nu_var.get().replace(",", "."))  # Darcy-Weisbach y corrección HI de la bomba
             D1m = float(self.D1_var.get().replace(",", "."))/1000.0
             L1  = float(self.L1_var.get().replace(",", "."))
             D2m = float(self.D2_var.get().replace(",", "."))/1000.0
@@ -579,7 +1210,7 @@ class App(ctk.CTk):
             L2  = float(self.L2_var.get().replace(",", "."))
             eps = float(self.eps_var.get().replace(",", "."))  # cm
             open_deg = float(self.open_var.get().replace(",", "."))  # grados
-            if D1m <= 0 or D2m <= 0 or L1 <= 0 or L2 <= 0 or s <= 0:
+            if D1m <= 0 or D2m <= 0 or L1 <= 0 or L2 <= 0 or s <= 0 or nu <= 0 or eps < 0:
                 raise ValueError
             open_deg = round(min(max(open_deg, 0.0), 90.0))  # entero 0..90
             return s, nu, D1m, L1, D2m, D2_mm, L2, eps, open_deg
@@ -587,7 +1218,20 @@ class App(ctk.CTk):
             messagebox.showerror("Error", "Entrada no válida. Revisa las casillas.")
             return None
 
-    def _cci_params(self, D1m, L1, D2m, L2, eps_cm):
+    def _parse_aspiracion(self):
+        """Datos de la aspiración para el NPSH: z de la bomba sobre A, cota, T y fluido."""
+        try:
+            return dict(z_bomba=float(self.z_bomba_var.get().replace(",", ".")),
+                        z_sitio=float(self.z_sitio_var.get().replace(",", ".")),
+                        T=float(self.T_fluido_var.get().replace(",", ".")),
+                        fluido=self.fluido_var.get())
+        except ValueError:
+            messagebox.showerror("Error", "Datos de aspiración no válidos (z bomba, cota o T).")
+            return None
+
+    def _cci_params(self, D1m, L1, D2m, L2, eps_cm, nu=None, friccion=FRICCION_HW):
+        """C_HW y J de cada tramo, y el modelo de pérdidas: k_lps (Hazen-Williams)
+        o un TuberiasSerieDW (Darcy-Weisbach/Colebrook, necesita nu)."""
         C1 = choose_CHW_from_eps_over_D(eps_cm, D1m)
         C2 = choose_CHW_from_eps_over_D(eps_cm, D2m)
         kL1 = hazen_williams_k_per_length(D1m, C1)
@@ -595,6 +1239,8 @@ class App(ctk.CTk):
         k_total_lps = (kL1*L1 + kL2*L2) / (1000.0**1.852)
         J1_lps = kL1 / (1000.0**1.852)
         J2_lps = kL2 / (1000.0**1.852)
+        if friccion == FRICCION_DW:
+            k_total_lps = TuberiasSerieDW([D1m, D2m], [L1, L2], eps_cm/100.0, nu)
         return C1, C2, J1_lps, J2_lps, k_total_lps
 
     def H_inst_lps(self, q_lps, k_lps, s_rel, D2_mm, open_deg, dH0=0.0):
@@ -602,49 +1248,137 @@ class App(ctk.CTk):
         D2_mm: Diámetro de la válvula en mm
         open_deg: Grado de apertura (0-90°)
         """
-        base = (self.delta_z + dH0) + k_lps*(q_lps**1.852)
+        base = (self.delta_z + dH0) + hf_tuberias_lps(q_lps, k_lps)
         hf_val = hf_valve_new(q_lps, s_rel, D2_mm, open_deg)
         return base + hf_val
 
+    def H_inst_lps_arr(self, q_lps, k_lps, s_rel, D2_mm, open_deg, dH0=0.0):
+        """Igual que H_inst_lps pero para un array de caudales (una sola pasada NumPy)."""
+        return H_inst_arr(q_lps, k_lps, s_rel, D2_mm, open_deg, self.delta_z, dH0=dH0)
+
+    def _q_tabla(self):
+        """Rejilla de caudales de la tabla según el paso seleccionado."""
+        try:
+            paso = float(self.paso_tabla_var.get().replace(",", "."))
+        except ValueError:
+            paso = 5.0
+        paso = max(paso, 1e-3)
+        n = int(np.floor(self.Q_TABLA_MAX / paso + 1e-9)) + 1
+        return np.arange(n) * paso
+
+    def _mostrar_tabla(self, tabla):
+        self.tabla.set_data(tabla["Q_lps"], tabla["Hmi_m"], tabla["eta_pct"])
+        self.tabla_datos = tabla
+
     # -------------------- Acciones principales -------------------- #
     def calcular(self):
         parsed = self._parse_inputs()
         if not parsed: return
-        s, nu, D1m, L1, D2m, D2_mm, L2, eps_cm, open_deg = parsed
-
-        C1, C2, J1_lps, J2_lps, k_lps = self._cci_params(D1m, L1, D2m, L2, eps_cm)
-        self.k_lps = k_lps
-        self.D2_mm = D2_mm  # Guardar para uso posterior
-
-        qs = np.arange(0.0, 61.0+1e-9, 5.0)
-        
+        aspiracion = self._parse_aspiracion()
+        if not aspiracion: return
+        # Copia de la entrada: el hilo de cálculo no lee widgets ni estado mutable
+        snapshot = dict(parsed=parsed, dH0=self.dH0_applied, qs=self._q_tabla(), curva_ap=self.curva_ap,
+                        friccion=self.friccion_var.get(), curva_bomba=self.curva_bomba_var.get(),
+                        aspiracion=aspiracion, tabla_motor=self.tabla_motor, variador=self._variador_activo())
+        self.calculo.enviar(self._resolver, snapshot, on_result=self._renderizar,
+                            on_error=lambda e: self.res_status.set(f"Error de cálculo: {e}"))
+
+    def _resolver(self, snap):
+        """Resuelve a), b), c) y la tabla a partir del snapshot (se ejecuta en el pool)."""
+        s, nu, D1m, L1, D2m, D2_mm, L2, eps_cm, open_deg = snap["parsed"]
         # Usar la presión aplicada (puede ser 0 si no se ha aplicado)
-        dH0 = self.dH0_applied
-
-        # --- PUNTO DE FUNCIONAMIENTO BASE (sin presión, para [b] y [c]) ---
-        def equilibrio_base(q):
-            return H_bomba(q) - self.H_inst_lps(q, k_lps, s, D2_mm, open_deg, dH0=0.0)
-
-        Qmax_busca = 65.0
-        Qpf_base = bisect_root(equilibrio_base, 0.0, Qmax_busca, tol=1e-8)
-
-        # --- PUNTO DE FUNCIONAMIENTO ACTIVO (con presión, para gráfica) ---
-        def equilibrio_activo(q):
-            return H_bomba(q) - self.H_inst_lps(q, k_lps, s, D2_mm, open_deg, dH0=dH0)
-
-        Qpf_activo = bisect_root(equilibrio_activo, 0.0, Qmax_busca, tol=1e-8)
+        dH0 = snap["dH0"]
+
+        friccion = snap["friccion"]
+        C1, C2, J1_lps, J2_lps, k_lps = self._cci_params(D1m, L1, D2m, L2, eps_cm, nu, friccion)
+        bomba = bomba_ajustada(snap["curva_bomba"], nu)
+        viscosidad = correccion_hi(Qb_ls, Hb_m, eta_p, nu, N_BOMBA_RPM)
+
+        # --- BARRIDO DE APERTURA: solo se recalcula si cambia algo distinto de la apertura ---
+        clave = tuple(snap["parsed"][:-1]) + (dH0, friccion, snap["curva_bomba"])
+        curva = snap["curva_ap"]
+        if curva is None or curva["clave"] != clave:
+            curva = dict(clave=clave, base=curva_apertura(k_lps, s, D2_mm, self.delta_z, dH0=0.0, bomba=bomba))
+            curva["activa"] = curva["base"] if dH0 == 0.0 else \
+                curva_apertura(k_lps, s, D2_mm, self.delta_z, dH0=dH0, bomba=bomba)
+
+        # --- NPSH EN TODO EL BARRIDO: pérdidas de la tubería 1 en el Q de cada apertura ---
+        asp = snap["aspiracion"]
+        clave_npsh = tuple(sorted(asp.items()))
+        if curva.get("npsh", {}).get("clave") != clave_npsh:
+            def npsh(c):
+                hf_asp = hf_aspiracion_lps(c["Q"], k_lps, J1_lps, L1)
+                return dict(npsh_instalacion(c["Q"], hf_asp, asp["z_bomba"], s, asp["T"], asp["z_sitio"],
+                                             FLUIDOS[asp["fluido"]]), hf_asp=hf_asp)
+            curva = dict(curva, npsh=dict(clave=clave_npsh, base=npsh(curva["base"])))
+            curva["npsh"]["activa"] = curva["npsh"]["base"] if curva["activa"] is curva["base"] \
+                else npsh(curva["activa"])
+
+        # --- POTENCIA ELÉCTRICA EN TODO EL BARRIDO (motor y variador sobre P_abs) ---
+        cadena = cadena_bomba(bomba, s, snap["tabla_motor"], snap["variador"])
+        clave_el = (cadena.motor.P_nom_kW,) + clave_tablas(snap["tabla_motor"], snap["variador"])
+        if curva.get("electrica", {}).get("clave") != clave_el:
+            def electrica(c):
+                return dict(P_kW=cadena.P_electrica(c["Pabs_kW"]), kWh_m3=cadena.kWh_m3(c["Pabs_kW"], c["Q"]))
+            curva = dict(curva, electrica=dict(clave=clave_el, base=electrica(curva["base"]), resumen=cadena.resumen()))
+            curva["electrica"]["activa"] = curva["electrica"]["base"] if curva["activa"] is curva["base"] \
+                else electrica(curva["activa"])
+
+        # --- PUNTO DE FUNCIONAMIENTO BASE (sin presión, para [b] y [c]) y ACTIVO (con presión, para gráfica) ---
+        # Consulta en el barrido (open_deg es un entero 0..90)
+        i_ap = int(open_deg)
+        Qpf_base = float(curva["base"]["Q"][i_ap]); Qpf_activo = float(curva["activa"]["Q"][i_ap])
+        # Válvula cerrada (Q = 0 a 0°) va por la misma rama que sin intersección
+        Qpf_base = None if np.isnan(Qpf_base) or Qpf_base <= 0.0 else Qpf_base
+        Qpf_activo = None if np.isnan(Qpf_activo) else Qpf_activo
         
         # Obtener Kv actual para mostrar
         Kv_actual = get_Kv_from_diameter_and_aperture(D2_mm, open_deg)
+
+        # Tabla (usa valores activos con presión para reflejar el estado actual)
+        qs = snap["qs"]
+        tabla = {"Q_lps": qs,
+                 "Hmi_m": self.H_inst_lps_arr(qs, k_lps, s, D2_mm, open_deg, dH0=dH0),
+                 "eta_pct": bomba.eta(qs) * 100.0}  # Rendimiento en %
+
+        # [d] Punto con B presurizado: va en el resultado, así que no se pierde si otro cálculo lo sustituye
+        presion_B = None
+        if dH0 > 0.0:
+            presion_B = dict(PB=dH0 * s / 10.0, dH0=dH0, Q=Qpf_activo)
+            if Qpf_activo is not None:
+                H_d = float(bomba.H(Qpf_activo)); eta_d = float(bomba.eta(Qpf_activo))
+                presion_B.update(H=H_d, eta=eta_d,
+                                 Pabs_kW=9800.0*s*(Qpf_activo/1000.0)*H_d/max(eta_d, 1e-9)/1000.0)
+
+        return dict(parsed=snap["parsed"], dH0=dH0, C1=C1, C2=C2, J1_lps=J1_lps, J2_lps=J2_lps,
+                    k_lps=k_lps, Qpf_base=Qpf_base, Qpf_activo=Qpf_activo, Kv_actual=Kv_actual, tabla=tabla,
+                    curva_ap=curva, friccion=friccion, bomba=bomba, viscosidad=viscosidad, presion_B=presion_B)
+
+    def _renderizar(self, r):
+        """Vuelca un resultado de _resolver en el dashboard, textos, tabla y gráfica (hilo de Tk)."""
+        s, nu, D1m, L1, D2m, D2_mm, L2, eps_cm, open_deg = r["parsed"]
+        C1, C2, J1_lps, J2_lps, k_lps = r["C1"], r["C2"], r["J1_lps"], r["J2_lps"], r["k_lps"]
+        Qpf_base, Qpf_activo, Kv_actual, dH0 = r["Qpf_base"], r["Qpf_activo"], r["Kv_actual"], r["dH0"]
+        self.k_lps = k_lps
+        self.D2_mm = D2_mm  # Guardar para uso posterior
+        bomba = self.bomba = r["bomba"]
+        self.curva_ap = r["curva_ap"]
+        self._plot_apertura(self.curva_ap["activa"], open_deg, self.curva_ap["npsh"]["activa"],
+                            self.curva_ap["electrica"]["activa"])
         
         # --- ACTUALIZAR DATOS DE DASHBOARD (Pestaña Resultados) ---
         
         # 1. Sección A (CCI) - Se actualiza siempre
-        self.res_a_chw.set(f"C_HW1={C1:.0f}, C_HW2={C2:.0f} (según ε/D={eps_cm/100/D1m:.1e})")
-        self.res_a_ecuacion.set(f"Hmi(Q) = {self.delta_z:.2f} + {k_lps:.5f}·Q^1.852 + hf_valv(Q)")
+        darcy = isinstance(k_lps, TuberiasSerieDW)
+        if darcy:
+            self.res_a_chw.set(f"ε/D1={eps_cm/100/D1m:.1e}, ε/D2={eps_cm/100/D2m:.1e}, ν={nu:.1e} m²/s")
+            self.res_a_ecuacion.set(f"Hmi(Q) = {self.delta_z:.2f} + Σ f·(L/D)·V²/2g + hf_valv(Q)")
+        else:
+            self.res_a_chw.set(f"C_HW1={C1:.0f}, C_HW2={C2:.0f} (según ε/D={eps_cm/100/D1m:.1e})")
+            self.res_a_ecuacion.set(f"Hmi(Q) = {self.delta_z:.2f} + {k_lps:.5f}·Q^1.852 + hf_valv(Q)")
         
         # 2. Sección E (PB Límite) - Se actualiza siempre
-        Hb0 = H_bomba(0.0)
+        Hb0 = float(bomba.H(0.0))
         dH0_lim_m = max(Hb0 - self.delta_z, 0.0)
         PB_lim_kPa = 9800.0 * s * dH0_lim_m / 1000.0
         PB_lim_kgcm2 = s * dH0_lim_m / 10.0
@@ -654,12 +1388,22 @@ class App(ctk.CTk):
         # --- CONSTRUCCIÓN DEL TEXTO PARA EL PANEL INTERACTIVO (UNIFICADO) ---
         
         # Parte A (Siempre visible)
-        str_a = (
-            f"[a] Curva característica de la instalación:\n"
-            f"    CHW1={C1:.0f}, CHW2={C2:.0f} (según ε/D).\n"
-            f"    J1={J1_lps:.6e} y J2={J2_lps:.6e}.\n"
-            f"    Hmi(Q) = {self.delta_z:.2f} + {k_lps:.6f}·Q^1.852 + hf_válvula(Q)."
-        )
+        if darcy:
+            Q_f = Qpf_base if Qpf_base else self.Q_plot[-1]
+            f1, f2 = k_lps.factor_friccion(Q_f)
+            str_a = (
+                f"[a] Curva característica de la instalación (Darcy-Weisbach):\n"
+                f"    f1={f1:.4f}, f2={f2:.4f} (Colebrook, Q={Q_f:.2f} l/s).\n"
+                f"    ε/D1={eps_cm/100/D1m:.2e}, ε/D2={eps_cm/100/D2m:.2e}, ν={nu:.2e} m²/s.\n"
+                f"    Hmi(Q) = {self.delta_z:.2f} + Σ f(Re)·(L/D)·V²/2g + hf_válvula(Q)."
+            )
+        else:
+            str_a = (
+                f"[a] Curva característica de la instalación:\n"
+                f"    CHW1={C1:.0f}, CHW2={C2:.0f} (según ε/D).\n"
+                f"    J1={J1_lps:.6e} y J2={J2_lps:.6e}.\n"
+                f"    Hmi(Q) = {self.delta_z:.2f} + {k_lps:.6f}·Q^1.852 + hf_válvula(Q)."
+            )
         # Parte E (Siempre visible)
         str_e = (
             f"[e] P_B,límite en el depósito B (umbral sin circulación):\n"
@@ -682,22 +1426,20 @@ class App(ctk.CTk):
             
             # Textos panel interactivo
             str_b = f"[b] Punto de funcionamiento:\n    Apertura = {open_deg:.0f}°.\n    Q = 0.00 l/s (Cerrado)."
-            str_c = f"[c] Potencia absorbida:\n    P_abs = 0.00 kW."
+            self.pf_base = None
+            str_c = self._texto_c()
             
             self._set_text(self.txt_res_ab, f"{str_a}\n\n{str_b}")
-            self._set_text(self.txt_res_cde, f"{str_c}\nd) Introduce P_B y pulsa el botón.\n{str_e}")
+            self._set_text(self.txt_res_cde, f"{str_c}\n{self._texto_d(r['presion_B'])}\n{str_e}")
 
             # Tabla
-            for row in self.tree.get_children(): self.tree.delete(row)
-            for q in qs:
-                eta_q = eta_bomba(q) * 100  # Rendimiento en %
-                self.tree.insert("", "end", values=(f"{q:5.0f}", f"{self.H_inst_lps(q, k_lps, s, D2_mm, open_deg, dH0=dH0):6.2f}", f"{eta_q:.0f}"))
+            self._mostrar_tabla(r["tabla"])
             
             self.d_btn.configure(state="disabled")
             return
 
         # CASO NORMAL (Con caudal base)
-        Hpf_base = H_bomba(Qpf_base); etapf_base = eta_bomba(Qpf_base)
+        Hpf_base = float(bomba.H(Qpf_base)); etapf_base = float(bomba.eta(Qpf_base))
         gamma = 9800.0 * s
         Pabs_kW_base = gamma*(Qpf_base/1000.0)*Hpf_base/max(etapf_base,1e-9)/1000.0
 
@@ -714,173 +1456,86 @@ class App(ctk.CTk):
         str_b = (
             f"[b] Punto de funcionamiento:\n"
             f"    Apertura = {open_deg:.0f}°.\n"
-            f"    Q = {Qpf_base:.2f} l/s, H = {Hpf_base:.2f} m, η = {etapf_base*100:.1f} %."
+            f"    Q = {Qpf_base:.2f} l/s, H = {Hpf_base:.2f} m, η = {etapf_base*100:.1f} %.\n"
+            f"    Curva bomba: {bomba.resumen()}."
         )
-        str_c = f"[c] Potencia absorbida:\n    P_abs ≈ {Pabs_kW_base:.2f} kW."
+        if r["viscosidad"].corregida:
+            str_b += f"\n    Corrección por viscosidad (HI): {r['viscosidad'].resumen()}."
+        # Varias intersecciones o tangencia: se avisa en lugar de quedarse con una sin decirlo
+        raices = self.curva_ap["base"]["raices"]
+        i_ap = int(open_deg)
+        if raices.n[i_ap] > 1 or raices.tangente[i_ap].any():
+            str_b += f"\n    ⚠ Intersecciones bomba-instalación: {raices.describir(i_ap)}; se toma la menor estable."
+            self.res_status.set(f"Atención: {raices.n[i_ap]} intersecciones bomba-instalación (ver [b]).")
+        # NPSH en el punto base y aperturas del barrido que cavitan
+        npsh = self.curva_ap["npsh"]["base"]
+        th = self.curva_ap["base"]["theta"]
+        str_b += (f"\n    Aspiración: hf1 = {npsh['hf_asp'][i_ap]:.2f} m, NPSH_disp = {npsh['disp'][i_ap]:.2f} m, "
+                  f"NPSH_req = {npsh['req'][i_ap]:.2f} m.")
+        if npsh["cavita"].any():
+            str_b += f"\n    ⚠ Cavita con aperturas ≥ {th[npsh['cavita']].min():.0f}° (zona roja del barrido)."
+        if npsh["cavita"][i_ap]:
+            self.res_status.set(f"Atención: CAVITACIÓN. NPSH_disp = {npsh['disp'][i_ap]:.2f} m < "
+                                f"NPSH_req = {npsh['req'][i_ap]:.2f} m; baja la bomba o cierra la válvula.")
+        el = self.curva_ap["electrica"]
+        self.pf_base = dict(Q=Qpf_base, H=Hpf_base, eta=etapf_base, Pabs_kW=Pabs_kW_base,
+                            NPSH_disp=float(npsh["disp"][i_ap]), NPSH_req=float(npsh["req"][i_ap]),
+                            P_elec_kW=float(el["base"]["P_kW"][i_ap]), kWh_m3=float(el["base"]["kWh_m3"][i_ap]),
+                            cadena=el["resumen"])
+        str_c = self._texto_c()
 
         self._set_text(self.txt_res_ab, f"{str_a}\n\n{str_b}")
-        self._set_text(self.txt_res_cde, f"{str_c}\nd) Introduce P_B y pulsa el botón.\n{str_e}")
+        self._set_text(self.txt_res_cde, f"{str_c}\n{self._texto_d(r['presion_B'])}\n{str_e}")
 
         # Tabla (usa valores activos con presión para reflejar el estado actual)
-        for row in self.tree.get_children(): self.tree.delete(row)
-        for q in qs:
-            eta_q = eta_bomba(q) * 100  # Rendimiento en %
-            self.tree.insert("", "end", values=(f"{q:5.0f}", f"{self.H_inst_lps(q, k_lps, s, D2_mm, open_deg, dH0=dH0):6.2f}", f"{eta_q:.0f}"))
+        self._mostrar_tabla(r["tabla"])
 
         # Gráfica (usa punto activo con presión)
         Qpf_graph = Qpf_activo
-        Hpf_graph = H_bomba(Qpf_activo) if Qpf_activo is not None else None
+        Hpf_graph = float(bomba.H(Qpf_activo)) if Qpf_activo is not None else None
         self._plot_curvas(k_lps, s, D2_mm, open_deg, Qpf=Qpf_graph, Hpf=Hpf_graph)
 
-        # Guardar punto activo (para uso en aplicar_presion_B)
-        if Qpf_activo is not None:
-            self.last_Qpf = Qpf_activo
-            self.last_Hpf = H_bomba(Qpf_activo)
-            self.last_eta = eta_bomba(Qpf_activo)
-        else:
-            self.last_Qpf, self.last_Hpf, self.last_eta = None, None, None
         self.d_btn.configure(state="normal")
 
     def _plot_curvas(self, k_lps, s, D2_mm, open_deg, Qpf=None, Hpf=None):
-        self.ax.cla(); self.ax2.cla(); self.ax.grid(True)
-        self.ax2.yaxis.tick_right()
-        self.ax2.yaxis.set_label_position('right')
-        self.ax.set_xlabel(r"$Q$ (L/s)"); self.ax.set_ylabel(r"$H_m$ (m.c.l.)")
-        self.ax2.set_ylabel(r"$\eta$ (%)")
-        self.ax.set_title("Curvas características y punto de funcionamiento")
-
-        Q_plot = self.Q_plot
-        d = self.DEFAULT_VALUES
-        dH0 = self.dH0_applied  # Presión aplicada
-        
-        # Valores por defecto
-        s_def = d["s"]
-        D2_def = d["D2"]  # mm
-        open_deg_def = d["open_deg"]  # grados
-        
-        # === DEFINIR TODAS LAS CURVAS ===
-        # Curva por defecto (todo en valores iniciales)
-        H_inst_default = [self.H_inst_lps(q, self.k_lps_default, s_def, D2_def, open_deg_def, dH0=0.0) for q in Q_plot]
-        
-        # Curva con parámetros modificados (sin presión, apertura máxima)
-        H_inst_params = [self.H_inst_lps(q, k_lps, s, D2_mm, 90, dH0=0.0) for q in Q_plot]
-        
-        # Curva con parámetros + presión (apertura máxima)
-        H_inst_params_pres = [self.H_inst_lps(q, k_lps, s, D2_mm, 90, dH0=dH0) for q in Q_plot]
-        
-        # Curva ACTIVA (parámetros + presión + apertura) - SIEMPRE NARANJA
-        H_inst_active = [self.H_inst_lps(q, k_lps, s, D2_mm, open_deg, dH0=dH0) for q in Q_plot]
-        
-        # Curva de RENDIMIENTO de la bomba
-        eta_plot = [eta_bomba(q) * 100 for q in Q_plot]  # En %
-        
-        # === DETECTAR QUÉ HA CAMBIADO ===
-        params_changed = (self.k_lps_default is not None and 
-                          abs(k_lps - self.k_lps_default) > 1e-12) or \
-                          abs(s - s_def) > 1e-9 or \
-                          abs(D2_mm - D2_def) > 1e-9
-        presion_changed = dH0 > 1e-9
-        apertura_changed = open_deg < 90
-        any_change = params_changed or presion_changed or apertura_changed
-        
-        # Curva Bomba Fija
-        Qs, Hs = Qb_ls, Hb_m
-
-        if open_deg == 0:
-            # === CASO VÁLVULA CERRADA ===
-            
-            # 1. Curva de RENDIMIENTO en eje DERECHO (roja)
-            self.ax2.plot(Q_plot, eta_plot, "^-", color="tab:red", label=r"$\eta$ (%)", 
-                        linewidth=1.5, markersize=4, markevery=20)
-            
-            # 2. Curva por defecto (azul discontinuo) - solo si hay cambios
-            if any_change:
-                self.ax.plot(Q_plot, H_inst_default, linestyle="--", color="tab:blue", 
-                            label=r"CCI (por defecto)", linewidth=1.5, alpha=0.7)
-            
-            # 3. Curvas intermedias (gris discontinuo)
-            if params_changed and presion_changed:
-                self.ax.plot(Q_plot, H_inst_params, linestyle="--", color="gray",
-                            label=r"CCI (sin presión)", linewidth=1.2, alpha=0.6)
-            
-            if (params_changed or presion_changed) and apertura_changed:
-                self.ax.plot(Q_plot, H_inst_params_pres, linestyle="--", color="dimgray",
-                            label=r"CCI (apertura 90°)", linewidth=1.2, alpha=0.6)
-            
-            # 4. Curva Bomba
-            self.ax.plot(Qs, Hs, "o-", color="tab:green", label=r"CC bomba (1490 rpm)", linewidth=2)
-            
-            # 5. LÍNEA VERTICAL (válvula cerrada) - NARANJA (curva activa)
-            y_techo = max(Hs) * 1.1
-            self.ax.plot([0, 0], [self.delta_z + dH0, y_techo], color="tab:orange", linewidth=3, 
-                        label=r"CCI activa (válvula cerrada)")
-            
-            # Punto de funcionamiento en rendimiento (Q=0) en eje derecho
-            eta_pf = eta_bomba(0) * 100
-            self.ax2.plot([0], [eta_pf], "^", markersize=10, color="darkred", zorder=5)
-            
-            # Cartel rojo translúcido
-            self.ax.text(
-                0.5, 0.5, "CAUDAL NULO!",
-                transform=self.ax.transAxes, ha="center", va="center",
-                color="red", fontsize=22, fontweight="bold",
-                bbox=dict(facecolor="red", alpha=0.15, edgecolor="red", boxstyle="round,pad=0.6")
-            )
-            self.ax.set_ylim(bottom=0, top=y_techo)
+        """Dibuja curvas y punto de funcionamiento en el lienzo en pantalla."""
+        dibujar_curvas(self.ax, self.ax2, self.bomba, k_lps, s, D2_mm, open_deg, self.delta_z, self.dH0_applied,
+                       self.Q_plot, self.k_lps_default, self.DEFAULT_VALUES, Qpf=Qpf, Hpf=Hpf)
+        self.canvas.draw_idle()
 
+    def _plot_apertura(self, curva, open_deg, npsh=None, electrica=None):
+        """Gráfica secundaria del barrido de apertura; si el barrido no ha cambiado solo se mueve el marcador.
+        npsh: resultado de npsh_instalacion sobre el barrido (NPSH_disp/req y zona de cavitación);
+        electrica: potencia eléctrica del barrido (motor y variador)."""
+        if self._ap_dibujada is not curva or self._ap_npsh is not npsh or self._ap_electrica is not electrica:
+            ax, ax2 = self.ax_ap, self.ax_ap2
+            ax.cla(); ax2.cla(); ax.grid(True, alpha=0.5)
+            ax2.yaxis.tick_right(); ax2.yaxis.set_label_position('right')
+            th = curva["theta"]
+            ax.plot(th, curva["Q"], color="tab:blue", linewidth=1.8, label=r"$Q$ (l/s)")
+            ax.plot(th, curva["H"], color="tab:green", linewidth=1.5, label=r"$H$ (m)")
+            ax2.plot(th, curva["eta"]*100, color="tab:red", linewidth=1.2, linestyle="--", label=r"$\eta$ (%)")
+            ax2.plot(th, curva["Pabs_kW"], color="tab:purple", linewidth=1.2, linestyle="-.", label=r"$P_{abs}$ (kW)")
+            if electrica is not None:
+                ax2.plot(th, electrica["P_kW"], color="tab:brown", linewidth=1.2, linestyle="-.", label=r"$P_{elec}$ (kW)")
+            if npsh is not None:
+                ax.plot(th, npsh["disp"], color="tab:cyan", linewidth=1.0, linestyle=":", label=r"NPSH$_d$ (m)")
+                ax.plot(th, npsh["req"], color="tab:olive", linewidth=1.0, linestyle=":", label=r"NPSH$_r$ (m)")
+                if npsh["cavita"].any():
+                    ax.fill_between(th, 0, 1, where=npsh["cavita"], transform=ax.get_xaxis_transform(),
+                                    color="tab:red", alpha=0.12, label="Cavitación")
+            ax.set_xlim(0, 90); ax.set_xlabel("Apertura válvula (°)")
+            ax.set_ylabel("Q (l/s), H (m)", fontsize=8); ax2.set_ylabel(r"$\eta$ (%), $P_{abs}$ (kW)", fontsize=8)
+            ax.set_title("Barrido de apertura (instalación actual)", fontsize=9)
+            l1, t1 = ax.get_legend_handles_labels(); l2, t2 = ax2.get_legend_handles_labels()
+            ax.legend(l1 + l2, t1 + t2, loc="upper left", fontsize=7, ncol=4)
+            self._ap_marcas = [ax.axvline(open_deg, color="darkred", linewidth=1.5),
+                               ax.plot([open_deg], [curva["Q"][int(open_deg)]], "^", color="darkred", markersize=7)[0]]
+            self._ap_dibujada = curva; self._ap_npsh = npsh; self._ap_electrica = electrica
         else:
-            # === CASO NORMAL (apertura > 0) ===
-            
-            # 1. Curva de RENDIMIENTO en eje DERECHO (roja)
-            self.ax2.plot(Q_plot, eta_plot, "^-", color="tab:red", label=r"$\eta$ (%)", 
-                        linewidth=1.5, markersize=4, markevery=20)
-            
-            # 2. Curva por defecto (azul discontinuo) - solo si hay cambios
-            if any_change:
-                self.ax.plot(Q_plot, H_inst_default, linestyle="--", color="tab:blue", 
-                            label=r"CCI (por defecto)", linewidth=1.5, alpha=0.7)
-            
-            # 3. Curvas intermedias (gris discontinuo) - mostrar progresión
-            if params_changed and presion_changed:
-                self.ax.plot(Q_plot, H_inst_params, linestyle="--", color="gray",
-                            label=r"CCI (sin presión)", linewidth=1.2, alpha=0.6)
-            
-            if (params_changed or presion_changed) and apertura_changed:
-                self.ax.plot(Q_plot, H_inst_params_pres, linestyle="--", color="dimgray",
-                            label=r"CCI (apertura 90°)", linewidth=1.2, alpha=0.6)
-            
-            # 4. CURVA ACTIVA - SIEMPRE NARANJA CONTINUO
-            label_activa = r"CCI activa" if not apertura_changed else rf"CCI activa ({open_deg:.0f}°)"
-            self.ax.plot(Q_plot, H_inst_active, linestyle="-", color="tab:orange",
-                        label=label_activa, linewidth=2.5)
-            
-            # 5. Curva de la bomba
-            self.ax.plot(Qs, Hs, "o-", label=r"CC bomba (1490 rpm)", linewidth=2, color="tab:green")
-            
-            # 6. Puntos de funcionamiento
-            if Qpf is not None and Hpf is not None:
-                # Punto en la curva H (eje izquierdo)
-                self.ax.plot([Qpf], [Hpf], "^", markersize=10, 
-                            label=r"Punto funcionamiento", color="darkred", zorder=5)
-                
-                # Punto en la curva de rendimiento (eje derecho)
-                eta_pf = eta_bomba(Qpf) * 100
-                self.ax2.plot([Qpf], [eta_pf], "^", markersize=10, 
-                            color="darkred", zorder=5)
-
-            self.ax2.set_ylim(bottom=0, top=max(eta_plot) * 1.1)
-
-        # Cota piezométrica (incluyendo presión)
-        cota_total = self.delta_z + dH0
-        self.ax.axhline(cota_total, linestyle=":", linewidth=1, color="gray")
-        label_cota = "Cota piezométrica" if dH0 < 1e-9 else f"Cota + presión ({cota_total:.1f} m)"
-        self.ax.text(Q_plot.max()*0.02, cota_total+0.5, label_cota, fontsize=9, color="gray")
-
-        # Combinar leyendas de ambos ejes
-        lines1, labels1 = self.ax.get_legend_handles_labels()
-        lines2, labels2 = self.ax2.get_legend_handles_labels()
-        self.ax.legend(lines1 + lines2, labels1 + labels2, loc='upper right', fontsize=8)
-        self.canvas.draw_idle()
+            linea, punto = self._ap_marcas
+            linea.set_xdata([open_deg, open_deg])
+            punto.set_data([open_deg], [curva["Q"][int(open_deg)]])
 
     def aplicar_presion_B(self):
         parsed = self._parse_inputs()
@@ -905,59 +1560,144 @@ class App(ctk.CTk):
         # Guardar la presión equivalente en mcl
         self.dH0_applied = 10.0 * PB / s
         
-        # Recalcular todo con la nueva presión
+        # Recalcular todo con la nueva presión; el panel d) sale del propio resultado
         self.calcular()
-        
-        # Actualizar el texto del panel d)
-        Hb0 = H_bomba(0.0)
-        dH0_lim_m = max(Hb0 - self.delta_z, 0.0)
-        PB_lim_kPa = 9800.0 * s * dH0_lim_m / 1000.0
-        PB_lim_kgcm2 = s * dH0_lim_m / 10.0
-        
-        str_e = (
-            f"[e] PB_límite en el depósito B (umbral sin circulación):\n"
-            f"    PB_lím ≈ {PB_lim_kgcm2:.2f} kg/cm² (≈ {PB_lim_kPa:.0f} kPa).\n"
-        )
-        
-        if self.last_Qpf is not None:
-            gamma = 9800.0 * s
-            Pabs_prim_kW = gamma*(self.last_Qpf/1000.0)*self.last_Hpf/max(self.last_eta,1e-9)/1000.0
-            str_d = (
-                f"[d] Con depósito B presurizado:\n"
-                f"    P_B = {PB:.3f} kg/cm² → ΔH₀ ≈ {self.dH0_applied:.2f} mcl.\n"
-                f"    Q' = {self.last_Qpf:.2f} l/s, H' = {self.last_Hpf:.2f} m, η' = {self.last_eta*100:.1f} %\n"
-                f"    P_abs' ≈ {Pabs_prim_kW:.2f} kW."
-            )
-        else:
-            str_d = (
-                f"[d] Con depósito B presurizado:\n"
-                f"    P_B = {PB:.3f} kg/cm² → ΔH₀ ≈ {self.dH0_applied:.2f} mcl.\n"
-                f"    No hay intersección (P_B excesiva)."
-            )
-        
-        # Leer el texto actual del panel para preservar [c] (base)
-        current_text = self.txt_res_cde.get("1.0", "end-1c")
-        # Extraer solo la parte [c] del texto actual (primera línea hasta [d] o [e])
-        lines = current_text.split("\n")
-        str_c_lines = []
-        for line in lines:
-            if line.startswith("[d]") or line.startswith("[e]") or line.startswith("d)"):
-                break
-            str_c_lines.append(line)
-        str_c_preserved = "\n".join(str_c_lines).rstrip()
-            
-        self._set_text(self.txt_res_cde, f"{str_c_preserved}\n{str_d}\n{str_e}")
+
+    @staticmethod
+    def _texto_d(d):
+        """Texto de [d] a partir del punto con B presurizado del resultado (None sin presión)."""
+        if d is None:
+            return "d) Introduce P_B y pulsa el botón."
+        if d["Q"] is None:
+            return (f"[d] Con depósito B presurizado:\n"
+                    f"    P_B = {d['PB']:.3f} kg/cm² → ΔH₀ ≈ {d['dH0']:.2f} mcl.\n"
+                    f"    No hay intersección (P_B excesiva).")
+        return (f"[d] Con depósito B presurizado:\n"
+                f"    P_B = {d['PB']:.3f} kg/cm² → ΔH₀ ≈ {d['dH0']:.2f} mcl.\n"
+                f"    Q' = {d['Q']:.2f} l/s, H' = {d['H']:.2f} m, η' = {d['eta']*100:.1f} %\n"
+                f"    P_abs' ≈ {d['Pabs_kW']:.2f} kW.")
+
+    def _texto_c(self):
+        """Texto de [c] a partir del punto base del último cálculo."""
+        if self.pf_base is None:
+            return "[c] Potencia absorbida:\n    P_abs = 0.00 kW."
+        pf = self.pf_base
+        if not pf['P_elec_kW'] > 0.0:
+            return f"[c] Potencia absorbida:\n    P_abs ≈ {pf['Pabs_kW']:.2f} kW.\n    P_eléctrica = 0.00 kW."
+        return (f"[c] Potencia absorbida:\n    P_abs ≈ {pf['Pabs_kW']:.2f} kW.\n"
+                f"    P_eléctrica ≈ {pf['P_elec_kW']:.2f} kW (η_elec = {pf['Pabs_kW']/pf['P_elec_kW']*100:.1f} %, "
+                f"{pf['cadena']}), {pf['kWh_m3']:.3f} kWh/m³.")
+
+    def ventana_barrido_PB(self):
+        """Q, H, η y P_abs frente a P_B (0 → límite) en una pasada; el deslizador recorre los arrays sin recalcular."""
+        parsed = self._parse_inputs()
+        if not parsed: return
+        s, nu, D1m, L1, D2m, D2_mm, L2, eps_cm, open_deg = parsed
+        _, _, _, _, k_lps = self._cci_params(D1m, L1, D2m, L2, eps_cm, nu, self.friccion_var.get())
+        bomba = bomba_ajustada(self.curva_bomba_var.get(), nu)
+        b = curva_presion_B(k_lps, s, D2_mm, open_deg, self.delta_z, bomba=bomba)
+        P_elec = cadena_bomba(bomba, s, self.tabla_motor, self._variador_activo()).P_electrica(b["Pabs_kW"])
+        if b["PB_lim"] <= 0.0:
+            messagebox.showinfo("Sin barrido", "La bomba no vence la cota ni sin presión: no hay nada que barrer.")
+            return
+
+        win = ctk.CTkToplevel(self)
+        win.title("Barrido de la presión en B")
+        win.geometry("820x640")
+        win.transient(self)
+        fig = plt.Figure(figsize=(7.6, 4.8))
+        ax = fig.add_subplot(111); ax2 = ax.twinx()
+        fig.subplots_adjust(right=0.86)
+        PB = b["PB"]
+        ax.plot(PB, b["Q"], color="tab:blue", linewidth=2, label="Q (l/s)")
+        ax.plot(PB, b["H"], color="tab:green", linewidth=1.5, label="H (m)")
+        ax2.plot(PB, b["eta"]*100, color="tab:red", linestyle="--", label="η (%)")
+        ax2.plot(PB, b["Pabs_kW"], color="tab:purple", linestyle="-.", label="P_abs (kW)")
+        ax2.plot(PB, P_elec, color="tab:brown", linestyle="-.", label="P_elec (kW)")
+        ax.axvline(b["PB_lim"], color="gray", linestyle=":", linewidth=1)
+        ax.set_xlabel("P_B (kg/cm²)"); ax.set_ylabel("Q (l/s), H (m)"); ax2.set_ylabel("η (%), P_abs (kW)")
+        ax.set_title(f"Barrido de P_B con apertura {open_deg:.0f}° (P_B,lím = {b['PB_lim']:.2f} kg/cm²)")
+        ax.grid(True)
+        l1, t1 = ax.get_legend_handles_labels(); l2, t2 = ax2.get_legend_handles_labels()
+        ax.legend(l1 + l2, t1 + t2, loc="upper right", fontsize=8)
+        marca = ax.axvline(0.0, color="darkred", linewidth=1.5)
+        punto, = ax.plot([PB[0]], [b["Q"][0]], "^", color="darkred", markersize=9)
+        canvas = FigureCanvasTkAgg(fig, master=win)
+        canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=(10, 4))
+
+        lectura = ctk.StringVar()
+        ctk.CTkLabel(win, textvariable=lectura, font=self.font_body).pack(anchor="w", padx=16, pady=2)
+        fila = ctk.CTkFrame(win); fila.pack(fill="x", padx=10, pady=(0, 10))
+        deslizador = ctk.CTkSlider(fila, from_=0.0, to=float(PB[-1]), number_of_steps=PB.size - 1)
+        deslizador.pack(side="left", fill="x", expand=True, padx=6)
+
+        def mover(valor):
+            # Solo lectura de los arrays del barrido: ningún cálculo hidráulico
+            i = int(np.clip(np.searchsorted(PB, float(valor)), 0, PB.size - 1))
+            marca.set_xdata([PB[i], PB[i]])
+            punto.set_data([PB[i]], [b["Q"][i]])
+            lectura.set(f"P_B = {PB[i]:.3f} kg/cm² (ΔH₀ = {b['dH0'][i]:.2f} m): Q = {b['Q'][i]:.2f} l/s, "
+                        f"H = {b['H'][i]:.2f} m, η = {b['eta'][i]*100:.1f} %, P_abs = {b['Pabs_kW'][i]:.2f} kW, "
+                        f"P_elec = {P_elec[i]:.2f} kW")
+            canvas.draw_idle()
+            return PB[i]
+        deslizador.configure(command=mover)
+
+        def aplicar():
+            self.PB_var.set(f"{mover(deslizador.get()):.3f}")
+            self.aplicar_presion_B()
+        ctk.CTkButton(fila, text="Aplicar este P_B", width=130, command=aplicar).pack(side="left", padx=6)
+        mover(0.0)
     
+    def _variador_activo(self):
+        return self.variador if self.accionamiento_var.get() == ACCIONAMIENTO_VARIADOR else None
+
+    def cargar_tablas_electricas(self):
+        """Tabla η(carga) del motor y mapa η(n/n0, par) del variador desde CSV (Cancelar mantiene la actual)."""
+        try:
+            self.tabla_motor, self.variador, nuevo_variador = pedir_tablas_csv(self.tabla_motor, self.variador, self)
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+            return
+        if nuevo_variador:
+            self.accionamiento_var.set(ACCIONAMIENTO_VARIADOR)
+        self.res_status.set(f"Motor: {self.tabla_motor[0].size} puntos η(carga); variador: "
+                            f"{self.variador.velocidad.size}×{self.variador.par.size} puntos η(n, par).")
+        self._schedule_recalc()
+
+    def aplicar_fluido(self):
+        """Rellena ν y s con las propiedades del fluido elegido a la temperatura indicada."""
+        try:
+            T = float(self.T_fluido_var.get().replace(",", "."))
+        except ValueError:
+            messagebox.showerror("Error", "Temperatura no válida.")
+            return
+        fluido = FLUIDOS[self.fluido_var.get()]
+        s = float(fluido.s(T))
+        self.nu_var.set(f"{float(fluido.nu(T)):.3e}")
+        self.s_var.set(f"{s:.2f}")
+        self.sl_s.set(s)
+        self.res_status.set(f"{fluido.nombre} a {T:.1f} °C: ρ = {float(fluido.rho(T)):.1f} kg/m³, "
+                            f"ν = {float(fluido.nu(T)):.3e} m²/s, P_v = {float(fluido.pv(T))/1000:.2f} kPa")
+        self._schedule_recalc()
+
     # -------------------- Utilidades UI -------------------- #
     def reset_valores(self):
         # 1. Variables inputs
         self.s_var.set("1.2")
         self.nu_var.set("1e-6")
+        self.fluido_var.set(AGUA.nombre)
+        self.T_fluido_var.set("20")
+        self.z_bomba_var.set("2")
+        self.z_sitio_var.set("0")
         self.D1_var.set("200")
         self.L1_var.set("200")
         self.D2_var.set("150")
         self.L2_var.set("500")
         self.eps_var.set("0.01")
+        self.friccion_var.set(FRICCION_HW)
+        self.curva_bomba_var.set(CURVA_TABLA)
+        self.accionamiento_var.set(ACCIONAMIENTO_DIRECTO)
         self.open_var.set("90")  # grados
         self.PB_var.set("")
         
@@ -978,31 +1718,31 @@ class App(ctk.CTk):
         self._set_text(self.txt_res_ab, "Pendiente de cálculo…\n")
         self._set_text(self.txt_res_cde, "c) Pendiente de cálculo.\nd) Introduce PB y pulsa el botón.\ne) Disponible tras aplicar d).\n")
         
-        for row in self.tree.get_children(): self.tree.delete(row)
+        self.tabla.clear()
+        self.tabla_datos = None
+        self.curva_ap = None
         
         self._draw_static_ccb()
         self.k_lps = None
         self.dH0_applied = 0.0  # Reset presión
+        self.pf_base = None
         self.d_btn.configure(state="disabled")
 
     def exportar_csv(self):
-        if self.k_lps is None:
+        if self.k_lps is None or self.tabla_datos is None:
             messagebox.showinfo("Nada que exportar", "Calcula primero.")
             return
         path = filedialog.asksaveasfilename(
-            title="Guardar tabla como CSV",
+            title="Guardar tabla",
             defaultextension=".csv",
-            filetypes=[("CSV", "*.csv")],
+            filetypes=[("CSV", "*.csv"), ("CSV comprimido", "*.csv.gz"), ("Parquet", "*.parquet")],
             initialfile="tabla_Hmi.csv",
         )
         if not path: return
         try:
-            with open(path, "w", encoding="utf-8", newline="") as f:
-                f.write("Q_lps,Hmi_m\n")
-                for item in self.tree.get_children():
-                    q, h = self.tree.item(item, "values")
-                    f.write(f"{q},{h}\n")
-            messagebox.showinfo("OK", f"CSV guardado en:\n{path}")
+            # Se exporta desde los arrays calculados (todas las filas y columnas), no desde el Treeview
+            n = exportar_columnas(path, self.tabla_datos)
+            messagebox.showinfo("OK", f"Tabla guardada ({n} filas) en:\n{path}")
         except Exception as e:
             messagebox.showerror("Error al guardar", str(e))
 
@@ -1015,13 +1755,359 @@ class App(ctk.CTk):
         )
         if not path: return
         try:
-            self.fig.savefig(path, dpi=200, bbox_inches="tight")
-            messagebox.showinfo("OK", f"Gráfica guardada en:\n{path}")
+            progreso = Progreso()
+            futuro = guardar_figura_async(self.fig, path, progreso, dpi=200, bbox_inches="tight")
         except Exception as e:
             messagebox.showerror("Error al guardar", str(e))
-    
+            return
+        seguir_exportacion(self, "Guardando gráfica…", futuro, progreso,
+                           lambda _: f"Gráfica guardada en:\n{path}", fuente=self.font_h2)
+
+    def exportar_barrido_apertura(self):
+        """Exporta un fotograma por apertura (0-90°, pasos de 10°) con los parámetros actuales."""
+        parsed = self._parse_inputs()
+        if not parsed: return
+        s, nu, D1m, L1, D2m, D2_mm, L2, eps_cm, _ = parsed
+        path = filedialog.asksaveasfilename(
+            title="Exportar barrido de apertura",
+            defaultextension=".pdf",
+            filetypes=[("PDF multipágina", "*.pdf"), ("Secuencia PNG", "*.png")],
+            initialfile="barrido_apertura_9_1.pdf",
+        )
+        if not path: return
+        _, _, _, _, k_lps = self._cci_params(D1m, L1, D2m, L2, eps_cm, nu, self.friccion_var.get())
+        bomba = bomba_ajustada(self.curva_bomba_var.get(), nu)
+        # Copia del estado actual: el hilo de exportación solo ve estos valores, no la App
+        dH0, delta_z, Q_plot = self.dH0_applied, self.delta_z, self.Q_plot.copy()
+        k_lps_default, defaults = self.k_lps_default, dict(self.DEFAULT_VALUES)
+        puntos = curva_apertura(k_lps, s, D2_mm, delta_z, dH0=dH0, aperturas=VALVE_APERTURE_DEG, bomba=bomba)
+
+        def dibujar(fig, punto):
+            open_deg, Qpf = punto
+            Qpf = None if np.isnan(Qpf) else Qpf
+            ax = fig.add_subplot(111); ax2 = ax.twinx()
+            Hpf = float(bomba.H(Qpf)) if Qpf is not None else None
+            dibujar_curvas(ax, ax2, bomba, k_lps, s, D2_mm, open_deg, delta_z, dH0, Q_plot, k_lps_default, defaults,
+                           Qpf=Qpf, Hpf=Hpf)
+            ax.set_title(f"Curvas características y punto de funcionamiento (apertura {open_deg:.0f}°)")
+
+        progreso = Progreso()
+        futuro = exportar_barrido_figuras(path, list(zip(VALVE_APERTURE_DEG, puntos["Q"])), dibujar,
+                                          figsize=tuple(self.fig.get_size_inches()), dpi=150, progreso=progreso)
+        seguir_exportacion(self, "Exportando barrido…", futuro, progreso,
+                           lambda rutas: f"{len(VALVE_APERTURE_DEG)} fotogramas guardados en:\n{rutas[0]}",
+                           fuente=self.font_h2)
+
+    # -------------------- Problema inverso de la válvula -------------------- #
+    def ventana_apertura_objetivo(self):
+        """Apertura, Kv y potencia perdida para una lista de objetivos de Q o H y varios diámetros de válvula."""
+        parsed = self._parse_inputs()
+        if not parsed: return
+        s, nu, D1m, L1, D2m, D2_mm, L2, eps_cm, _ = parsed
+        _, _, _, _, k_lps = self._cci_params(D1m, L1, D2m, L2, eps_cm, nu, self.friccion_var.get())
+        bomba = bomba_ajustada(self.curva_bomba_var.get(), nu)
+        dH0 = self.dH0_applied
+
+        win = ctk.CTkToplevel(self)
+        win.title("Apertura de la válvula para un objetivo")
+        win.geometry("900x720")
+        win.transient(self)
+        fila = ctk.CTkFrame(win); fila.pack(fill="x", padx=10, pady=(10, 4))
+        objetivo = ctk.StringVar(value="Caudal Q (l/s)")
+        ctk.CTkOptionMenu(fila, variable=objetivo, values=["Caudal Q (l/s)", "Altura H (m)"], width=140).pack(side="left", padx=6)
+        valores = ctk.StringVar(value="5:45:0.5")
+        ctk.CTkEntry(fila, textvariable=valores, width=120, justify="right").pack(side="left", padx=(0, 8))
+        ctk.CTkLabel(fila, text="Diámetros válvula (mm)", font=self.font_body).pack(side="left", padx=(6, 2))
+        diametros = ctk.StringVar(value=", ".join(str(d) for d in VALVE_DIAMETERS))
+        ctk.CTkEntry(fila, textvariable=diametros, width=170, justify="right").pack(side="left", padx=(0, 8))
+        ctk.CTkLabel(win, text="Objetivos: lista separada por comas o rango inicio:fin:paso. "
+                               "La tabla inferior corresponde al diámetro de válvula actual.",
+                     font=self.font_body).pack(anchor="w", padx=16)
+
+        fig = plt.Figure(figsize=(8.4, 4.4))
+        ax_th = fig.add_subplot(121); ax_p = fig.add_subplot(122)
+        fig.subplots_adjust(wspace=0.3)
+        canvas = FigureCanvasTkAgg(fig, master=win)
+        canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=4)
+        tabla = ctk.CTkTextbox(win, height=170, font=ctk.CTkFont(family="Consolas", size=12))
+        tabla.pack(fill="x", padx=10, pady=(0, 10))
+
+        def leer_lista(texto):
+            texto = texto.replace(";", ",").replace(" ", "")
+            if ":" in texto:
+                a, b, paso = (float(v) for v in texto.split(":"))
+                if paso <= 0: raise ValueError
+                return np.arange(a, b + 0.5*paso, paso)
+            return np.array([float(v) for v in texto.split(",") if v])
+
+        def calcular():
+            try:
+                obj = leer_lista(valores.get())
+                Ds = leer_lista(diametros.get())
+                if obj.size == 0 or Ds.size == 0: raise ValueError
+            except ValueError:
+                messagebox.showerror("Error", "Entrada no válida. Revisa las casillas.", parent=win)
+                return
+            por_caudal = objetivo.get().startswith("Caudal")
+            # Rejilla objetivo × diámetro en una sola llamada; más el diámetro actual para la tabla
+            Ds = np.append(Ds, D2_mm)
+            kw = dict(Q_obj=obj[:, None]) if por_caudal else dict(H_obj=obj[:, None])
+            r = apertura_objetivo(k_lps, s, Ds[None, :], self.delta_z, dH0=dH0, bomba=bomba, **kw)
+
+            ax_th.cla(); ax_p.cla()
+            for j, D in enumerate(Ds[:-1]):
+                ax_th.plot(obj, r["theta"][:, j], label=f"D = {D:g} mm")
+                ax_p.plot(obj, r["P_perdida_kW"][:, j], label=f"D = {D:g} mm")
+            xlabel = "Q objetivo (l/s)" if por_caudal else "H objetivo (m)"
+            ax_th.set_xlabel(xlabel); ax_th.set_ylabel("Apertura necesaria (°)"); ax_th.set_ylim(0, 92)
+            ax_th.grid(True); ax_th.legend(fontsize=7)
+            ax_p.set_xlabel(xlabel); ax_p.set_ylabel("Potencia perdida en la válvula (kW, eje)")
+            ax_p.grid(True)
+            canvas.draw_idle()
+
+            cab = f"{'Q (l/s)':>8} {'H (m)':>7} {'θ (°)':>7} {'Kv':>7} {'hv (m)':>7} {'P_dis (kW)':>10} {'P_eje (kW)':>10}"
+            filas = []
+            for q, h, th, kv, hv, pd, pp in zip(r["Q"][:, -1], r["H"][:, -1], r["theta"][:, -1], r["Kv"][:, -1],
+                                                r["hv"][:, -1], r["P_disipada_kW"][:, -1], r["P_perdida_kW"][:, -1]):
+                if np.isnan(th):
+                    filas.append(f"{q:8.2f} {h:7.2f}   no alcanzable con esta válvula")
+                else:
+                    filas.append(f"{q:8.2f} {h:7.2f} {th:7.1f} {kv:7.1f} {hv:7.2f} {pd:10.2f} {pp:10.2f}")
+            tabla.delete("1.0", "end")
+            tabla.insert("1.0", f"Válvula actual D = {D2_mm:g} mm\n" + "\n".join([cab] + filas))
+        ctk.CTkButton(fila, text="Calcular", width=90, command=calcular).pack(side="left", padx=6)
+        calcular()
+
+    # -------------------- Golpe de ariete -------------------- #
+    def ventana_golpe_ariete(self):
+        """Transitorio por cierre de la válvula desde la apertura actual (método de las características)."""
+        parsed = self._parse_inputs()
+        if not parsed: return
+        win = ctk.CTkToplevel(self)
+        win.title("Golpe de ariete – cierre de válvula")
+        win.geometry("820x640")
+        win.transient(self)
+
+        fila = ctk.CTkFrame(win); fila.pack(fill="x", padx=10, pady=(10, 4))
+        campos = {}
+        for clave, texto, valor in (("theta_fin", "Apertura final (°)", "0"), ("t_cierre", "Tiempo de cierre (s)", "2"),
+                                    ("a", "Celeridad a (m/s)", "1000")):
+            ctk.CTkLabel(fila, text=texto, font=self.font_body).pack(side="left", padx=(6, 2))
+            campos[clave] = ctk.StringVar(value=valor)
+            ctk.CTkEntry(fila, textvariable=campos[clave], width=60, justify="right").pack(side="left", padx=(0, 8))
+        resumen = ctk.StringVar(value="Pulsa Simular.")
+        ctk.CTkLabel(win, textvariable=resumen, font=self.font_body, justify="left").pack(anchor="w", padx=16, pady=4)
+
+        fig = plt.Figure(figsize=(7.6, 5.2))
+        ax_env = fig.add_subplot(211); ax_t = fig.add_subplot(212)
+        fig.subplots_adjust(hspace=0.45)
+        canvas = FigureCanvasTkAgg(fig, master=win)
+        canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=(0, 10))
+        # Cálculo propio: no compite con (ni cancela) los recálculos de la ventana principal
+        calculo = CalculoAsync(win, max_workers=1)
+        win.protocol("WM_DELETE_WINDOW", lambda: (calculo.cerrar(), win.destroy()))
+
+        def simular():
+            try:
+                theta_fin = min(max(float(campos["theta_fin"].get().replace(",", ".")), 0.0), 90.0)
+                t_cierre = max(float(campos["t_cierre"].get().replace(",", ".")), 0.0)
+                a = float(campos["a"].get().replace(",", "."))
+                if a <= 0: raise ValueError
+            except ValueError:
+                messagebox.showerror("Error", "Entrada no válida. Revisa las casillas.", parent=win)
+                return
+            resumen.set("Simulando…")
+            snap = dict(parsed=parsed, friccion=self.friccion_var.get(), dH0=self.dH0_applied,
+                        theta_fin=theta_fin, t_cierre=t_cierre, a=a)
+            calculo.enviar(self._resolver_golpe, snap,
+                           on_result=lambda r: self._mostrar_golpe(r, snap, ax_env, ax_t, canvas, resumen),
+                           on_error=lambda e: resumen.set(f"Error de cálculo: {e}"))
+        ctk.CTkButton(fila, text="Simular", width=90, command=simular).pack(side="left", padx=6)
+
+    def _resolver_golpe(self, snap):
+        """Régimen inicial, contorno de bomba y ley de cierre; luego el MOC (se ejecuta en el pool)."""
+        s, nu, D1m, L1, D2m, D2_mm, L2, eps_cm, open_deg = snap["parsed"]
+        dH0, a = snap["dH0"], snap["a"]
+        C1, C2, J1_lps, J2_lps, k_lps = self._cci_params(D1m, L1, D2m, L2, eps_cm, nu, snap["friccion"])
+        Q0_lps = float(curva_apertura(k_lps, s, D2_mm, self.delta_z, dH0=dH0, aperturas=[open_deg])["Q"][0])
+        if np.isnan(Q0_lps) or Q0_lps <= 0.0:
+            raise ValueError("No hay caudal en régimen permanente: nada que cerrar.")
+
+        def hf_tramos(q_lps):
+            if isinstance(k_lps, TuberiasSerieDW):
+                hf = k_lps.hf_tramos(q_lps)
+                return hf[..., 0], hf[..., 1]
+            return J1_lps*L1*q_lps**1.852, J2_lps*L2*q_lps**1.852
+
+        # Factor de Darcy equivalente de la impulsión en el régimen inicial (vale para HW y DW)
+        A2 = np.pi * D2m**2 / 4.0
+        Q0 = Q0_lps / 1000.0
+        f = float(hf_tramos(Q0_lps)[1]) * 2.0 * 9.81 * D2m * A2**2 / (L2 * Q0**2)
+        # Contorno aguas arriba: bomba menos pérdidas de aspiración, ajustada a una parábola
+        Qt, Ht, _ = tabla_bomba(nu)
+        a2, a1, a0 = np.polyfit(Qt / 1000.0, Ht - hf_tramos(Qt)[0], 2)
+
+        # Ley de cierre lineal en grados; Kv(θ) de las tablas de la válvula
+        th0, th1, tc = float(open_deg), snap["theta_fin"], snap["t_cierre"]
+        def ley_cierre(t):
+            theta = th0 + (th1 - th0) * (np.clip(t / tc, 0.0, 1.0) if tc > 0 else (t > 0))
+            Kv = Kv_arr(D2_mm, theta)
+            cv = (10.0 / s) * 3600.0**2 / np.where(Kv > 1e-6, Kv, 1.0)**2
+            return np.where(theta >= 90, 0.0, np.where((theta <= 0) | (Kv <= 1e-6), np.inf, cv))
+
+        # Duración: el cierre más ~10 periodos 2L/a; malla limitada a ~5·10⁴ pasos
+        t_total = tc + 20.0 * L2 / a
+        n_tramos = int(np.clip(5e4 * L2 / (a * t_total), 50, 1000))
+        r = cierre_valvula_moc(L2, D2m, a, f, Q0, self.delta_z + dH0, (a0, a1, a2), ley_cierre,
+                               t_total, n_tramos=n_tramos)
+        r.Q0_lps = Q0_lps
+        return r
+
+    def _mostrar_golpe(self, r, snap, ax_env, ax_t, canvas, resumen):
+        ax_env.cla(); ax_t.cla()
+        ax_env.plot(r.x, r.H0, color="tab:blue", label="Régimen inicial")
+        ax_env.plot(r.x, r.H_max, color="tab:red", label="Envolvente máx.")
+        ax_env.plot(r.x, r.H_min, color="tab:purple", label="Envolvente mín.")
+        ax_env.fill_between(r.x, r.H_min, r.H_max, color="tab:red", alpha=0.08)
+        ax_env.set_xlabel("x desde la bomba (m)"); ax_env.set_ylabel("H (m.c.l.)")
+        ax_env.set_title("Envolvente de alturas piezométricas en la impulsión")
+        ax_env.grid(True); ax_env.legend(fontsize=8)
+        ax_t.plot(r.t, r.H_valvula, color="tab:orange", label="Aguas arriba de la válvula")
+        ax_t.plot(r.t, r.H_bomba, color="tab:green", label="Impulsión de la bomba", linewidth=1)
+        if snap["t_cierre"] > 0:
+            ax_t.axvline(snap["t_cierre"], color="gray", linestyle="--", linewidth=1)
+        ax_t.set_xlabel("t (s)"); ax_t.set_ylabel("H (m.c.l.)"); ax_t.grid(True); ax_t.legend(fontsize=8)
+        canvas.draw_idle()
+        tipo = "rápido (t_c ≤ 2L/a)" if snap["t_cierre"] <= r.periodo else "lento (t_c > 2L/a)"
+        s = snap["parsed"][0]
+        resumen.set(
+            f"Q0 = {r.Q0_lps:.2f} l/s, 2L/a = {r.periodo:.2f} s → cierre {tipo}.\n"
+            f"ΔH máx = {r.sobrepresion_max:.1f} m ({9.8*s*r.sobrepresion_max:.0f} kPa), "
+            f"depresión máx = {r.depresion_max:.1f} m; Joukowsky a·V0/g = {r.joukowsky:.1f} m."
+        )
+
+    # -------------------- Arranque / disparo (columna rígida) -------------------- #
+    def ventana_arranque_parada(self):
+        """Escenarios de arranque o disparo: producto de las listas de inercias, L2 y retardos de la retención."""
+        parsed = self._parse_inputs()
+        if not parsed: return
+        win = ctk.CTkToplevel(self)
+        win.title("Arranque / disparo de la bomba – columna rígida")
+        win.geometry("900x720")
+        win.transient(self)
+
+        fila = ctk.CTkFrame(win); fila.pack(fill="x", padx=10, pady=(10, 4))
+        maniobra = ctk.StringVar(value=MANIOBRA_DISPARO)
+        ctk.CTkOptionMenu(fila, variable=maniobra, values=[MANIOBRA_DISPARO, MANIOBRA_ARRANQUE],
+                          width=170).pack(side="left", padx=6)
+        campos = {}
+        for clave, texto, valor, ancho in (("I", "I (kg·m²)", "0.2, 0.5, 1", 90), ("L2", "L2 (m)", f"{parsed[6]:g}", 90),
+                                           ("t_ret", "Retardo retención (s)", "0, 0.5", 80), ("t_total", "Duración (s)", "20", 50)):
+            ctk.CTkLabel(fila, text=texto, font=self.font_body).pack(side="left", padx=(6, 2))
+            campos[clave] = ctk.StringVar(value=valor)
+            ctk.CTkEntry(fila, textvariable=campos[clave], width=ancho, justify="right").pack(side="left", padx=(0, 4))
+        ctk.CTkLabel(win, text="Listas separadas por ';' o ','; en el retardo, 'inf' = sin válvula de retención.",
+                     font=self.font_body).pack(anchor="w", padx=16)
+
+        fig = plt.Figure(figsize=(8.4, 4.6))
+        ax_q = fig.add_subplot(211); ax_n = fig.add_subplot(212, sharex=ax_q)
+        fig.subplots_adjust(hspace=0.35, right=0.78)
+        canvas = FigureCanvasTkAgg(fig, master=win)
+        canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=4)
+        tabla = ctk.CTkTextbox(win, height=150, font=ctk.CTkFont(family="Consolas", size=12))
+        tabla.pack(fill="x", padx=10, pady=(0, 10))
+        calculo = CalculoAsync(win, max_workers=1)
+        win.protocol("WM_DELETE_WINDOW", lambda: (calculo.cerrar(), win.destroy()))
+
+        def lista(texto, minimo):
+            vals = [float(v) for v in texto.replace(";", ",").replace(" ", "").split(",") if v]
+            if not vals or any(not (v >= minimo) for v in vals): raise ValueError
+            return vals
+
+        def mostrar_texto(texto):
+            tabla.delete("1.0", "end"); tabla.insert("1.0", texto)
+
+        def simular():
+            try:
+                I = lista(campos["I"].get(), 1e-6)
+                L2 = lista(campos["L2"].get(), 1e-6)
+                t_ret = lista(campos["t_ret"].get().replace("inf", "1e400"), 0.0)
+                t_total = lista(campos["t_total"].get(), 0.1)[0]
+            except ValueError:
+                messagebox.showerror("Error", "Entrada no válida. Revisa las casillas.", parent=win)
+                return
+            mostrar_texto("Simulando…")
+            snap = dict(parsed=parsed, friccion=self.friccion_var.get(), dH0=self.dH0_applied,
+                        arranque=maniobra.get() == MANIOBRA_ARRANQUE, I=I, L2=L2, t_ret=t_ret, t_total=t_total)
+            calculo.enviar(self._resolver_arranque_parada, snap,
+                           on_result=lambda r: self._mostrar_arranque_parada(r, snap, ax_q, ax_n, canvas, mostrar_texto),
+                           on_error=lambda e: mostrar_texto(f"Error de cálculo: {e}"))
+        ctk.CTkButton(fila, text="Simular", width=80, command=simular).pack(side="left", padx=6)
+
+    def _resolver_arranque_parada(self, snap):
+        """Monta todos los escenarios (producto I × L2 × retardo) y los integra de una vez (en el pool)."""
+        s, nu, D1m, L1, D2m, D2_mm, L2_base, eps_cm, open_deg = snap["parsed"]
+        _, _, J1_lps, J2_lps, k_lps = self._cci_params(D1m, L1, D2m, L2_base, eps_cm, nu, snap["friccion"])
+        I, L2, t_ret = (g.ravel() for g in np.meshgrid(snap["I"], snap["L2"], snap["t_ret"], indexing="ij"))
+        A1 = np.pi * D1m**2 / 4.0; A2 = np.pi * D2m**2 / 4.0
+        M = L1 / (9.81 * A1) + L2 / (9.81 * A2)
+
+        # Pérdidas tabuladas una vez en Q (el integrador las evalúa cuatro veces por paso).
+        # f no depende de la longitud: la pérdida de la impulsión escala con L2/L2_base
+        q_tab = np.linspace(0.0, 2.0 * Qb_ls[-1], 2001)
+        if isinstance(k_lps, TuberiasSerieDW):
+            hf = k_lps.hf_tramos(q_tab)
+            hf1, hf2 = hf[:, 0], hf[:, 1]
+        else:
+            hf1, hf2 = J1_lps*L1*q_tab**1.852, J2_lps*L2_base*q_tab**1.852
+        hf1 = hf1 + np.minimum(hf_valve_arr(q_tab, s, D2_mm, open_deg), 1e6)
+        escala = L2 / L2_base
+        def perdidas(q_m3s):
+            q = q_m3s * 1000.0
+            return np.interp(q, q_tab, hf1) + escala * np.interp(q, q_tab, hf2)
+
+        curvas = CurvasHomologas(*tabla_bomba(nu), N_BOMBA_RPM, s_rel=s)
+        motor = MotorInduccion(1.15 * curvas.P.max(), N_BOMBA_RPM) if snap["arranque"] else None
+        r = simular_arranque_parada(curvas, I, M, self.delta_z + snap["dH0"], perdidas, snap["t_total"],
+                                    arranque=snap["arranque"], motor=motor, t_retencion=t_ret)
+        r.escenarios = (I, L2, t_ret)
+        return r
+
+    def _mostrar_arranque_parada(self, r, snap, ax_q, ax_n, canvas, mostrar_texto):
+        ax_q.cla(); ax_n.cla()
+        I, L2, t_ret = r.escenarios
+        etiquetas = [f"I={i:g}, L2={l:g}, tr={'∞' if np.isinf(t) else f'{t:g}'}" for i, l, t in zip(I, L2, t_ret)]
+        for j, et in enumerate(etiquetas):
+            ax_q.plot(r.t, r.Q_lps[:, j], linewidth=1, label=et)
+            ax_n.plot(r.t, r.n_rpm[:, j], linewidth=1)
+        ax_q.axhline(0.0, color="black", linewidth=0.8)
+        ax_q.set_ylabel("Q (l/s)"); ax_q.grid(True)
+        ax_q.set_title("Arranque" if snap["arranque"] else "Disparo por fallo de alimentación")
+        if len(etiquetas) <= 12:
+            ax_q.legend(fontsize=7, loc="upper left", bbox_to_anchor=(1.01, 1.0))
+        ax_n.set_xlabel("t (s)"); ax_n.set_ylabel("n (rpm)"); ax_n.grid(True)
+        canvas.draw_idle()
+
+        if snap["arranque"]:
+            t_n = r.t_hasta(0.95)
+            cab = f"{'I':>6} {'L2':>7} {'t_ret':>6} {'t(95% n)':>9} {'Q final':>8}"
+            filas = [f"{i:6g} {l:7g} {('∞' if np.isinf(tr) else f'{tr:g}'):>6} {tn:9.2f} {qf:8.2f}"
+                     for i, l, tr, tn, qf in zip(I, L2, t_ret, t_n, r.Q_lps[-1])]
+        else:
+            t_n = r.t_hasta(0.1)
+            V_inv = r.Q_inversa_lps / 1000.0 / (np.pi * snap["parsed"][4]**2 / 4.0)
+            cab = (f"{'I':>6} {'L2':>7} {'t_ret':>6} {'Q0':>7} {'t(10% n)':>9} "
+                   f"{'t cierre':>9} {'Q inv.':>8} {'V inv.':>7} {'Q final':>8}")
+            filas = [f"{i:6g} {l:7g} {('∞' if np.isinf(tr) else f'{tr:g}'):>6} {q0:7.2f} {tn:9.2f} "
+                     f"{tc:9.2f} {qi:8.2f} {vi:7.3f} {qf:8.2f}"
+                     for i, l, tr, q0, tn, tc, qi, vi, qf in zip(I, L2, t_ret, r.Q0_lps, t_n, r.t_retencion,
+                                                                 r.Q_inversa_lps, V_inv, r.Q_lps[-1])]
+        mostrar_texto("\n".join([cab] + filas) +
+                      "\n(Q en l/s, t en s, V inv. en m/s: velocidad inversa al cerrar la retención)")
+
     def _volver_menu(self):
         """Cierra esta ventana (el menú ya está abierto de fondo)"""
+        self.calculo.cerrar()
         self.destroy()
 
 def main():
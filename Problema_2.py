@@ -11,6 +11,15 @@ import customtkinter as ctk
 from tkinter import messagebox, filedialog
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import matplotlib.pyplot as plt
+from contourpy import contour_generator
+
+from exportar import guardar_figura_async, exportar_barrido_figuras, Progreso, seguir_exportacion
+from calculo_async import CalculoAsync
+from programacion_tarifas import tarifa_tres_periodos, programar_horas, programar_volumen
+from propiedades_fluido import AGUA
+from atmosfera import presion_isa
+from rendimiento_electrico import CadenaElectrica, Motor, Variador, motor_normalizado, CARGA_MOTOR, ETA_MOTOR_IE3
+from dialogos_tablas import pedir_tablas_csv
 
 ctk.set_appearance_mode("light")
 ctk.set_default_color_theme("blue")
@@ -66,6 +75,375 @@ def gen_curve_for_diameter(D_mm: float):
     eta  = eta_base.copy()
     return Q_ls, H_m, eta
 
+# NPSH requerido del rodete base sobre Qb_base_ls (el catálogo no lo da: curva típica supuesta)
+NPSH_base_m = np.array([2.0, 2.3, 2.8, 3.5, 4.4, 5.6], dtype=float)
+_TABLA_BASE = np.vstack([Hb_base_m, eta_base, NPSH_base_m])   # H, η, NPSH_req en una sola tabla
+
+# Aspiración supuesta (el enunciado no la describe): eje de la bomba sobre la lámina del
+# vaso de la fuente, tramo corto de aspiración con el diámetro de la tubería, agua a T
+ASPIRACION = dict(z_bomba=1.5, L=6.0, T_C=20.0, z_sitio=0.0)
+N_REGULACION = 61   # caudales evaluados en el rango de regulación
+
+def curvas_rodete(Q_lps, D_mm):
+    """
+    H (m), η y NPSH_req (m) del rodete D_mm a los caudales Q en una sola pasada: el punto
+    homólogo Q·D_BASE/D se busca una vez y se interpola la tabla base completa.
+    Semejanza: Q ∝ D, H ∝ D², NPSH_req ∝ D² (misma velocidad), η igual. Fuera de la
+    tabla se mantiene el extremo, como np.interp.
+    """
+    r = np.asarray(D_mm, dtype=float) / D_BASE_MM
+    x = (np.asarray(Q_lps, dtype=float) / r - Qb_base_ls[0]) / (Qb_base_ls[1] - Qb_base_ls[0])
+    x = np.clip(x, 0.0, Qb_base_ls.size - 1)
+    i = np.minimum(x.astype(int), Qb_base_ls.size - 2)
+    H, eta, npsh = _TABLA_BASE[:, i] + (x - i) * (_TABLA_BASE[:, i + 1] - _TABLA_BASE[:, i])
+    return r**2 * H, eta, r**2 * npsh
+
+def npsh_regulacion(Q_lps, D_mm, params, asp=ASPIRACION):
+    """
+    NPSH disponible y requerido del rodete D_mm en los caudales Q (vectorizado), junto con
+    H y η de la misma pasada:
+        NPSH_disp = (P_atm - P_v)/γ - z_bomba - J·L_asp·Q^1.852
+    Retorna un dict de arrays: Q, H, eta, req, disp, margen y cavita.
+    """
+    s, C, J_lps, Le, kv2g, kc, z = params
+    Q = np.asarray(Q_lps, dtype=float)
+    H, eta, req = curvas_rodete(Q, D_mm)
+    carga = (presion_isa(asp["z_sitio"]) - AGUA.pv(asp["T_C"])) / (9800.0 * s) - asp["z_bomba"]
+    disp = carga - J_lps * asp["L"] * Q**1.852
+    return dict(Q=Q, H=H, eta=eta, req=req, disp=disp, margen=disp - req, cavita=disp < req)
+
+def altura_instalacion(Q_lps, params):
+    """H de la instalación (m) para Q en l/s; params como los devuelve App._parse_and_get_params."""
+    s, C, J_lps, Le, kv2g, kc, z = params
+    Q_lps = np.asarray(Q_lps, dtype=float)
+    return z + (1+kc)*kv2g*Q_lps**2 + (J_lps*Le)*Q_lps**1.852
+
+def cadenas_fuente(s_rel, tabla_motor=(CARGA_MOTOR, ETA_MOTOR_IE3), variador=None):
+    """
+    Cadenas eléctricas (arranque directo, con variador) del motor normalizado para la
+    máxima potencia en el eje del mayor rodete del catálogo; variador por defecto el típico.
+    """
+    Q, H, eta = gen_curve_for_diameter(max(RODETES_MM))
+    P_max = np.max(9800.0*s_rel*(Q/1000.0)*H / eta / 1000.0)
+    motor = Motor(motor_normalizado(P_max), *tabla_motor)
+    return CadenaElectrica(motor), CadenaElectrica(motor, Variador() if variador is None else variador)
+
+def recorte_para_hobj(hobj, params, D_act_mm, pr=0.0, iters=60, cadenas=None):
+    """
+    Rodete recortado (diámetro continuo) o velocidad que dan h_obj sin estrangular,
+    frente a la regulación con válvula del rodete instalado D_act_mm. Vectorizado en hobj.
+
+    Con la semejanza de gen_curve_for_diameter (Q ∝ D, H ∝ D², η igual en puntos
+    homólogos) el rodete buscado cumple r²·H_base(Q_obj/r) = H_inst(Q_obj), r = D/D_BASE.
+    La misma ley vale para la velocidad con el rodete instalado, así que
+    n/n0 = D/D_act y la potencia en el eje es la misma en los dos casos; la eléctrica no:
+    la válvula y el recorte van con arranque directo y la velocidad con variador
+    (cadenas = (directo, variador), por defecto las de cadenas_fuente). El ahorro es eléctrico.
+    """
+    s, C, J_lps, Le, kv2g, kc, z = params
+    hobj = np.atleast_1d(np.asarray(hobj, dtype=float))
+    Q = np.sqrt(hobj / kv2g)
+    H_req = altura_instalacion(Q, params)
+
+    # r²·H_base(Q/r) crece con r (H_base no crece con Q): bisección simultánea dentro de la tabla
+    g = lambda r: r**2 * np.interp(Q / r, Qb_base_ls, Hb_base_m) - H_req
+    lo = Q / Qb_base_ls[-1]; hi = Q / Qb_base_ls[0]
+    en_tabla = (g(lo) <= 0.0) & (g(hi) >= 0.0)
+    for _ in range(iters):
+        m = 0.5*(lo + hi)
+        pos = g(m) > 0.0
+        hi = np.where(pos, m, hi); lo = np.where(pos, lo, m)
+    r = np.where(en_tabla, 0.5*(lo + hi), np.nan)
+    n_rel = r * D_BASE_MM / D_act_mm
+    factible = en_tabla & (n_rel <= 1.0 + 1e-9)   # un rodete solo se puede recortar
+
+    # Regulación con válvula: el rodete instalado da H_valv y la válvula disipa el resto
+    Qc, Hc, etac = gen_curve_for_diameter(D_act_mm)
+    H_valv = np.interp(Q, Qc, Hc)
+    eta_valv = np.interp(Q, Qc, etac)
+    eta_rec = np.interp(Q / np.where(en_tabla, r, 1.0), Qb_base_ls, eta_base)
+    gamma = 9800.0 * s
+    P_valv = gamma*(Q/1000.0)*H_valv / np.maximum(eta_valv, 0.01) / 1000.0
+    P_rec = np.where(factible, gamma*(Q/1000.0)*H_req / np.maximum(eta_rec, 0.01) / 1000.0, np.nan)
+    directo, variador = cadenas_fuente(s) if cadenas is None else cadenas
+    Pe_valv = directo.P_electrica(P_valv)
+    Pe_rec = directo.P_electrica(P_rec)
+    Pe_vel = variador.P_electrica(P_rec, np.where(factible, n_rel, 1.0))
+    ahorro = Pe_valv - Pe_rec
+    return dict(hobj=hobj, Q=Q, H_req=H_req, D_mm=np.where(factible, r*D_BASE_MM, np.nan),
+                n_rel=np.where(factible, n_rel, np.nan), eta=np.where(factible, eta_rec, np.nan),
+                P_kW=P_rec, H_valv=H_valv, hf_valv=H_valv - H_req, eta_valv=eta_valv, P_valv_kW=P_valv,
+                P_elec_valv_kW=Pe_valv, P_elec_rec_kW=Pe_rec, P_elec_vel_kW=Pe_vel,
+                ahorro_kW=ahorro, ahorro_vel_kW=Pe_valv - Pe_vel, ahorro_eur_h=ahorro*pr, factible=factible)
+
+def puntos_funcionamiento(r, params, iters=60):
+    """
+    Punto de funcionamiento (Q l/s, H m, η) de la curva base escalada por r, vectorizado en r.
+    r = D/D_BASE para un rodete o (D/D_BASE)·(n/n0) con variador: la semejanza es la misma.
+    Misma búsqueda que bisect_root(func_bal, 0.1, 150), para todos los r a la vez; Q = 0 si no hay cruce.
+    """
+    r = np.atleast_1d(np.asarray(r, dtype=float))
+    f = lambda q: r**2 * np.interp(q / r, Qb_base_ls, Hb_base_m) - altura_instalacion(q, params)
+    a = np.full(r.shape, 0.1); b = np.full(r.shape, 150.0)
+    hay = (f(a) > 0.0) & (f(b) < 0.0)
+    for _ in range(iters):
+        m = 0.5*(a + b)
+        pos = f(m) > 0.0
+        a = np.where(pos, m, a); b = np.where(pos, b, m)
+    Q = np.where(hay, 0.5*(a + b), 0.0)
+    H = r**2 * np.interp(Q / r, Qb_base_ls, Hb_base_m)
+    return Q, H, np.interp(Q / r, Qb_base_ls, eta_base)
+
+def opciones_funcionamiento(params, D_act_mm, h_min, velocidades=(1.0, 0.95, 0.90, 0.85, 0.80), cadenas=None):
+    """
+    Tabla de opciones para la programación horaria: rodetes del catálogo a n0 y el rodete
+    activo a varias velocidades, descartando las que no alcanzan h_min en el chorro.
+    Devuelve (etiquetas, Q m³/h, P kW, h_chorro m) ordenadas por caudal. P es la potencia
+    eléctrica: arranque directo a n0 y variador para las velocidades reducidas
+    (cadenas = (directo, variador), por defecto las de cadenas_fuente).
+    """
+    s, C, J_lps, Le, kv2g, kc, z = params
+    etiquetas = [f"R-{int(D)}" for D in RODETES_MM] + [f"R-{int(D_act_mm)} {v*100:.0f} %" for v in velocidades if v < 1.0]
+    r = np.concatenate([np.asarray(RODETES_MM) / D_BASE_MM,
+                        [D_act_mm / D_BASE_MM * v for v in velocidades if v < 1.0]])
+    Q, H, eta = puntos_funcionamiento(r, params)
+    P_eje = 9800.0*s*(Q/1000.0)*H / np.maximum(eta, 0.01) / 1000.0
+    directo, variador = cadenas_fuente(s) if cadenas is None else cadenas
+    n_rel = np.concatenate([np.ones(len(RODETES_MM)), [v for v in velocidades if v < 1.0]])
+    P_kW = np.where(n_rel < 1.0, variador.P_electrica(P_eje, n_rel), directo.P_electrica(P_eje))
+    h_chorro = kv2g*Q**2
+    ok = (Q > 0.0) & (h_chorro >= h_min - 1e-9)
+    orden = np.argsort(Q[ok])
+    return ([etiquetas[i] for i in np.flatnonzero(ok)[orden]], (Q*3.6)[ok][orden], P_kW[ok][orden], h_chorro[ok][orden])
+
+# ----------- Familia continua de rodetes ----------- #
+NIVELES_ETA = [0.73, 0.75, 0.77, 0.785]   # isorrendimientos dibujados
+
+class FamiliaRodetes:
+    """
+    Familia continua de rodetes entre D_min y D_max por semejanza con la curva base,
+    tabulada una sola vez en arrays (n_D, n_Q): fila = diámetro, columna = punto homólogo.
+    Las isolíneas de η y la envolvente de funcionamiento se calculan aquí y la GUI
+    solo las dibuja; la elección de recorte para un punto se resuelve sobre la tabla.
+    """
+    def __init__(self, D_min=RODETES_MM[0], D_max=RODETES_MM[-1], n_D=165, n_Q=121, niveles=NIVELES_ETA):
+        self.D = np.linspace(D_min, D_max, n_D)
+        self.r = self.D / D_BASE_MM
+        self.u = np.linspace(Qb_base_ls[0], Qb_base_ls[-1], n_Q)   # caudal homólogo a D_BASE (l/s)
+        self.Q = self.r[:, None] * self.u                          # (n_D, n_Q) l/s
+        self.H = self.r[:, None]**2 * np.interp(self.u, Qb_base_ls, Hb_base_m)
+        self.eta = np.broadcast_to(np.interp(self.u, Qb_base_ls, eta_base), self.Q.shape)
+
+        # Envolvente: rodete máximo, extremo derecho, rodete mínimo (al revés) y extremo izquierdo
+        self.envolvente = (np.concatenate([self.Q[-1], self.Q[::-1, -1], self.Q[0, ::-1], self.Q[:, 0]]),
+                           np.concatenate([self.H[-1], self.H[::-1, -1], self.H[0, ::-1], self.H[:, 0]]))
+        gen = contour_generator(self.Q, self.H, self.eta)
+        self.isolineas = {nv: gen.lines(nv) for nv in niveles}     # listas de arrays (m, 2) Q-H
+
+    def _en_tabla(self, Q):
+        """H y η de cada rodete de la familia al caudal Q (puntos, n_D); NaN fuera de su curva."""
+        k = (np.asarray(Q, dtype=float)[..., None] / self.r - self.u[0]) / (self.u[1] - self.u[0])
+        dentro = (k >= 0.0) & (k <= self.u.size - 1)
+        i = np.clip(np.floor(k).astype(int), 0, self.u.size - 2)
+        w = np.clip(k - i, 0.0, 1.0)
+        fila = np.arange(self.D.size)
+        Hd = self.H[fila, i] * (1.0 - w) + self.H[fila, i + 1] * w
+        ed = self.eta[fila, i] * (1.0 - w) + self.eta[fila, i + 1] * w
+        return np.where(dentro, Hd, np.nan), np.where(dentro, ed, np.nan)
+
+    def mejor_recorte(self, Q, H):
+        """
+        Recorte de la familia con mejor rendimiento global para el punto (Q l/s, H m),
+        vectorizado en puntos. Los rodetes que dan más altura se regulan con válvula, así que
+        el rendimiento global es η·H/H_d; el óptimo suele ser el recorte exacto (H_d = H),
+        que se interpola entre las dos filas que lo encierran.
+        """
+        Q = np.atleast_1d(np.asarray(Q, dtype=float)); H = np.atleast_1d(np.asarray(H, dtype=float))
+        Hd, ed = self._en_tabla(Q)
+        cumple = Hd >= H[:, None]
+        eta_g = np.where(cumple, ed * H[:, None] / np.where(cumple, Hd, 1.0), -np.inf)
+        j = np.argmax(eta_g, axis=1)
+        filas = np.arange(Q.size)
+        factible = cumple[filas, j]
+        D = self.D[j].astype(float); eta = ed[filas, j]; Hj = Hd[filas, j]
+
+        # Si la fila anterior no llega a H, el recorte exacto está entre ambas
+        jm = np.maximum(j - 1, 0)
+        exacto = factible & (j > 0) & (Hd[filas, jm] < H)
+        w = np.where(exacto, (H - Hd[filas, jm]) / np.where(exacto, Hj - Hd[filas, jm], 1.0), 1.0)
+        D = np.where(exacto, self.D[jm] + w * (self.D[j] - self.D[jm]), D)
+        eta = np.where(exacto, ed[filas, jm] + w * (eta - ed[filas, jm]), eta)
+        Hj = np.where(exacto, H, Hj)
+        return dict(D_mm=np.where(factible, D, np.nan), eta=np.where(factible, eta, np.nan),
+                    eta_global=np.where(factible, eta * H / Hj, np.nan),
+                    hf_valv=np.where(factible, Hj - H, np.nan), factible=factible)
+
+
+# ----------- Gráficas (pantalla y exportación) ----------- #
+def dibujar_chorro(ax, h_jet_m: float, h_obj_m: float | None = None):
+    """Chorro vertical de altura h_jet_m y, si se da, la altura objetivo."""
+    ax.cla()
+
+    ymax = max(5.0, h_jet_m, h_obj_m or 0.0) * 1.2
+    ax.set_ylim(0, ymax)
+    ax.set_xlim(-0.6, 0.6)
+    ax.set_aspect('auto')
+    ax.set_xticks([])
+    ax.set_ylabel(r"$H$ (m)")
+    ax.set_title("Chorro")
+
+    # Suelo y boquilla
+    ax.plot([-0.5, 0.5], [0, 0], linewidth=2)
+    ax.add_patch(plt.Rectangle((-0.1, 0.0), 0.2, 0.12, fill=True))
+
+    # Chorro en azul
+    ax.plot([0, 0], [0, h_jet_m], linewidth=6, alpha=0.85, solid_capstyle="round", color="tab:blue")
+
+    # Cota
+    ax.annotate("", xy=(0.35, h_jet_m), xytext=(0.35, 0), arrowprops=dict(arrowstyle="<->", lw=1.8))
+    ax.text(0.38, h_jet_m/2, rf"$h={h_jet_m:.2f}$ m", va="center", rotation=90, bbox=dict(facecolor="white", alpha=0.6))
+
+    # Objetivo
+    if h_obj_m is not None:
+        ax.axhline(h_obj_m, linestyle="--", linewidth=1.2, color="red")
+        ax.text(-0.55, h_obj_m, rf"Obj$={h_obj_m:.2f}$ m", va="center", color="red")
+
+    if h_obj_m is not None and h_jet_m < h_obj_m:
+        ax.text(0, ymax*0.92, "⚠ Altura insuficiente", color="red", ha="center", va="top", fontsize=10, weight="bold")
+
+def dibujar_familia(ax, familia, pump_curves, active_D, Q_plot, Qpf=None, Hpf=None, params=None,
+                    reg_data=None, npsh=None):
+    """
+    Familia de rodetes, curva del sistema, punto de funcionamiento y regulación sobre ax.
+    Solo usa sus argumentos (params: los de _parse_and_get_params, para la curva del
+    sistema), así que vale para la pantalla y para el hilo de exportación.
+    """
+    ax.cla()
+    ax.grid(True, linestyle=":", alpha=0.6)
+    ax.set_xlabel(r"$Q$ (L/s)")
+    ax.set_ylabel(r"$H$ (m)")
+    ax.set_title("Familia de Bombas vs Instalación")
+
+    # Configurar limites Zoom o Full
+    if Qpf is not None:
+        span_q = 55; span_h = 25
+        x_min = max(0, Qpf - span_q/2)
+        x_max = x_max_raw = x_min + span_q
+        
+        y_min = max(0, Hpf - span_h/2)
+        y_max = y_min + span_h
+        
+        # Si hay regulación, expandir vista para incluir toda la línea roja
+        if reg_data:
+            Qo, H_sys_o, H_pump_o = reg_data
+            # Expandir X
+            if Qo < x_min: x_min = max(0, Qo - 5)
+            if Qo > x_max: x_max = Qo + 5
+            # Expandir Y (con margen para texto)
+            if H_sys_o < y_min: y_min = max(0, H_sys_o - 2)
+            if H_pump_o > y_max: y_max = H_pump_o + 4 # margen superior para texto deltaH
+
+        ax.set_xlim(x_min, x_max)
+        ax.set_ylim(y_min, y_max)
+    else:
+        x_min, x_max = 0, 100
+        ax.set_xlim(0, 100)
+        ax.set_ylim(0, 45)
+
+    # Familia continua: envolvente de funcionamiento e isorrendimientos precalculados
+    ax.fill(*familia.envolvente, color="tab:orange", alpha=0.07, lw=0, label="Familia de rodetes")
+    for nv, lineas in familia.isolineas.items():
+        for xy in lineas:
+            ax.plot(xy[:, 0], xy[:, 1], color="tab:green", lw=0.7, alpha=0.5)
+        if lineas:
+            xy = lineas[0][len(lineas[0]) // 2]
+            ax.text(xy[0], xy[1], f"η={nv*100:.1f}%", fontsize=7, color="tab:green", alpha=0.8,
+                    ha="center", va="bottom", clip_on=True)
+
+    # Dibujar TODAS las bombas con etiquetas distribuidas
+    for idx, D in enumerate(RODETES_MM):
+        Qc, Hc, _ = pump_curves[D]
+        
+        if D == active_D:
+            color = "tab:orange"; lw = 3; ls = "-"
+            lbl_legend = "Bomba Activa"
+        else:
+            color = "gray"; lw = 1; ls = "--"
+            lbl_legend = None 
+            
+        ax.plot(Qc, Hc, ls=ls, lw=lw, color=color, alpha=0.6, label=lbl_legend)
+        
+        # Etiqueta: usar diferentes posiciones X para evitar solapamiento
+        # Distribuir entre 70% y 95% del rango visible
+        x_range = x_max - x_min
+        # Posicionar cada etiqueta en un punto diferente de la curva
+        label_x_fraction = 0.70 + (idx * 0.06)  # 0.70, 0.76, 0.82, 0.88, 0.94
+        x_lbl = x_min + x_range * label_x_fraction
+        
+        # Verificar que x_lbl esté dentro del rango de la curva Y del viewport
+        # Usar un rango más amplio para asegurar visibilidad
+        if Qc[0] <= x_lbl <= Qc[-1]:
+            y_lbl = interp_xy(Qc, Hc, x_lbl)
+            ylim = ax.get_ylim()
+            # Rango más permisivo para asegurar que las etiquetas aparezcan
+            if (ylim[0] - 8) <= y_lbl <= (ylim[1] + 8):
+                ax.text(x_lbl, y_lbl, f"R-{int(D)}", 
+                             fontsize=8, color=color, va="bottom", ha="center", 
+                             weight="bold", clip_on=False,  # clip_on=False para forzar visibilidad
+                             bbox=dict(boxstyle="round,pad=0.3", facecolor="white", 
+                                      edgecolor=color, alpha=0.8, linewidth=0.5))
+
+    # Si hay Qpf, dibujar CCI y Punto
+    if Qpf is not None:
+        if params:
+             _, _, J_lps, Le, kv2g, kc, z = params
+             Hcci = [z + (1+kc)*kv2g*(q**2) + (J_lps*Le)*(q**1.852) for q in Q_plot]
+             ax.plot(Q_plot, Hcci, "-", linewidth=2, color="tab:blue", label=r"Curva Sistema")
+             
+             # Punto de funcionamiento con color magenta suave
+             ax.plot([Qpf], [Hpf], "o", markersize=12, color="#9B59B6", 
+                          markeredgecolor="white", markeredgewidth=2.5, zorder=11, label=r"Pto. Funcionamiento")
+             
+             # LINEA DE REGULACION (d) - SIEMPRE VISIBLE EN VERDE
+             if reg_data:
+                 Qo, H_sys_o, H_pump_o = reg_data
+                 # Línea verde sólida vertical
+                 ax.vlines(x=Qo, ymin=H_sys_o, ymax=H_pump_o, colors="green", linestyles="-", linewidth=2.5, label=r"Regulación (Válvula)", zorder=9)
+                 ax.plot([Qo], [H_pump_o], "o", color="green", markersize=6, zorder=10)
+                 ax.plot([Qo], [H_sys_o], "o", color="green", markersize=6, zorder=10)
+                 
+                 # Texto delta H centrado o mensaje IMPOSIBLE
+                 mid_y = (H_sys_o + H_pump_o)/2
+                 delta_h = H_pump_o - H_sys_o
+                 
+                 # Ajustar alineación según donde esté Qpf
+                 ha_txt = "right" if Qo < Qpf else "left"
+                 off_x = -1.0 if Qo < Qpf else 1.0
+                 
+                 # Si delta_h es negativo, mostrar IMPOSIBLE
+                 if delta_h < 0:
+                     txt_label = "IMPOSIBLE"
+                     txt_color = "red"
+                     edge_color = "red"
+                 else:
+                     txt_label = rf"$\Delta H={delta_h:.2f}$ m"
+                     txt_color = "green"
+                     edge_color = "green"
+                 
+                 ax.text(Qo + off_x, mid_y, txt_label, 
+                              color=txt_color, fontsize=10, ha=ha_txt, va="center", weight="bold",
+                              bbox=dict(boxstyle="round,pad=0.4", facecolor="white", edgecolor=edge_color, alpha=0.9))
+
+    # Rango de regulación sobre la curva del rodete activo; en rojo donde cavita
+    if npsh is not None:
+        ax.plot(npsh["Q"], npsh["H"], color="tab:cyan", lw=6, alpha=0.35, solid_capstyle="butt",
+                label="Rango de regulación", zorder=3)
+        if npsh["cavita"].any():
+            ax.plot(npsh["Q"], np.where(npsh["cavita"], npsh["H"], np.nan), color="red", lw=6, alpha=0.5,
+                    solid_capstyle="butt", label="Cavitación (NPSH)", zorder=4)
+
+    ax.legend(loc="upper left", fontsize=9, framealpha=0.9)
+
 # ============================ GUI ============================ #
 class App(ctk.CTk):
     def __init__(self):
@@ -79,10 +457,14 @@ class App(ctk.CTk):
 
         self.Q_plot = np.linspace(0.0, 100.0, 400)  # l/s
         self._update_job = None
+        self.calculo = CalculoAsync(self)  # Resolución fuera del hilo de Tk
 
         # Estado de bomba activa
         self.active_D = 256.0
         self.pump_curves = {D: gen_curve_for_diameter(D) for D in RODETES_MM}
+        self.familia = FamiliaRodetes()  # tabla D × Q, isolíneas de η y envolvente (una sola vez)
+        self.tabla_motor = (CARGA_MOTOR, ETA_MOTOR_IE3)  # η(carga) del motor; se puede cargar de CSV
+        self.variador = Variador()                       # mapa η(n/n0, par) del variador
 
         # Fuentes
         self.font_h1 = ctk.CTkFont(family="Segoe UI", size=20, weight="bold")
@@ -270,6 +652,14 @@ class App(ctk.CTk):
         ctk.CTkButton(btnrow, text="Calcular", command=self.calcular).grid(row=0, column=0, sticky="ew", padx=4, pady=4)
         ctk.CTkButton(btnrow, text="Reiniciar valores", command=self.reiniciar_valores).grid(row=0, column=1, sticky="ew", padx=4, pady=4)
         ctk.CTkButton(btnrow, text="Guardar gráfica", command=self.guardar_grafica).grid(row=0, column=2, sticky="ew", padx=4, pady=4)
+        ctk.CTkButton(btnrow, text="Exportar barrido h_obj (PDF/PNG)", command=self.exportar_barrido_hobj,
+                      fg_color="#555555", hover_color="#333333").grid(row=1, column=0, columnspan=3, sticky="ew", padx=4, pady=(0,4))
+        ctk.CTkButton(btnrow, text="Recorte / velocidad frente a válvula (barrido h_obj)", command=self.ventana_recorte,
+                      fg_color="#555555", hover_color="#333333").grid(row=2, column=0, columnspan=3, sticky="ew", padx=4, pady=(0,4))
+        ctk.CTkButton(btnrow, text="Programación horaria (tarifa por periodos)", command=self.ventana_programacion,
+                      fg_color="#555555", hover_color="#333333").grid(row=3, column=0, columnspan=3, sticky="ew", padx=4, pady=(0,4))
+        ctk.CTkButton(btnrow, text="Tablas de rendimiento motor / variador (CSV)", command=self.cargar_tablas_electricas,
+                      fg_color="#555555", hover_color="#333333").grid(row=4, column=0, columnspan=3, sticky="ew", padx=4, pady=(0,4))
 
         # Lado derecho: gráfica + resultados
         right = ctk.CTkFrame(root)
@@ -512,149 +902,16 @@ class App(ctk.CTk):
 
     # -------------------- Dibujo del chorro -------------------- #
     def _draw_jet(self, h_jet_m: float, h_obj_m: float | None = None):
-        ax = self.ax_jet
-        ax.cla()
-
-        ymax = max(5.0, h_jet_m, h_obj_m or 0.0) * 1.2
-        ax.set_ylim(0, ymax)
-        ax.set_xlim(-0.6, 0.6)
-        ax.set_aspect('auto')
-        ax.set_xticks([])
-        ax.set_ylabel(r"$H$ (m)")
-        ax.set_title("Chorro")
-
-        # Suelo y boquilla
-        ax.plot([-0.5, 0.5], [0, 0], linewidth=2)
-        ax.add_patch(plt.Rectangle((-0.1, 0.0), 0.2, 0.12, fill=True))
-
-        # Chorro en azul
-        ax.plot([0, 0], [0, h_jet_m], linewidth=6, alpha=0.85, solid_capstyle="round", color="tab:blue")
-
-        # Cota
-        ax.annotate("", xy=(0.35, h_jet_m), xytext=(0.35, 0), arrowprops=dict(arrowstyle="<->", lw=1.8))
-        ax.text(0.38, h_jet_m/2, rf"$h={h_jet_m:.2f}$ m", va="center", rotation=90, bbox=dict(facecolor="white", alpha=0.6))
-
-        # Objetivo
-        if h_obj_m is not None:
-            ax.axhline(h_obj_m, linestyle="--", linewidth=1.2, color="red")
-            ax.text(-0.55, h_obj_m, rf"Obj$={h_obj_m:.2f}$ m", va="center", color="red")
-
-        if h_obj_m is not None and h_jet_m < h_obj_m:
-            ax.text(0, ymax*0.92, "⚠ Altura insuficiente", color="red", ha="center", va="top", fontsize=10, weight="bold")
+        dibujar_chorro(self.ax_jet, h_jet_m, h_obj_m)
 
     # -------------------- Dibujo base -------------------- #
     def _draw_static(self):
         self._plot_with_zoom(None, None)
 
-    def _plot_with_zoom(self, Qpf, Hpf, reg_data=None):
-        self.ax.cla()
-        self.ax.grid(True, linestyle=":", alpha=0.6)
-        self.ax.set_xlabel(r"$Q$ (L/s)")
-        self.ax.set_ylabel(r"$H$ (m)")
-        self.ax.set_title("Familia de Bombas vs Instalación")
-
-        # Configurar limites Zoom o Full
-        if Qpf is not None:
-            span_q = 55; span_h = 25
-            x_min = max(0, Qpf - span_q/2)
-            x_max = x_max_raw = x_min + span_q
-            
-            y_min = max(0, Hpf - span_h/2)
-            y_max = y_min + span_h
-            
-            # Si hay regulación, expandir vista para incluir toda la línea roja
-            if reg_data:
-                Qo, H_sys_o, H_pump_o = reg_data
-                # Expandir X
-                if Qo < x_min: x_min = max(0, Qo - 5)
-                if Qo > x_max: x_max = Qo + 5
-                # Expandir Y (con margen para texto)
-                if H_sys_o < y_min: y_min = max(0, H_sys_o - 2)
-                if H_pump_o > y_max: y_max = H_pump_o + 4 # margen superior para texto deltaH
-
-            self.ax.set_xlim(x_min, x_max)
-            self.ax.set_ylim(y_min, y_max)
-        else:
-            x_min, x_max = 0, 100
-            self.ax.set_xlim(0, 100)
-            self.ax.set_ylim(0, 45)
-
-        # Dibujar TODAS las bombas con etiquetas distribuidas
-        for idx, D in enumerate(RODETES_MM):
-            Qc, Hc, _ = self.pump_curves[D]
-            
-            if D == self.active_D:
-                color = "tab:orange"; lw = 3; ls = "-"
-                lbl_legend = "Bomba Activa"
-            else:
-                color = "gray"; lw = 1; ls = "--"
-                lbl_legend = None 
-                
-            self.ax.plot(Qc, Hc, ls=ls, lw=lw, color=color, alpha=0.6, label=lbl_legend)
-            
-            # Etiqueta: usar diferentes posiciones X para evitar solapamiento
-            # Distribuir entre 70% y 95% del rango visible
-            x_range = x_max - x_min
-            # Posicionar cada etiqueta en un punto diferente de la curva
-            label_x_fraction = 0.70 + (idx * 0.06)  # 0.70, 0.76, 0.82, 0.88, 0.94
-            x_lbl = x_min + x_range * label_x_fraction
-            
-            # Verificar que x_lbl esté dentro del rango de la curva Y del viewport
-            # Usar un rango más amplio para asegurar visibilidad
-            if Qc[0] <= x_lbl <= Qc[-1]:
-                y_lbl = interp_xy(Qc, Hc, x_lbl)
-                ylim = self.ax.get_ylim()
-                # Rango más permisivo para asegurar que las etiquetas aparezcan
-                if (ylim[0] - 8) <= y_lbl <= (ylim[1] + 8):
-                    self.ax.text(x_lbl, y_lbl, f"R-{int(D)}", 
-                                 fontsize=8, color=color, va="bottom", ha="center", 
-                                 weight="bold", clip_on=False,  # clip_on=False para forzar visibilidad
-                                 bbox=dict(boxstyle="round,pad=0.3", facecolor="white", 
-                                          edgecolor=color, alpha=0.8, linewidth=0.5))
-
-        # Si hay Qpf, dibujar CCI y Punto
-        if Qpf is not None:
-            parsed = self._parse_and_get_params()
-            if parsed:
-                 _, _, J_lps, Le, kv2g, kc, z = parsed
-                 Hcci = [z + (1+kc)*kv2g*(q**2) + (J_lps*Le)*(q**1.852) for q in self.Q_plot]
-                 self.ax.plot(self.Q_plot, Hcci, "-", linewidth=2, color="tab:blue", label=r"Curva Sistema")
-                 
-                 # Punto de funcionamiento con color magenta suave
-                 self.ax.plot([Qpf], [Hpf], "o", markersize=12, color="#9B59B6", 
-                              markeredgecolor="white", markeredgewidth=2.5, zorder=11, label=r"Pto. Funcionamiento")
-                 
-                 # LINEA DE REGULACION (d) - SIEMPRE VISIBLE EN VERDE
-                 if reg_data:
-                     Qo, H_sys_o, H_pump_o = reg_data
-                     # Línea verde sólida vertical
-                     self.ax.vlines(x=Qo, ymin=H_sys_o, ymax=H_pump_o, colors="green", linestyles="-", linewidth=2.5, label=r"Regulación (Válvula)", zorder=9)
-                     self.ax.plot([Qo], [H_pump_o], "o", color="green", markersize=6, zorder=10)
-                     self.ax.plot([Qo], [H_sys_o], "o", color="green", markersize=6, zorder=10)
-                     
-                     # Texto delta H centrado o mensaje IMPOSIBLE
-                     mid_y = (H_sys_o + H_pump_o)/2
-                     delta_h = H_pump_o - H_sys_o
-                     
-                     # Ajustar alineación según donde esté Qpf
-                     ha_txt = "right" if Qo < Qpf else "left"
-                     off_x = -1.0 if Qo < Qpf else 1.0
-                     
-                     # Si delta_h es negativo, mostrar IMPOSIBLE
-                     if delta_h < 0:
-                         txt_label = "IMPOSIBLE"
-                         txt_color = "red"
-                         edge_color = "red"
-                     else:
-                         txt_label = rf"$\Delta H={delta_h:.2f}$ m"
-                         txt_color = "green"
-                         edge_color = "green"
-                     
-                     self.ax.text(Qo + off_x, mid_y, txt_label, 
-                                  color=txt_color, fontsize=10, ha=ha_txt, va="center", weight="bold",
-                                  bbox=dict(boxstyle="round,pad=0.4", facecolor="white", edgecolor=edge_color, alpha=0.9))
-
-        self.ax.legend(loc="upper left", fontsize=9, framealpha=0.9)
+    def _plot_with_zoom(self, Qpf, Hpf, reg_data=None, npsh=None):
+        params = self._parse_and_get_params() if Qpf is not None else None
+        dibujar_familia(self.ax, self.familia, self.pump_curves, self.active_D, self.Q_plot, Qpf, Hpf,
+                        params=params, reg_data=reg_data, npsh=npsh)
         self.canvas.draw_idle()
 
     # -------------------- Animación cambio de bomba -------------------- #
@@ -734,17 +991,8 @@ class App(ctk.CTk):
             color="white", weight="bold"
         )
 
-    def calcular(self):
-        # 1. Leer inputs
-        try:
-            s_val = float(self.geo_vals["s"])  # s es fijo ahora
-            h8  = float(self.h8_var.get().replace(",", "."))
-            hobj= float(self.hobj_var.get().replace(",", "."))
-            pr  = float(self.precio_var.get().replace(",", "."))
-        except: return 
-        
-        params = self._parse_and_get_params()
-        if not params: return
+    def _resolver(self, h8, hobj, pr, params):
+        """Selección de rodete (B), punto de funcionamiento (C) y regulación (D) sin tocar la GUI."""
         s, C, J_lps, Le, kv2g, kc, z = params
 
         # 2. SELECCIÓN DE BOMBA (Apartado B)
@@ -753,49 +1001,88 @@ class App(ctk.CTk):
         H_req_min = z + (1+kc)*kv2g*(Q_min**2) + (J_lps*Le)*(Q_min**1.852)
         
         # Buscar en catálogo
-        best_D = RODETES_MM[-1]; found = False
-        for D in RODETES_MM:
-            Qc, Hc, _ = self.pump_curves[D]
-            H_disp = interp_xy(Qc, Hc, Q_min)
-            if H_disp >= H_req_min * 1.0: # SIN margen (antes 1.05 = 5%)
-                best_D = D
-                found = True
-                break
-        
-        # Si cambia bomba, animar y volver
-        if best_D != self.active_D:
-            self.active_D = best_D
-            self._animate_pump_switch(best_D, self.calcular)
-            return
+        # Altura de todos los rodetes del catálogo a Q_min de una vez (semejanza con la curva base)
+        r_cat = np.asarray(RODETES_MM) / D_BASE_MM
+        H_disp = r_cat**2 * np.interp(Q_min / r_cat, Qb_base_ls, Hb_base_m)
+        cumplen = np.flatnonzero(H_disp >= H_req_min)  # SIN margen (antes 1.05 = 5%)
+        found = cumplen.size > 0
+        best_D = RODETES_MM[cumplen[0]] if found else RODETES_MM[-1]
+        Qc, Hc, etac = self.pump_curves[best_D]
+        optimo = {k: v[0] for k, v in self.familia.mejor_recorte(Q_min, H_req_min).items()}
 
-        self._update_pump_bar()
-
-        # 3. GUI CHECK (No redibujar excesivamente si es auto-update)
-        # Simplemente procedemos al cálculo
-        
         # C) PUNTO DE FUNCIONAMIENTO
         def func_bal(q):
             # H_bomba - H_sistema
-            H_b = self.Hb_activa(q)
+            H_b = interp_xy(Qc, Hc, q)
             H_s = z + (1+kc)*kv2g*(q**2) + (J_lps*Le)*(q**1.852)
             return H_b - H_s
         
         Qpf = bisect_root(func_bal, 0.1, 150)
         if Qpf is None: Qpf = 0.0
         
-        Hpf = self.Hb_activa(Qpf)
-        eta_pf = self.eta_activa(Qpf)
+        Hpf = interp_xy(Qc, Hc, Qpf)
+        eta_pf = float(interp_xy(Qc, etac, Qpf))
         
-        gamma = 9800.0 * s_val
+        gamma = 9800.0 * s
         Pabs_kW = gamma*(Qpf/1000.0)*Hpf / (max(eta_pf, 0.01)) / 1000.0
-        coste = (Pabs_kW / (Qpf*3.6)) * pr if Qpf>0 else 0
+        cadenas = self._cadenas(s)
+        P_elec_kW = float(cadenas[0].P_electrica(Pabs_kW))
 
         # D) REGULACIÓN VÁLVULA
         # Q necesario para h_obj
         Q_obj = np.sqrt(hobj / kv2g)
-        H_bomb_obj = self.Hb_activa(Q_obj)
+        H_bomb_obj = interp_xy(Qc, Hc, Q_obj)
         H_syst_base = z + (1+kc)*kv2g*(Q_obj**2) + (J_lps*Le)*(Q_obj**1.852)
+        recorte = {k: v[0] for k, v in recorte_para_hobj(hobj, params, best_D, pr, cadenas=cadenas).items()}
+
+        # NPSH en todo el rango de regulación: de h_min a h_obj y hasta la válvula abierta (Qpf)
+        extremos = [Q_min, Q_obj] + ([Qpf] if Qpf > 0 else [])
+        npsh = npsh_regulacion(np.linspace(min(extremos), max(extremos), N_REGULACION), best_D, params)
+
+        return dict(recorte=recorte, optimo=optimo, npsh=npsh, best_D=best_D, found=found, Q_min=Q_min, H_req_min=H_req_min,
+                    Qpf=Qpf, Hpf=Hpf, eta_pf=eta_pf, Pabs_kW=Pabs_kW, P_elec_kW=P_elec_kW, motor=cadenas[0].resumen(),
+                    Q_obj=Q_obj, H_bomb_obj=H_bomb_obj, H_syst_base=H_syst_base,
+                    h_chorro=kv2g*(Qpf**2))
+
+    def calcular(self):
+        # 1. Leer inputs
+        try:
+            h8  = float(self.h8_var.get().replace(",", "."))
+            hobj= float(self.hobj_var.get().replace(",", "."))
+            pr  = float(self.precio_var.get().replace(",", "."))
+        except ValueError:
+            return
         
+        params = self._parse_and_get_params()
+        if not params: return
+
+        self.calculo.enviar(self._resolver, h8, hobj, pr, params,
+                            on_result=lambda r: self._renderizar(r, h8, hobj, pr, params),
+                            on_error=self._error_calculo)
+
+    def _error_calculo(self, e):
+        """Un fallo del cálculo no deja el panel con valores de la entrada anterior."""
+        for var in (self.res_Q, self.res_H, self.res_Eta, self.res_Pot, self.res_hChorro,
+                    self.res_Coste, self.res_Coste_Hora, self.res_DeltaH):
+            var.set("-")
+        self._set_text(self.txt_d, f"Error de cálculo: {e}")
+
+    def _renderizar(self, r, h8, hobj, pr, params):
+        """Vuelca el resultado de _resolver en dashboard, textos y gráficas (hilo de Tk)."""
+        s, C, J_lps, Le, kv2g, kc, z = params
+        best_D, found = r["best_D"], r["found"]
+        Q_min, H_req_min = r["Q_min"], r["H_req_min"]
+        Qpf, Hpf, eta_pf, Pabs_kW = r["Qpf"], r["Hpf"], r["eta_pf"], r["Pabs_kW"]
+        Q_obj, H_bomb_obj, H_syst_base = r["Q_obj"], r["H_bomb_obj"], r["H_syst_base"]
+
+        # Si cambia bomba, animar y volver
+        if best_D != self.active_D:
+            self.active_D = best_D
+            self._animate_pump_switch(best_D, lambda: self._renderizar(r, h8, hobj, pr, params))
+            return
+
+        self._update_pump_bar()
+
         hf_valv = H_bomb_obj - H_syst_base
         aviso_d = ""
         if hf_valv < 0:
@@ -813,14 +1100,16 @@ class App(ctk.CTk):
         h_real = kv2g * (Qpf**2)
         self.res_hChorro.set(f"{h_real:.2f}")
         
-        # Coste por m³ = (Potencia * Precio) / (Caudal en m³/h)
+        # Coste por m³ = (Potencia eléctrica * Precio) / (Caudal en m³/h): se paga lo que toma el motor de la red
         # Q en l/s -> Q en m³/h = Q * 3.6
+        P_elec_kW = r["P_elec_kW"]
         Q_m3h = Qpf * 3.6
-        coste_m3 = (Pabs_kW * pr / Q_m3h) if Q_m3h > 0 else 0
+        kWh_m3 = P_elec_kW / Q_m3h if Q_m3h > 0 else 0
+        coste_m3 = kWh_m3 * pr
         self.res_Coste.set(f"{coste_m3:.4f}")
         
         # Coste por hora (más interpretable)
-        coste_hora = Pabs_kW * pr if Qpf > 0 else 0
+        coste_hora = P_elec_kW * pr if Qpf > 0 else 0
         self.res_Coste_Hora.set(f"{coste_hora:.3f}")
         
         self.res_Bomba.set(f"{int(self.active_D)}")
@@ -853,6 +1142,14 @@ class App(ctk.CTk):
                         widget.configure(text_color="#F44336")  # Rojo
             except: pass
 
+        opt = r["optimo"]
+        if opt["factible"]:
+            txt_opt = f"   Recorte óptimo: {opt['D_mm']:.1f} mm (η = {opt['eta']*100:.1f} %)"
+            if opt["hf_valv"] > 0.01:
+                txt_opt += f"\n   + válvula {opt['hf_valv']:.2f} m (η global {opt['eta_global']*100:.1f} %)"
+        else:
+            txt_opt = "   Fuera de la envolvente de la familia."
+
         # --- ACTUALIZAR TEXTOS IZQ/DER ---
         # Izquierda: A y B
         txt_a = (
@@ -861,7 +1158,8 @@ class App(ctk.CTk):
             f"   (C-HW: {C:.0f} para ε={self.geo_vals['eps']}cm)\n\n"
             f"B) SELECCIÓN (h_min={h8}m):\n"
             f"   Q_min = {Q_min:.2f} l/s -> H_req = {H_req_min:.2f} m\n"
-            f"   Rodete selec.: {int(best_D)} mm {'(Cumple)' if found else '(Max disp.)'}"
+            f"   Rodete selec.: {int(best_D)} mm {'(Cumple)' if found else '(Max disp.)'}\n"
+            f"{txt_opt}"
         )
         self._set_text(self.txt_ab, txt_a)
 
@@ -871,22 +1169,39 @@ class App(ctk.CTk):
             f"   Q = {Qpf:.2f} l/s\n"
             f"   H = {Hpf:.2f} mca\n"
             f"   η = {eta_pf*100:.1f} %\n"
-            f"   Pot = {Pabs_kW:.2f} kW\n"
+            f"   Pot = {Pabs_kW:.2f} kW (eje)\n"
+            f"   P_elec = {P_elec_kW:.2f} kW, {kWh_m3:.3f} kWh/m³\n"
+            f"   ({r['motor']})\n"
             f"   h_chorro = {h_real:.2f} m\n"
             f"   Coste/volumen= {coste_m3:.4f} €/m³\n"
             f"   Coste/hora= {coste_hora:.3f} €/h"
         )
+        rec = r["recorte"]
+        if rec["factible"]:
+            txt_rec = (f"   Sin estrangular: D = {rec['D_mm']:.1f} mm\n"
+                       f"   ó n = {rec['n_rel']*100:.1f} % de n0 (η = {rec['eta']*100:.1f} %)\n"
+                       f"   Ahorro = {rec['ahorro_kW']:.2f} kW recortando ({rec['ahorro_eur_h']:.3f} €/h),\n"
+                       f"   {rec['ahorro_vel_kW']:.2f} kW con variador")
+        else:
+            txt_rec = "   Sin recorte posible con este rodete."
         txt_d = (
             f"D) REGULACIÓN (h_obj={hobj}m):\n"
             f"   Q_obj = {Q_obj:.2f} l/s\n"
-            f"   {aviso_d}"
+            f"   {aviso_d}\n"
+            f"{txt_rec}"
         )
+        npsh = r["npsh"]
+        i_min = int(np.argmin(npsh["margen"]))
+        txt_d += (f"\n   NPSH ({npsh['Q'][0]:.1f}-{npsh['Q'][-1]:.1f} l/s): margen mín. "
+                  f"{npsh['margen'][i_min]:.2f} m a {npsh['Q'][i_min]:.1f} l/s")
+        if npsh["cavita"].any():
+            txt_d += f"\n   ⚠ CAVITA por encima de {npsh['Q'][npsh['cavita']].min():.1f} l/s"
         self._set_text(self.txt_c, txt_c)
         self._set_text(self.txt_d, txt_d)
 
         # Gráficas - ΔH siempre visible
         reg_data = (Q_obj, H_syst_base, H_bomb_obj)
-        self._plot_with_zoom(Qpf, Hpf, reg_data=reg_data)
+        self._plot_with_zoom(Qpf, Hpf, reg_data=reg_data, npsh=npsh)
         
         # Chorro (ya calculado arriba)
         self._draw_jet(h_real, hobj)
@@ -900,15 +1215,252 @@ class App(ctk.CTk):
 
     def guardar_grafica(self):
         try:
-            path = filedialog.asksaveasfilename(defaultextension=".png", filetypes=[("PNG", "*.png")])
-            if path: 
-                self.fig.savefig(path, dpi=150)
-                messagebox.showinfo("Guardado", f"Gráfica guardada en {path}")
+            path = filedialog.asksaveasfilename(defaultextension=".png", filetypes=[("PNG", "*.png"), ("PDF", "*.pdf")])
+            if not path: return
+            progreso = Progreso()
+            futuro = guardar_figura_async(self.fig, path, progreso, dpi=150)
         except Exception as e:
             messagebox.showerror("Error", str(e))
-    
+            return
+        seguir_exportacion(self, "Guardando gráfica…", futuro, progreso,
+                           lambda _: f"Gráfica guardada en {path}", fuente=self.font_h2)
+
+    def exportar_barrido_hobj(self):
+        """Exporta un fotograma por cada h_obj (5-10 m, pasos de 0.5 m); h_min sigue a h_obj como en los sliders."""
+        try:
+            pr = float(self.precio_var.get().replace(",", "."))
+        except ValueError:
+            pr = float(self.defaults["precio"])
+        params = self._parse_and_get_params()
+        if not params: return
+        path = filedialog.asksaveasfilename(
+            title="Exportar barrido de h objetivo",
+            defaultextension=".pdf",
+            filetypes=[("PDF multipágina", "*.pdf"), ("Secuencia PNG", "*.png")],
+            initialfile="barrido_hobj_9_2.pdf",
+        )
+        if not path: return
+        hobjs = np.arange(5.0, 10.0 + 1e-9, 0.5)
+        # Los puntos se resuelven aquí (≈1 ms cada uno); el hilo de exportación solo dibuja con funciones puras
+        resultados = [(hobj, self._resolver(hobj, hobj, pr, params)) for hobj in hobjs]
+        familia, pump_curves, Q_plot = self.familia, dict(self.pump_curves), self.Q_plot.copy()
+
+        def dibujar(fig, hobj_r):
+            hobj, r = hobj_r
+            gs = fig.add_gridspec(1, 2, width_ratios=[2.0, 1.0])
+            ax = fig.add_subplot(gs[0, 0]); ax_jet = fig.add_subplot(gs[0, 1])
+            dibujar_familia(ax, familia, pump_curves, r["best_D"], Q_plot, r["Qpf"], r["Hpf"], params=params,
+                            reg_data=(r["Q_obj"], r["H_syst_base"], r["H_bomb_obj"]), npsh=r["npsh"])
+            ax.set_title(f"Rodete {int(r['best_D'])} mm – h_obj = {hobj:.1f} m")
+            dibujar_chorro(ax_jet, r["h_chorro"], hobj)
+
+        progreso = Progreso()
+        futuro = exportar_barrido_figuras(path, resultados, dibujar, figsize=tuple(self.fig.get_size_inches()),
+                                          dpi=150, progreso=progreso)
+        seguir_exportacion(self, "Exportando barrido…", futuro, progreso,
+                           lambda rutas: f"{len(hobjs)} fotogramas guardados en:\n{rutas[0]}", fuente=self.font_h2)
+
+    def ventana_recorte(self):
+        """Diámetro, velocidad y ahorro frente a la válvula para h_obj de 5 a 10 m con el rodete activo."""
+        params = self._parse_and_get_params()
+        if not params: return
+        try:
+            pr = float(self.precio_var.get().replace(",", "."))
+        except ValueError:
+            pr = float(self.defaults["precio"])
+        D_act = self.active_D
+        rec = recorte_para_hobj(np.linspace(5.0, 10.0, 201), params, D_act, pr, cadenas=self._cadenas(params[0]))
+        if not rec["factible"].any():
+            messagebox.showinfo("Sin recorte", f"El rodete {int(D_act)} mm no llega a ningún h_obj del barrido.")
+            return
+
+        win = ctk.CTkToplevel(self)
+        win.title(f"Recorte y velocidad frente a válvula – rodete {int(D_act)} mm")
+        win.geometry("820x640")
+        win.transient(self)
+        fig = plt.Figure(figsize=(7.6, 5.2))
+        ax1 = fig.add_subplot(211); ax2 = fig.add_subplot(212, sharex=ax1)
+        h = rec["hobj"]
+        ax1.plot(h, rec["D_mm"], color="tab:orange", linewidth=2, label="D recortado (mm)")
+        ax1.axhline(D_act, color="gray", linestyle=":", linewidth=1)
+        ax1b = ax1.twinx()
+        ax1b.plot(h, rec["n_rel"]*100, color="tab:blue", linestyle="--", label="n/n0 (%)")
+        ax1.set_ylabel("D (mm)"); ax1b.set_ylabel("n/n0 (%)")
+        ax1.set_title(f"Regulación sin estrangular frente a válvula (rodete {int(D_act)} mm)")
+        l1, t1 = ax1.get_legend_handles_labels(); l2, t2 = ax1b.get_legend_handles_labels()
+        ax1.legend(l1 + l2, t1 + t2, loc="upper left", fontsize=8)
+        ax1.grid(True)
+        ax2.plot(h, np.where(rec["factible"], rec["P_elec_valv_kW"], np.nan), color="tab:red", label="Válvula")
+        ax2.plot(h, rec["P_elec_rec_kW"], color="tab:green", label="Recorte")
+        ax2.plot(h, rec["P_elec_vel_kW"], color="tab:blue", linestyle="--", label="Velocidad (variador)")
+        ax2b = ax2.twinx()
+        ax2b.plot(h, rec["ahorro_eur_h"], color="tab:purple", linestyle="-.", label="Ahorro (€/h)")
+        ax2.set_xlabel("h_obj (m)"); ax2.set_ylabel("P eléctrica (kW)"); ax2b.set_ylabel("Ahorro (€/h)")
+        l1, t1 = ax2.get_legend_handles_labels(); l2, t2 = ax2b.get_legend_handles_labels()
+        ax2.legend(l1 + l2, t1 + t2, loc="upper left", fontsize=8)
+        ax2.grid(True)
+        fig.tight_layout()
+        canvas = FigureCanvasTkAgg(fig, master=win)
+        canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=10)
+
+        ok = rec["factible"]
+        limite = "" if ok.all() else f"; sin recorte posible por encima de h_obj = {h[ok].max():.2f} m"
+        ctk.CTkLabel(win, font=self.font_body, text=(
+            f"Precio {pr:.2f} €/kWh. Ahorro máximo {np.nanmax(rec['ahorro_kW']):.2f} kW "
+            f"({np.nanmax(rec['ahorro_eur_h']):.3f} €/h){limite}.")).pack(anchor="w", padx=16, pady=(0, 10))
+
+    OBJETIVO_HORAS = "Horas de marcha al día"
+    OBJETIVO_VOLUMEN = "Volumen diario (m³)"
+
+    def ventana_programacion(self):
+        """Programa horario de un año con tarifa de tres periodos (o precios de un CSV) al menor coste."""
+        params = self._parse_and_get_params()
+        if not params: return
+        try:
+            pr = float(self.precio_var.get().replace(",", "."))
+            h_min = float(self.h8_var.get().replace(",", "."))
+        except ValueError:
+            pr, h_min = float(self.defaults["precio"]), float(self.defaults["h8"])
+        etiquetas, Q_m3h, P_kW, _ = opciones_funcionamiento(params, self.active_D, h_min, cadenas=self._cadenas(params[0]))
+        if not etiquetas:
+            messagebox.showinfo("Sin opciones", f"Ningún rodete ni velocidad alcanza h = {h_min:.2f} m en el chorro.")
+            return
+
+        win = ctk.CTkToplevel(self)
+        win.title("Programación horaria del bombeo")
+        win.geometry("900x720")
+        win.transient(self)
+        fila = ctk.CTkFrame(win); fila.pack(fill="x", padx=10, pady=(10, 4))
+        campos = {}
+        for clave, texto, valor in (("punta", "Punta €/kWh", f"{1.6*pr:.3f}"), ("llano", "Llano", f"{pr:.3f}"),
+                                    ("valle", "Valle", f"{0.6*pr:.3f}"), ("valor", "Objetivo", "10")):
+            ctk.CTkLabel(fila, text=texto, font=self.font_body).pack(side="left", padx=(6, 2))
+            campos[clave] = ctk.StringVar(value=valor)
+            ctk.CTkEntry(fila, textvariable=campos[clave], width=60, justify="right").pack(side="left", padx=(0, 6))
+        objetivo = ctk.StringVar(value=self.OBJETIVO_HORAS)
+        ctk.CTkOptionMenu(fila, variable=objetivo, values=[self.OBJETIVO_HORAS, self.OBJETIVO_VOLUMEN],
+                          width=190).pack(side="left", padx=6)
+        precios_csv = {"p": None}
+
+        def cargar_csv():
+            path = filedialog.askopenfilename(parent=win, filetypes=[("CSV", "*.csv"), ("Texto", "*.txt")])
+            if not path: return
+            try:
+                p = np.loadtxt(path, delimiter=",", ndmin=1).ravel()
+                if p.size % 24: raise ValueError(f"{p.size} precios: se esperaba un múltiplo de 24.")
+                precios_csv["p"] = p.reshape(-1, 24)
+                resumen.set(f"{precios_csv['p'].shape[0]} días de precios cargados de {path}")
+            except Exception as e:
+                messagebox.showerror("Error", str(e), parent=win)
+
+        fila2 = ctk.CTkFrame(win); fila2.pack(fill="x", padx=10, pady=(0, 4))
+        ctk.CTkButton(fila2, text="Cargar precios horarios (CSV)", command=cargar_csv,
+                      fg_color="#555555", hover_color="#333333").pack(side="left", padx=6)
+        resumen = ctk.StringVar(value=f"{len(etiquetas)} opciones con h_chorro ≥ {h_min:.2f} m: " + ", ".join(etiquetas))
+        ctk.CTkLabel(win, textvariable=resumen, font=self.font_body, justify="left",
+                     wraplength=860).pack(anchor="w", padx=16, pady=4)
+
+        fig = plt.Figure(figsize=(8.2, 5.4))
+        ejes = dict(ano=fig.add_subplot(211), dia=fig.add_subplot(212), barra=None)
+        ejes["precio"] = ejes["dia"].twinx()
+        fig.subplots_adjust(hspace=0.55)
+        canvas = FigureCanvasTkAgg(fig, master=win)
+        canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=(0, 10))
+        calculo = CalculoAsync(win, max_workers=1)
+        win.protocol("WM_DELETE_WINDOW", lambda: (calculo.cerrar(), win.destroy()))
+
+        def optimizar():
+            try:
+                tarifa = [float(campos[k].get().replace(",", ".")) for k in ("punta", "llano", "valle")]
+                valor = float(campos["valor"].get().replace(",", "."))
+                if valor <= 0 or min(tarifa) < 0: raise ValueError
+            except ValueError:
+                messagebox.showerror("Error", "Entrada no válida. Revisa las casillas.", parent=win)
+                return
+            if objetivo.get() == self.OBJETIVO_HORAS and (valor != int(valor) or valor > 24):
+                messagebox.showerror("Error", "Las horas de marcha al día deben ser un entero entre 1 y 24.", parent=win)
+                return
+            precios = precios_csv["p"] if precios_csv["p"] is not None else tarifa_tres_periodos(*tarifa)
+            snap = dict(precios=precios, objetivo=objetivo.get(), valor=valor, pr=pr,
+                        etiquetas=etiquetas, Q_m3h=Q_m3h, P_kW=P_kW)
+            resumen.set("Optimizando…")
+            calculo.enviar(self._resolver_programacion, snap,
+                           on_result=lambda r: self._mostrar_programacion(r, snap, ejes, canvas, resumen),
+                           on_error=lambda e: resumen.set(f"Error de cálculo: {e}"))
+        ctk.CTkButton(fila2, text="Optimizar año", width=120, command=optimizar).pack(side="left", padx=6)
+
+    def _resolver_programacion(self, snap):
+        """Programa óptimo con la tarifa y, como referencia, con el precio único (se ejecuta en el pool)."""
+        precios, etiquetas, Q_m3h, P_kW = snap["precios"], snap["etiquetas"], snap["Q_m3h"], snap["P_kW"]
+        if snap["objetivo"] == self.OBJETIVO_HORAS:
+            horas = int(snap["valor"])
+            resolver = lambda p: programar_horas(p, P_kW, horas, etiquetas)
+        else:
+            if snap["valor"] > 24 * Q_m3h.max():
+                raise ValueError(f"{snap['valor']:.0f} m³ no caben en 24 h (máximo {24*Q_m3h.max():.0f} m³).")
+            resolver = lambda p: programar_volumen(p, Q_m3h, P_kW, snap["valor"], etiquetas=etiquetas)
+        tarifa = resolver(precios)
+        plano = resolver(np.full(precios.shape, snap["pr"]))
+        # El programa del precio único pagado con la tarifa: lo que costaría no optimizar el horario
+        P_all = np.concatenate([[0.0], P_kW])
+        coste_sin_optimizar = float(np.sum(precios * P_all[plano.opcion]))
+        # Volumen real bombeado (con el objetivo de horas el programa cuenta horas, no m³)
+        Q_all = np.concatenate([[0.0], Q_m3h])
+        volumen = float(np.sum(Q_all[tarifa.opcion][tarifa.factible]))
+        return dict(tarifa=tarifa, plano=plano, coste_sin_optimizar=coste_sin_optimizar, volumen_m3=volumen)
+
+    def _mostrar_programacion(self, r, snap, ejes, canvas, resumen):
+        prog, plano = r["tarifa"], r["plano"]
+        precios = snap["precios"]
+        n_opt = len(prog.etiquetas)
+        ax_ano, ax_dia, ax_p = ejes["ano"], ejes["dia"], ejes["precio"]
+        ax_ano.cla()
+        im = ax_ano.imshow(prog.opcion.T, aspect="auto", origin="lower", interpolation="nearest",
+                           cmap=plt.get_cmap("viridis", n_opt), vmin=-0.5, vmax=n_opt - 0.5)
+        ax_ano.set_xlabel("Día"); ax_ano.set_ylabel("Hora")
+        ax_ano.set_title("Opción elegida en cada hora del año")
+        if ejes["barra"] is None:
+            ejes["barra"] = ax_ano.figure.colorbar(im, ax=ax_ano)
+        else:
+            ejes["barra"].update_normal(im)
+        ejes["barra"].set_ticks(range(n_opt), labels=prog.etiquetas, fontsize=7)
+
+        ax_dia.cla(); ax_p.cla()
+        h = np.arange(24)
+        Q_all = np.concatenate([[0.0], snap["Q_m3h"]])
+        ax_dia.bar(h, Q_all[prog.opcion[0]], color="tab:blue", alpha=0.7, label="Q (m³/h)")
+        ax_p.step(h, precios[0], where="mid", color="tab:red", label="Precio (€/kWh)")
+        ax_dia.set_xlabel("Hora (día 1)"); ax_dia.set_ylabel("Q (m³/h)"); ax_p.set_ylabel("€/kWh")
+        ax_dia.set_xticks(range(0, 24, 2))
+        l1, t1 = ax_dia.get_legend_handles_labels(); l2, t2 = ax_p.get_legend_handles_labels()
+        ax_dia.legend(l1 + l2, t1 + t2, loc="upper left", fontsize=8)
+        canvas.draw_idle()
+
+        a, b = prog.resumen(), plano.resumen()
+        ahorro = r["coste_sin_optimizar"] - a["coste"]
+        resumen.set(
+            f"{a['factibles']}/{a['dias']} días con programa. Tarifa optimizada: {a['coste']:.0f} € "
+            f"({a['energia_kWh']:.0f} kWh eléctricos, {a['energia_kWh']/max(r['volumen_m3'], 1e-9):.3f} kWh/m³, "
+            f"{a['precio_medio']:.3f} €/kWh medio).\n"
+            f"Mismo objetivo sin mirar la tarifa: {r['coste_sin_optimizar']:.0f} € (ahorro {ahorro:.0f} €); "
+            f"a precio único {snap['pr']:.3f} €/kWh: {b['coste']:.0f} €.")
+
+    def _cadenas(self, s_rel):
+        """(arranque directo, variador) con las tablas de rendimiento vigentes."""
+        return cadenas_fuente(s_rel, self.tabla_motor, self.variador)
+
+    def cargar_tablas_electricas(self):
+        """Tabla η(carga) del motor y mapa η(n/n0, par) del variador desde CSV (Cancelar mantiene la actual)."""
+        try:
+            self.tabla_motor, self.variador, _ = pedir_tablas_csv(self.tabla_motor, self.variador, self)
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self.calcular()
+
     def _volver_menu(self):
         """Cierra esta ventana (el menú ya está abierto de fondo)"""
+        self.calculo.cerrar()
         self.destroy()
 
 if __name__ == "__main__":
@@ -10,11 +10,17 @@ import numpy as np
 import customtkinter as ctk
 import tkinter as tk
 import tkinter.messagebox as messagebox
+import tkinter.filedialog as filedialog
+import tkinter.simpledialog as simpledialog
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
 import matplotlib.pyplot as plt
 from scipy.interpolate import CubicSpline
 
+from calculo_async import CalculoAsync
+from propiedades_fluido import AGUA
+from atmosfera import presion_isa, reducir_presion
+
 ctk.set_appearance_mode("light")
 ctk.set_default_color_theme("blue")
 
@@ -37,23 +43,17 @@ Q0 = 28.0
 hf0 = 0.2  # Valor documentado del problema
 K_HF = hf0 / (Q0**2)
 
-def hf_aspiracion(Q_Ls: float, anios: float) -> float:
-    return K_HF * (max(0.0, Q_Ls)**2) * (1.0 + 0.15*max(0.0, anios))
+def hf_aspiracion(Q_Ls: float | np.ndarray, anios: float | np.ndarray) -> float | np.ndarray:
+    return K_HF * (np.maximum(0.0, Q_Ls)**2) * (1.0 + 0.15*np.maximum(0.0, anios))
 
-# P_atm(z) en bar
+# P_atm(z) en bar: atmósfera estándar ISA (antes 10.33 - z/900 m.c.a., limitada a 3000 m)
 def patm_bar_from_z(z_m: float) -> float:
-    z = min(max(0.0, z_m), 3000.0)
-    patm_mca = 10.33 - z/900.0
-    return (patm_mca * gamma) / 1e5
-
-# Pv(T) por tabla
-T_TAB = np.array([0,10,20,30,40,50,60,70,80,90,100,120,140], dtype=float)
-PV_MMCA_TAB = np.array([63,125,238,432,752,1258,2032,3178,4829,7151,10330,20250,37046], dtype=float)
+    return presion_isa(z_m) / 1e5
 
+# Pv(T) del agua con Antoine, tabulada en propiedades_fluido (sustituye a la tabla de
+# 13 puntos del enunciado, de la que difiere menos de un 2 %)
 def pv_mca_from_T(T_c: float) -> float:
-    T = min(max(T_c, float(T_TAB.min())), float(T_TAB.max()))
-    pv_mm = np.interp(T, T_TAB, PV_MMCA_TAB)
-    return pv_mm / 1000.0
+    return AGUA.pv(T_c) / gamma
 
 def pv_bar_from_T(T_c: float) -> float:
     return (pv_mca_from_T(T_c) * gamma) / 1e5
@@ -71,6 +71,103 @@ def npsh_disp(Patm_bar: float, Pv_bar: float, Z_a: float, Z_D: float, Q_Ls: floa
     hf_asp_m = hf_aspiracion(Q_Ls, anios)
     return (Patm - Pv)/gamma + Z_a - Z_D - hf_asp_m
 
+def anios_hasta_cavitacion(Q_Ls, Patm_bar: float, Pv_bar: float, Z_a: float, Z_D: float,
+                           npsh_seg_m: float = 0.0):
+    """
+    Años de uso hasta que NPSH_disp cae a NPSH_req + NPSH_seg, vectorizado en Q.
+    hf_asp es lineal en los años, así que se despeja directamente:
+        años = [((P_atm - P_v)/γ + Z_a - Z_D - NPSH_req - NPSH_seg) / (K_HF·Q²) - 1] / 0.15
+    0 si ya no se cumple con la tubería nueva.
+    """
+    Q = np.asarray(Q_Ls, dtype=float)
+    margen = (Patm_bar - Pv_bar)*1e5/gamma + Z_a - Z_D - npsh_req(Q) - npsh_seg_m
+    return np.maximum(0.0, (margen / (K_HF * np.maximum(Q, 1e-9)**2) - 1.0) / 0.15)
+
+# Rango de caudales de la bomba (el de los deslizadores y la gráfica de la Fase 2)
+Q_MIN_LS, Q_MAX_LS = 10.0, 30.0
+
+def Z_D_curva(Q_Ls, NPSH_seg: float, anios: float, z_m: float, T_C: float):
+    """Z_D de instalación para cada Q (Fase 1 para todo el rango en una sola llamada)."""
+    Q = np.asarray(Q_Ls, dtype=float)
+    dZ = deltaZ_required(patm_bar_from_z(z_m), pv_bar_from_T(T_C), hf_aspiracion(Q, anios), npsh_req(Q), NPSH_seg)
+    return z_m + dZ
+
+def Q_max_sin_cavitacion(Z_D, T_C, z_m, anios, npsh_seg_m=0.0, Q_min=Q_MIN_LS, Q_lim=Q_MAX_LS,
+                         tol=1e-10, itmax=50):
+    """
+    Mayor Q (L/s) en [Q_min, Q_lim] con NPSH_disp ≥ NPSH_req + NPSH_seg; las condiciones
+    (Z_D, T, z, años) se combinan por broadcasting, así que se comprueban muchas a la vez.
+    Newton sobre g(Q) = (P_atm - P_v)/γ + z - Z_D - hf_asp(Q) - NPSH_req(Q) - NPSH_seg con la
+    derivada analítica del spline; g decrece con Q y cada paso se protege con el intervalo
+    que encierra la raíz (bisección si Newton saldría de él).
+    Devuelve Q_lim si todo el rango es seguro y NaN si ya no se cumple a Q_min.
+    """
+    Z_D, T, z, an = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (Z_D, T_C, z_m, anios)))
+    carga = (patm_bar_from_z(z) - pv_bar_from_T(T))*1e5/gamma + z - Z_D - npsh_seg_m
+    c = K_HF * (1.0 + 0.15*np.maximum(0.0, an))
+    g = lambda q: carga - c*q**2 - _npsh_req_spline(q)
+    dg = lambda q: -2.0*c*q - _npsh_req_spline(q, 1)
+
+    a = np.full(carga.shape, float(Q_min)); b = np.full(carga.shape, float(Q_lim))
+    ga, gb = g(a), g(b)
+    seguro = gb >= 0.0
+    cavita = ga < 0.0
+    x = np.where(seguro | cavita, a, a + ga / np.where(ga != gb, ga - gb, 1.0) * (b - a))
+    for _ in range(itmax):
+        gx = g(x)
+        pos = gx > 0.0
+        a = np.where(pos, x, a); b = np.where(pos, b, x)
+        if np.all((np.abs(gx) < tol) | seguro | cavita): break
+        xn = x - gx / dg(x)
+        x = np.where((xn >= a) & (xn <= b), xn, 0.5*(a + b))
+    return np.where(seguro, float(Q_lim), np.where(cavita, np.nan, x))
+
+def margen_npsh_serie(Q_Ls, Z_D, z_m, anios, p_Pa=None, T_C=20.0, z_medida_m=None, T_aire_C=None):
+    """
+    NPSH_disp - NPSH_req (m) para series de presión y temperatura del agua, en una sola pasada.
+    p_Pa:       presión barométrica medida (Pa) en z_medida_m (por defecto en la propia
+                instalación); None = atmósfera estándar en z_m.
+    T_aire_C:   temperatura del aire para trasladar la presión entre cotas (opcional).
+    Los argumentos se combinan por broadcasting (horas × sitios × caudales…).
+    """
+    if p_Pa is None:
+        patm = presion_isa(z_m)
+    else:
+        patm = reducir_presion(p_Pa, z_m if z_medida_m is None else z_medida_m, z_m, T_aire_C)
+    return (patm - AGUA.pv(T_C))/gamma + np.asarray(z_m) - Z_D - hf_aspiracion(Q_Ls, anios) - npsh_req(Q_Ls)
+
+def resolver_npsh(cfg: dict, phase: int, Z_D_fijo: float | None) -> dict:
+    """Cálculos de una fase a partir de una copia de la configuración (se ejecuta en el pool)."""
+    Q = cfg["Q_Ls"]; NPSH_seg = cfg["NPSH_seg"]; anios = cfg["anios"]
+    z = cfg["z_m"]; T = cfg["T_C"]
+
+    # Cálculos comunes
+    hf_m = float(hf_aspiracion(Q, anios))
+    Patm_bar = patm_bar_from_z(z)
+    Pv_bar = pv_bar_from_T(T)
+    H_req = float(npsh_req(Q))
+    dZ = deltaZ_required(Patm_bar, Pv_bar, hf_m, H_req, NPSH_seg)
+    r = dict(cfg=cfg, phase=phase, Z_D_fijo=Z_D_fijo, Q=Q, NPSH_seg=NPSH_seg, hf_m=hf_m,
+             Patm_bar=Patm_bar, Pv_bar=Pv_bar, H_req=H_req, dZ=dZ, Z_D_calculated=z + dZ)
+    r["Q_rango"] = np.linspace(Q_MIN_LS, Q_MAX_LS, 201)
+    r["Z_D_rango"] = Z_D_curva(r["Q_rango"], NPSH_seg, anios, z, T)
+
+    if phase == 2 and Z_D_fijo is not None:
+        # Curvas para todo el rango de Q (con condiciones actuales), en una sola pasada
+        Qplot = np.linspace(Q_MIN_LS, Q_MAX_LS, 350)
+        r["Qplot"] = Qplot
+        r["H_req_curve"] = npsh_req(Qplot)
+        r["H_disp_curve"] = npsh_disp(Patm_bar, Pv_bar, z, Z_D_fijo, Qplot, anios)
+        r["H_disp_sel"] = float(npsh_disp(Patm_bar, Pv_bar, z, Z_D_fijo, Q, anios))
+        # Envejecimiento: años hasta cavitar y hasta perder el margen de seguridad
+        r["anios_cav"] = anios_hasta_cavitacion(Qplot, Patm_bar, Pv_bar, z, Z_D_fijo)
+        r["anios_seg"] = anios_hasta_cavitacion(Qplot, Patm_bar, Pv_bar, z, Z_D_fijo, NPSH_seg)
+        r["anios_cav_sel"] = float(anios_hasta_cavitacion(Q, Patm_bar, Pv_bar, z, Z_D_fijo))
+        # Caudal máximo sin cavitar y sin perder el margen, con las condiciones actuales
+        r["Q_max"] = float(Q_max_sin_cavitacion(Z_D_fijo, T, z, anios))
+        r["Q_max_seg"] = float(Q_max_sin_cavitacion(Z_D_fijo, T, z, anios, NPSH_seg))
+    return r
+
 class App(ctk.CTk):
     def __init__(self):
         super().__init__()
@@ -93,6 +190,7 @@ class App(ctk.CTk):
         self.cfg = dict(self.defaults)
         self.Z_D_calculated = None
         self.Z_D_fijo = None  # Z_D congelado al entrar en Fase 2
+        self.calculo = CalculoAsync(self)  # Resolución fuera del hilo de Tk
         
         # Layout (mantener estructura original)
         self._build_layout()
@@ -192,6 +290,8 @@ class App(ctk.CTk):
         # Figura (aspecto 2:1 - más ancho que alto)
         self.fig = Figure(figsize=(12, 6), dpi=100)
         self.ax = self.fig.add_subplot(111)
+        self.ax_anios = self.ax.twinx()  # años hasta cavitar (solo en Fase 2)
+        self.ax_anios.set_visible(False)
         self.canvas = FigureCanvasTkAgg(self.fig, master=center)
         self.canvas.get_tk_widget().grid(row=1, column=0, sticky="nsew")
         
@@ -248,7 +348,7 @@ class App(ctk.CTk):
         add_slider("anios", "Tiempo de uso", self.cfg["anios"], 0, 20, 0.1, "años")
         add_label("hf_label", "hf (aspiración) = k·Q²·(1+0.15·años) → — m")
         
-        add_slider("z_m", "Altura de la instalación z", self.cfg["z_m"], 0, 3000, 5, "m")
+        add_slider("z_m", "Altura de la instalación z", self.cfg["z_m"], 0, 4500, 5, "m")
         add_label("patm_label", "P_atm(z): — m.c.a.")
         
         add_slider("T_C", "Temperatura del agua", self.cfg["T_C"], 0, 100, 1, "°C")
@@ -264,6 +364,9 @@ class App(ctk.CTk):
                                        font=ctk.CTkFont(size=14, weight="bold"),
                                        height=40)
         self.btn_phase.grid(row=0, column=0, sticky="ew")
+        ctk.CTkButton(btn_row, text="Margen NPSH con serie meteorológica (CSV)",
+                      command=self._ventana_serie_meteo, fg_color="#555555", hover_color="#333333"
+                      ).grid(row=1, column=0, sticky="ew", pady=(6,0))
     
     def _build_badge(self, parent):
         """Badge lateral rediseñado con valores fijos y dinámicos"""
@@ -311,6 +414,10 @@ class App(ctk.CTk):
         self.lbl_margen = ctk.CTkLabel(dynamic_frame, text="Margen: — m",
                                       font=ctk.CTkFont(size=18, weight="bold"))
         self.lbl_margen.pack(pady=(5,10))
+
+        self.lbl_qmax = ctk.CTkLabel(dynamic_frame, text="Q máx sin cavitar = — L/s",
+                                     font=ctk.CTkFont(size=13))
+        self.lbl_qmax.pack(pady=(0,10))
     
     def _on_slider(self, key, val, unit):
         if key in self.controls:
@@ -361,18 +468,14 @@ class App(ctk.CTk):
         self._recompute()
     
     def _recompute(self):
-        """Recalcula y redibuja según la fase actual"""
-        Q = self.cfg["Q_Ls"]
-        NPSH_seg = self.cfg["NPSH_seg"]
-        anios = self.cfg["anios"]
-        z = self.cfg["z_m"]
-        T = self.cfg["T_C"]
-        
-        # Cálculos comunes
-        hf_m = hf_aspiracion(Q, anios)
-        Patm_bar = patm_bar_from_z(z)
-        Pv_bar = pv_bar_from_T(T)
-        H_req = float(npsh_req(Q))
+        """Envía el recálculo al pool; el redibujado se hace al recibir el resultado"""
+        self.calculo.enviar(resolver_npsh, dict(self.cfg), self.phase, self.Z_D_fijo,
+                            on_result=self._render)
+
+    def _render(self, r):
+        """Actualiza labels, badge y gráfica con un resultado de resolver_npsh (hilo de Tk)"""
+        Q, NPSH_seg, hf_m, dZ = r["Q"], r["NPSH_seg"], r["hf_m"], r["dZ"]
+        Patm_bar, Pv_bar, H_req = r["Patm_bar"], r["Pv_bar"], r["H_req"]
         
         # Actualizar labels informativos
         if "hf_label" in self.controls:
@@ -384,9 +487,8 @@ class App(ctk.CTk):
         if "pv_label" in self.controls:
             self.controls["pv_label"]["label"].configure(text=f"    P_v(T): {pv_mca*1000:.0f} mm.c.a. ({pv_mca:.3f} m.c.a.)")
         
-        # Calcular Z_D
-        dZ = deltaZ_required(Patm_bar, Pv_bar, hf_m, H_req, NPSH_seg)
-        self.Z_D_calculated = z + dZ
+        # Z_D calculado
+        self.Z_D_calculated = r["Z_D_calculated"]
         
         # Actualizar badge - usar Z_D congelado en Fase 2
         if self.phase == 2 and self.Z_D_fijo is not None:
@@ -406,17 +508,22 @@ class App(ctk.CTk):
             self.lbl_npsh_disp.configure(text="NPSH disp = — m")
             self.lbl_npsh_req.configure(text="NPSH req = — m")
             self.lbl_margen.configure(text="Margen: — m", text_color="gray")
+            self.lbl_qmax.configure(text="Q máx sin cavitar = — L/s")
         
         # Dibujar según fase
-        if self.phase == 1:
-            self._plot_phase_1(Q, hf_m, Patm_bar, Pv_bar, H_req, NPSH_seg, dZ)
+        if self.phase == 2 and "Qplot" in r:
+            self._plot_phase_2(r)
         else:
-            self._plot_phase_2(Q, hf_m, Patm_bar, Pv_bar, H_req, NPSH_seg, dZ)
+            self._plot_phase_1(Q, hf_m, Patm_bar, Pv_bar, H_req, NPSH_seg, dZ, (r["Q_rango"], r["Z_D_rango"]))
     
-    def _plot_phase_1(self, Q, hf_m, Patm_bar, Pv_bar, H_req, NPSH_seg, dZ):
+    def _plot_phase_1(self, Q, hf_m, Patm_bar, Pv_bar, H_req, NPSH_seg, dZ, curva_ZD=None):
         """Fase 1: Renderizado simplificado y robusto"""
+        if getattr(self, "_ax_zd", None) is not None:
+            self._ax_zd.remove()
+            self._ax_zd = None
         self.ax.cla()
         self.ax.axis('off')
+        self.ax_anios.set_visible(False)
         
         # 1. Título
         self.ax.text(0.5, 0.95, r"FASE 1: DISEÑO - Cálculo de $Z_D$", 
@@ -459,25 +566,28 @@ class App(ctk.CTk):
                     ha='center', va='center', fontsize=18, color="#2E7D32",
                     bbox=dict(boxstyle="round,pad=1.0", fc=bg_color, ec="#4CAF50", lw=2))
 
+        # 5. Z_D para todo el rango de Q con las mismas condiciones
+        if curva_ZD is not None:
+            Qr, ZDr = curva_ZD
+            ax_zd = self._ax_zd = self.ax.inset_axes([0.80, 0.03, 0.20, 0.28])
+            ax_zd.plot(Qr, ZDr, color="#2E7D32", linewidth=1.8)
+            ax_zd.plot([Q], [self.Z_D_calculated], "o", color="#2E7D32", markersize=5)
+            ax_zd.set_title(r"$Z_D(Q)$ en todo el rango", fontsize=9)
+            ax_zd.set_xlabel("Q (L/s)", fontsize=8); ax_zd.set_ylabel("Z_D (m)", fontsize=8)
+            ax_zd.tick_params(labelsize=7)
+            ax_zd.grid(True, alpha=0.3)
+
         self.canvas.draw_idle()
     
-    def _plot_phase_2(self, Q_sel, hf_m, Patm_bar, Pv_bar, H_req, NPSH_seg, dZ):
+    def _plot_phase_2(self, r):
         """Fase 2: Verificación operacional con Z_D fijo (bomba ya instalada)"""
         # Usar Z_D CONGELADO (capturado al entrar en Fase 2)
-        Z_D_fijo = self.Z_D_fijo
+        Z_D_fijo = r["Z_D_fijo"]
+        Q_sel, H_req, NPSH_seg, dZ = r["Q"], r["H_req"], r["NPSH_seg"], r["dZ"]
         
-        # Las condiciones operacionales pueden cambiar
-        Z_a = self.cfg["z_m"]
-        anios = self.cfg["anios"]
-        T = self.cfg["T_C"]
-        
-        # Recalcular P_atm y P_v con condiciones actuales
-        Patm_bar_actual = patm_bar_from_z(Z_a)
-        Pv_bar_actual = pv_bar_from_T(T)
-        
-        # Calcular NPSH_disp en el punto seleccionado CON Z_D FIJO
-        H_disp_sel = npsh_disp(Patm_bar_actual, Pv_bar_actual, Z_a, Z_D_fijo, Q_sel, anios)
-        H_req_sel = float(npsh_req(Q_sel))
+        # NPSH_disp en el punto seleccionado CON Z_D FIJO (condiciones actuales)
+        H_disp_sel = r["H_disp_sel"]
+        H_req_sel = H_req
         NPSH_seg_real = H_disp_sel - H_req_sel  # Margen real disponible
         
         # CAVITACIÓN: ocurre cuando NPSH_disp < NPSH_req
@@ -487,9 +597,7 @@ class App(ctk.CTk):
         margen_insuficiente = NPSH_seg_real < NPSH_seg and not cavita
         
         # Curvas para todo el rango de Q (con condiciones actuales)
-        Qplot = np.linspace(10, 30, 350)
-        H_req_curve = npsh_req(Qplot)
-        H_disp_curve = np.array([npsh_disp(Patm_bar_actual, Pv_bar_actual, Z_a, Z_D_fijo, q, anios) for q in Qplot])
+        Qplot, H_req_curve, H_disp_curve = r["Qplot"], r["H_req_curve"], r["H_disp_curve"]
         
         self.ax.cla()
         
@@ -564,7 +672,27 @@ class App(ctk.CTk):
                         ha="center", va="center", # alpha=0.85 ya no es necesario en el texto si el fondo es alpha
                         bbox=dict(boxstyle="round,pad=0.8", facecolor="#FFCDD2", edgecolor="red", linewidth=2, alpha=0.7))
         
-        self.ax.legend(loc="upper right", fontsize=9)
+        # Caudal máximo sin cavitar / sin perder el margen con las condiciones actuales
+        for q_lim, estilo, texto in ((r["Q_max"], "-", r"$Q_{máx}$"), (r["Q_max_seg"], ":", r"$Q_{máx,seg}$")):
+            if np.isfinite(q_lim) and q_lim < Qplot[-1]:
+                self.ax.axvline(q_lim, color="#C62828", linestyle=estilo, linewidth=1.2, alpha=0.8)
+                self.ax.text(q_lim, 0.2, texto, color="#C62828", fontsize=9, ha="right", va="bottom", rotation=90)
+
+        # Años hasta la cavitación frente a Q (eje derecho) con el Z_D fijo y las condiciones actuales
+        ax_a = self.ax_anios
+        ax_a.cla(); ax_a.set_visible(True)
+        ax_a.yaxis.tick_right(); ax_a.yaxis.set_label_position("right")  # cla() los devuelve a la izquierda
+        ax_a.plot(Qplot, r["anios_cav"], color="#8E24AA", linewidth=1.8, label="Años hasta cavitar")
+        ax_a.plot(Qplot, r["anios_seg"], color="#8E24AA", linewidth=1.2, linestyle=":",
+                  label=rf"Años hasta $NPSH_{{req}} + NPSH_{{seg}}$")
+        ax_a.axhline(self.cfg["anios"], color="#8E24AA", linewidth=0.8, alpha=0.5)
+        ax_a.set_ylim(0, 40)
+        ax_a.set_ylabel("Años de uso", color="#8E24AA")
+        ax_a.tick_params(axis="y", colors="#8E24AA")
+        ax_a.text(0.01, 0.02, f"Cavita a Q = {Q_sel:.1f} L/s con {r['anios_cav_sel']:.1f} años de uso",
+                  transform=self.ax.transAxes, fontsize=9, color="#8E24AA", ha="left", va="bottom")
+        l1, t1 = self.ax.get_legend_handles_labels(); l2, t2 = ax_a.get_legend_handles_labels()
+        self.ax.legend(l1 + l2, t1 + t2, loc="upper right", fontsize=9)
         self.canvas.draw_idle()
         
         # Actualizar badge - Sección FIJA (solo en Fase 1 o al entrar en Fase 2)
@@ -581,6 +709,14 @@ class App(ctk.CTk):
         # El margen es NPSH_disp - NPSH_req (diferencia real)
         margen_real = H_disp_sel - H_req_sel
         
+        if np.isnan(r["Q_max"]):
+            txt_qmax = f"Cavita ya a {Qplot[0]:.0f} L/s"
+        elif r["Q_max"] >= Qplot[-1]:
+            txt_qmax = f"Sin cavitación hasta {Qplot[-1]:.0f} L/s"
+        else:
+            txt_qmax = f"Q máx sin cavitar = {r['Q_max']:.2f} L/s"
+        self.lbl_qmax.configure(text=txt_qmax)
+
         if cavita:
             self.lbl_margen.configure(text=f"⚠ Déficit: {abs(margen_real):.3f} m",
                                      text_color="red")
@@ -591,8 +727,61 @@ class App(ctk.CTk):
             self.lbl_margen.configure(text=f"✓ Margen: {margen_real:.3f} m",
                                      text_color="green")
     
+    def _ventana_serie_meteo(self):
+        """
+        Margen NPSH hora a hora con una serie barométrica medida (CSV: p en hPa y, opcionalmente,
+        T del agua y T del aire en °C), con el Z_D instalado y el Q y los años actuales.
+        """
+        if self.phase != 2 or self.Z_D_fijo is None:
+            messagebox.showinfo("Serie meteorológica", "Instala la bomba (Fase 2) para fijar Z_D antes de comprobar la serie.")
+            return
+        path = filedialog.askopenfilename(parent=self, title="Serie barométrica (p_hPa[, T_agua][, T_aire])",
+                                          filetypes=[("CSV", "*.csv"), ("Texto", "*.txt")])
+        if not path: return
+        try:
+            datos = np.genfromtxt(path, delimiter=",", ndmin=2)
+            datos = datos[~np.isnan(datos[:, 0])]          # cabecera y filas vacías
+            if datos.size == 0: raise ValueError("El fichero no tiene datos numéricos.")
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+            return
+        cfg = dict(self.cfg)
+        p = datos[:, 0] * 100.0
+        T_agua = datos[:, 1] if datos.shape[1] > 1 else cfg["T_C"]
+        T_aire = datos[:, 2] if datos.shape[1] > 2 else None
+        z_est = simpledialog.askfloat("Cota de la estación", "Cota del barómetro (m):",
+                                      initialvalue=cfg["z_m"], parent=self)
+        if z_est is None: return
+        margen = margen_npsh_serie(cfg["Q_Ls"], self.Z_D_fijo, cfg["z_m"], cfg["anios"], p, T_agua, z_est, T_aire)
+
+        win = ctk.CTkToplevel(self)
+        win.title("Margen NPSH con la serie meteorológica")
+        win.geometry("900x520")
+        win.transient(self)
+        fig = Figure(figsize=(8.6, 4.4), dpi=100)
+        ax = fig.add_subplot(111)
+        h = np.arange(margen.size)
+        ax.plot(h, margen, color="#1976D2", linewidth=0.8)
+        ax.axhline(0.0, color="red", linewidth=1)
+        ax.axhline(cfg["NPSH_seg"], color="orange", linestyle=":", linewidth=1.2)
+        ax.fill_between(h, margen, 0.0, where=margen < 0.0, color="red", alpha=0.3, label="Cavitación")
+        ax.fill_between(h, margen, 0.0, where=(margen >= 0.0) & (margen < cfg["NPSH_seg"]),
+                        color="orange", alpha=0.25, label="Margen < NPSH_seg")
+        ax.set_xlabel("Hora de la serie"); ax.set_ylabel(r"$NPSH_{disp} - NPSH_{req}$ (m)")
+        ax.set_title(rf"Q = {cfg['Q_Ls']:.1f} L/s, $Z_D$ = {self.Z_D_fijo:.3f} m, {cfg['anios']:.1f} años")
+        ax.grid(True, alpha=0.3)
+        ax.legend(loc="upper right", fontsize=9)
+        canvas = FigureCanvasTkAgg(fig, master=win)
+        canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=(10, 4))
+        ctk.CTkLabel(win, text=(
+            f"{margen.size} horas: {int(np.sum(margen < 0))} con cavitación, "
+            f"{int(np.sum((margen >= 0) & (margen < cfg['NPSH_seg'])))} sin el margen de seguridad. "
+            f"Margen mínimo {margen.min():.3f} m, medio {margen.mean():.3f} m."),
+            font=ctk.CTkFont(size=13)).pack(anchor="w", padx=16, pady=(0, 10))
+
     def _volver_menu(self):
         """Cierra esta ventana (el menú ya está abierto de fondo)"""
+        self.calculo.cerrar()
         self.destroy()
 
 def main():
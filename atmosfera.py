@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+Presión atmosférica para el NPSH: atmósfera estándar (ISA) y series barométricas medidas.
+
+- presion_isa(z):   ISA de la OACI, troposfera con gradiente de -6.5 K/km hasta 11 km
+                    y estratosfera isoterma hasta 20 km.
+- presion_qnh(z, QNH): la presión reducida al nivel del mar que publican los partes
+                    meteorológicos se devuelve a la cota de la instalación con el perfil ISA.
+- reducir_presion(p, z_medida, z, T): traslada una presión medida en otra cota
+                    (estación meteorológica) con la fórmula hipsométrica y la temperatura del aire.
+Todo admite arrays y se combina por broadcasting: una serie horaria (n_t, 1) frente a
+varias cotas (n_sitios,) da directamente la matriz (n_t, n_sitios).
+"""
+
+import numpy as np
+
+P0 = 101325.0       # Pa, nivel del mar
+T0 = 288.15         # K
+L_TROPO = 0.0065    # K/m
+Z_TROPO = 11000.0   # m
+Z_MAX = 20000.0     # m
+G = 9.80665
+R_AIRE = 287.053    # J/(kg·K)
+EXP_ISA = G / (R_AIRE * L_TROPO)                                    # ≈ 5.2559
+T_TROPO = T0 - L_TROPO * Z_TROPO
+P_TROPO = P0 * (T_TROPO / T0)**EXP_ISA
+
+
+def presion_isa(z_m):
+    """Presión ISA (Pa) a la cota z (m), entre el nivel del mar y 20 km."""
+    z = np.clip(np.asarray(z_m, dtype=float), 0.0, Z_MAX)
+    tropo = P0 * (1.0 - L_TROPO * np.minimum(z, Z_TROPO) / T0)**EXP_ISA
+    return np.where(z <= Z_TROPO, tropo, P_TROPO * np.exp(-G * (z - Z_TROPO) / (R_AIRE * T_TROPO)))
+
+
+def presion_qnh(z_m, qnh_hPa):
+    """Presión a la cota z (Pa) a partir del QNH (hPa) del parte meteorológico."""
+    return presion_isa(z_m) * (np.asarray(qnh_hPa, dtype=float) * 100.0 / P0)
+
+
+def reducir_presion(p_Pa, z_medida_m, z_m, T_aire_C=None):
+    """
+    Presión (Pa) en la cota z a partir de la medida p_Pa en z_medida. Fórmula hipsométrica
+    con la temperatura media de la capa: la del aire medida (°C) o, si no se da, la ISA.
+    """
+    p = np.asarray(p_Pa, dtype=float)
+    z0 = np.asarray(z_medida_m, dtype=float); z = np.asarray(z_m, dtype=float)
+    if T_aire_C is None:
+        T_media = T0 - L_TROPO * 0.5 * (z0 + z)
+    else:
+        T_media = np.asarray(T_aire_C, dtype=float) + 273.15 - L_TROPO * 0.5 * (z - z0)
+    return p * np.exp(-G * (z - z0) / (R_AIRE * T_media))
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Capa de cálculo fuera del hilo de Tk.
+La GUI envía una copia de los parámetros (snapshot); el cálculo se ejecuta en
+un pool de hilos (o de procesos) y el resultado vuelve al bucle de eventos de
+Tk mediante after(). Si llega una entrada nueva antes de terminar, los trabajos
+anteriores se cancelan (si aún no habían empezado) o su resultado se descarta.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import tkinter as tk
+
+class CalculoAsync:
+    """
+    widget:       cualquier widget Tk (se usa su after() para recoger resultados).
+    procesos:     True -> ProcessPoolExecutor (la función y el snapshot deben ser
+                  serializables: funciones de módulo, no métodos de la App).
+    intervalo_ms: periodo de sondeo; por debajo de un fotograma (~16 ms).
+    """
+    def __init__(self, widget, max_workers=2, procesos=False, intervalo_ms=10):
+        self.widget = widget
+        self.intervalo_ms = intervalo_ms
+        pool_cls = ProcessPoolExecutor if procesos else ThreadPoolExecutor
+        self._pool = pool_cls(max_workers=max_workers)
+        self._generacion = 0
+        self._trabajos = []      # (generacion, future, on_result, on_error)
+        self._sondeo = None
+
+    def enviar(self, funcion, *args, on_result, on_error=None):
+        """Lanza funcion(*args) en el pool; on_result(resultado) se llama en el hilo de Tk."""
+        self._generacion += 1
+        for _, fut, _, _ in self._trabajos:
+            fut.cancel()  # solo afecta a los que aún no han empezado
+        fut = self._pool.submit(funcion, *args)
+        self._trabajos = [t for t in self._trabajos if not t[1].cancelled()]
+        self._trabajos.append((self._generacion, fut, on_result, on_error))
+        if self._sondeo is None:
+            self._sondeo = self.widget.after(self.intervalo_ms, self._recoger)
+        return self._generacion
+
+    @property
+    def ocupado(self):
+        return any(not fut.done() for _, fut, _, _ in self._trabajos)
+
+    def _recoger(self):
+        self._sondeo = None
+        pendientes = [t for t in self._trabajos if not t[1].done()]
+        listos = [t for t in self._trabajos if t[1].done()]
+        self._trabajos = pendientes
+        if pendientes:
+            try:
+                self._sondeo = self.widget.after(self.intervalo_ms, self._recoger)
+            except tk.TclError:
+                return  # ventana cerrada
+        for gen, fut, on_result, on_error in listos:
+            if gen != self._generacion or fut.cancelled():
+                continue  # resultado obsoleto: llegó una entrada más reciente
+            exc = fut.exception()
+            if exc is not None:
+                if on_error is not None:
+                    on_error(exc)
+            else:
+                on_result(fut.result())
+
+    def cerrar(self):
+        """Descarta lo pendiente y libera el pool (llamar al cerrar la ventana)."""
+        self._generacion += 1
+        for _, fut, _, _ in self._trabajos:
+            fut.cancel()
+        self._trabajos = []
+        self._pool.shutdown(wait=False, cancel_futures=True)
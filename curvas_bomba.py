@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Curvas de la bomba ajustadas a la tabla del fabricante, con derivada y primitiva.
+
+La interpolación lineal de los puntos tabulados da curvas con picos en cada
+punto y obliga a resolver el punto de funcionamiento por bisección. Aquí cada
+curva y(Q) puede representarse como:
+- la propia tabla (lineal a tramos; es la referencia),
+- un polinomio de mínimos cuadrados (dominio escalado, bien condicionado),
+- un spline monótono PCHIP (pasa por los puntos, sin oscilaciones entre ellos).
+Todas se evalúan vectorizadas (valor, derivada e integral), de modo que el
+punto de funcionamiento puede resolverse por Newton y las energías integrarse
+sin muestrear. Los ajustes se guardan en una caché acotada (LRU) por tabla y
+representación, segura entre los hilos del pool de cálculo.
+"""
+
+from functools import lru_cache
+import numpy as np
+from numpy.polynomial import Polynomial
+from scipy.interpolate import PchipInterpolator
+
+CURVA_TABLA = "Tabla (lineal)"
+CURVA_POLINOMIO = "Polinomio (mínimos cuadrados)"
+CURVA_SPLINE = "Spline monótono (PCHIP)"
+CURVAS_BOMBA = [CURVA_TABLA, CURVA_POLINOMIO, CURVA_SPLINE]
+
+# Grado 3 mantiene H(Q) monótona con la tabla de Problema 1; con 4 ya aparece una joroba
+GRADO_H = 3
+GRADO_ETA = 4
+
+
+class CurvaAjustada:
+    """
+    y(Q) en una de las representaciones de CURVAS_BOMBA, definida en [Q0, Qmax].
+    Fuera del intervalo el valor se mantiene constante (como la interpolación de la tabla).
+    """
+    def __init__(self, x, y, modelo=CURVA_TABLA, grado=GRADO_H):
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.modelo = modelo
+        self.grado = grado
+        if modelo == CURVA_TABLA:
+            dx = np.diff(self.x)
+            self._pend = np.diff(self.y) / dx
+            self._acum = np.concatenate([[0.0], np.cumsum(0.5 * (self.y[1:] + self.y[:-1]) * dx)])
+        elif modelo == CURVA_POLINOMIO:
+            self._f = Polynomial.fit(self.x, self.y, grado)
+            self._df = self._f.deriv()
+            F = self._f.integ()
+            self._F = lambda q: F(q) - F(self.x[0])
+        elif modelo == CURVA_SPLINE:
+            self._f = PchipInterpolator(self.x, self.y, extrapolate=False)
+            self._df = self._f.derivative()
+            self._F = self._f.antiderivative()
+        else:
+            raise ValueError(f"Representación de curva desconocida: {modelo}")
+
+        # Calidad del ajuste frente a la tabla
+        err = self(self.x) - self.y
+        ss = np.sum((self.y - self.y.mean())**2)
+        self.rms = float(np.sqrt(np.mean(err**2)))
+        self.error_max = float(np.max(np.abs(err)))
+        self.r2 = float(1.0 - np.sum(err**2) / ss) if ss > 0 else 1.0
+
+    def _tramo(self, xc):
+        return np.clip(np.searchsorted(self.x, xc, side="right") - 1, 0, self.x.size - 2)
+
+    def __call__(self, q):
+        xc = np.clip(np.asarray(q, dtype=float), self.x[0], self.x[-1])
+        if self.modelo == CURVA_TABLA:
+            return np.interp(xc, self.x, self.y)
+        return self._f(xc)
+
+    def derivada(self, q):
+        """dy/dQ; nula fuera del intervalo tabulado (valor constante)."""
+        q = np.asarray(q, dtype=float)
+        xc = np.clip(q, self.x[0], self.x[-1])
+        if self.modelo == CURVA_TABLA:
+            d = self._pend[self._tramo(xc)]
+        else:
+            d = self._df(xc)
+        return np.where((q < self.x[0]) | (q > self.x[-1]), 0.0, d)
+
+    def primitiva(self, q):
+        """∫ y dQ desde Q0 hasta q (prolongada con el valor constante fuera del intervalo)."""
+        q = np.asarray(q, dtype=float)
+        xc = np.clip(q, self.x[0], self.x[-1])
+        if self.modelo == CURVA_TABLA:
+            i = self._tramo(xc)
+            u = xc - self.x[i]
+            F = self._acum[i] + self.y[i]*u + 0.5*self._pend[i]*u**2
+        else:
+            F = self._F(xc)
+        return F + self(q) * (q - xc)
+
+    def integral(self, a, b):
+        return self.primitiva(b) - self.primitiva(a)
+
+
+class CurvaBomba:
+    """Curvas H(Q) y η(Q) de la bomba (Q en l/s, H en m, η en tanto por uno)."""
+    def __init__(self, Q_lps, H_m, eta_pct, modelo=CURVA_TABLA, grado_H=GRADO_H, grado_eta=GRADO_ETA):
+        self.modelo = modelo
+        self.curva_H = CurvaAjustada(Q_lps, H_m, modelo, grado_H)
+        self.curva_eta = CurvaAjustada(Q_lps, eta_pct, modelo, grado_eta)
+
+    @property
+    def tabulada(self):
+        return self.modelo == CURVA_TABLA
+
+    def H(self, q):
+        return self.curva_H(q)
+
+    def dH(self, q):
+        return self.curva_H.derivada(q)
+
+    def eta(self, q):
+        return np.clip(self.curva_eta(q) / 100.0, 0.0, 1.0)
+
+    def deta(self, q):
+        return self.curva_eta.derivada(q) / 100.0
+
+    def informe(self):
+        """Calidad del ajuste frente a la tabla (errores en m y en puntos de %)."""
+        return dict(modelo=self.modelo,
+                    H=dict(rms=self.curva_H.rms, max=self.curva_H.error_max, r2=self.curva_H.r2),
+                    eta=dict(rms=self.curva_eta.rms, max=self.curva_eta.error_max, r2=self.curva_eta.r2))
+
+    def resumen(self):
+        if self.tabulada:
+            return f"{self.modelo}"
+        grados = f" (grados {self.curva_H.grado}/{self.curva_eta.grado})" if self.modelo == CURVA_POLINOMIO else ""
+        return (f"{self.modelo}{grados}: error RMS H = {self.curva_H.rms:.2f} m "
+                f"(máx. {self.curva_H.error_max:.2f}), η = {self.curva_eta.rms:.2f} % (máx. {self.curva_eta.error_max:.2f})")
+
+
+# Cada ν distinto da otra tabla corregida: la caché guarda solo las más recientes
+TAMANO_CACHE = 64
+
+@lru_cache(maxsize=TAMANO_CACHE)
+def _curva_en_cache(modelo, grado_H, grado_eta, Q_b, H_b, eta_b):
+    Q, H, eta = (np.frombuffer(b, dtype=float) for b in (Q_b, H_b, eta_b))
+    return CurvaBomba(Q, H, eta, modelo, grado_H, grado_eta)
+
+def curva_bomba(Q_lps, H_m, eta_pct, modelo=CURVA_TABLA, grado_H=GRADO_H, grado_eta=GRADO_ETA):
+    """CurvaBomba en caché: el ajuste solo se calcula la primera vez para cada tabla y representación."""
+    tablas = tuple(np.asarray(v, dtype=float).tobytes() for v in (Q_lps, H_m, eta_pct))
+    return _curva_en_cache(modelo, grado_H, grado_eta, *tablas)
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""
+Diálogos de la GUI para cargar las tablas de rendimiento eléctrico (motor y
+variador) desde CSV. Van aparte de rendimiento_electrico para que el cálculo
+no dependa de Tk y pueda usarse sin pantalla o en lotes.
+"""
+
+from tkinter import filedialog
+
+from rendimiento_electrico import Motor, Variador
+
+
+def pedir_tablas_csv(tabla_motor, variador, parent=None):
+    """
+    Diálogos para cargar la tabla η(carga) del motor y el mapa η(n/n0, par) del variador.
+    Cancelar un diálogo mantiene la tabla actual. Retorna (tabla_motor, variador,
+    variador_cargado); los errores de lectura se propagan.
+    """
+    tipos = [("CSV", "*.csv"), ("Texto", "*.txt")]
+    path = filedialog.askopenfilename(parent=parent, title="η del motor frente a la carga (CSV: carga, η)",
+                                      filetypes=tipos)
+    if path:
+        m = Motor.desde_csv(path, 1.0)
+        tabla_motor = (m.carga, m.eta_tab)
+    path = filedialog.askopenfilename(parent=parent, filetypes=tipos,
+                                      title="Mapa η del variador (CSV: pares en la 1ª fila, n/n0 en la 1ª columna)")
+    if path:
+        variador = Variador.desde_csv(path)
+    return tabla_motor, variador, bool(path)
@@ -0,0 +1,359 @@
+# -*- coding: utf-8 -*-
+"""
+Lectura de modelos EPANET (.inp) para la resolución de redes (red_hidraulica).
+El fichero se recorre línea a línea (sin cargarlo entero) y cada sección se
+acumula en columnas que al final se convierten en arrays NumPy, de modo que
+un modelo de 10⁵ elementos queda en unos pocos arrays en vez de en 10⁵ objetos.
+
+Secciones: [JUNCTIONS], [RESERVOIRS], [TANKS], [PIPES], [PUMPS], [CURVES],
+[VALVES], [PATTERNS], [DEMANDS], [STATUS] y [OPTIONS] (Units, Headloss, Pattern,
+Specific Gravity, Viscosity). Todo se convierte a SI: m, l/s y m.c.l.
+Las secciones que afectan al cálculo y no se leen ([CONTROLS], [RULES],
+[EMITTERS]...) se anotan en 'avisos'.
+
+Correspondencia con el modelo del programa:
+- Bombas: la curva HEAD se tabula en (Q l/s, H m), como Qb_ls/Hb_m; las curvas
+  de 1 y 3 puntos se expanden con las mismas fórmulas que usa EPANET.
+- Válvulas: TCV -> Kv equivalente a su coeficiente de pérdidas; las válvulas de
+  control (PRV, PSV, PBV, FCV, GPV) no tienen equivalente Kv y se cargan abiertas
+  con sus pérdidas menores (se anota en 'avisos').
+- Depósitos de nivel variable (TANKS): altura fija = cota + nivel inicial.
+- [DEMANDS]: las categorías de demanda de un nudo sustituyen a la demanda de
+  [JUNCTIONS] (como en EPANET), cada una con su patrón.
+- [STATUS]: OPEN/CLOSED en tuberías, bombas y válvulas; un número es la velocidad
+  relativa de una bomba o la consigna K de una TCV.
+"""
+
+import numpy as np
+
+from red_hidraulica import RedHidraulica, HW, DW
+
+# Caudal de cada unidad EPANET en l/s
+UNIDADES_CAUDAL = {
+    "CFS": 28.316846592, "GPM": 0.0630901964, "MGD": 43.8126364, "IMGD": 52.6168042,
+    "AFD": 14.2764102, "LPS": 1.0, "LPM": 1.0/60.0, "MLD": 1e6/86400.0,
+    "CMH": 1.0/3.6, "CMD": 1.0/86.4, "CMS": 1000.0,
+}
+UNIDADES_US = {"CFS", "GPM", "MGD", "IMGD", "AFD"}
+PIE = 0.3048
+PULGADA = 0.0254
+
+NUDO_CONSUMO, NUDO_EMBALSE, NUDO_DEPOSITO = 0, 1, 2
+VALVULAS_CONTROL = ("PRV", "PSV", "PBV", "FCV", "GPV")
+
+# Secciones que no cambian el análisis estático (se ignoran sin aviso)
+SECCIONES_SIN_EFECTO = {"TITLE", "COORDINATES", "VERTICES", "LABELS", "TAGS", "BACKDROP", "REPORT",
+                        "TIMES", "ENERGY", "QUALITY", "REACTIONS", "SOURCES", "MIXING", "END"}
+
+# Columnas (y valores por defecto de las opcionales) de cada sección tabular
+_COLUMNAS = {
+    "JUNCTIONS":  (["id", "cota", "demanda", "patron"], [None, None, "0", ""]),
+    "RESERVOIRS": (["id", "H", "patron"], [None, None, ""]),
+    "TANKS":      (["id", "cota", "nivel_ini", "nivel_min", "nivel_max", "diametro", "vol_min", "curva_vol"],
+                   [None, None, None, "0", "0", "0", "0", ""]),
+    "PIPES":      (["id", "n1", "n2", "longitud", "diametro", "rugosidad", "k_menor", "estado"],
+                   [None, None, None, None, None, None, "0", "OPEN"]),
+    "VALVES":     (["id", "n1", "n2", "diametro", "tipo", "consigna", "k_menor"],
+                   [None, None, None, None, None, None, "0"]),
+}
+
+
+def _lineas(path):
+    """(sección, campos) de cada línea útil; quita comentarios y líneas vacías."""
+    seccion = None
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for linea in f:
+            linea = linea.split(";", 1)[0].strip()
+            if not linea:
+                continue
+            if linea[0] == "[":
+                seccion = linea.strip("[]").strip().upper()
+                continue
+            yield seccion, linea.split()
+
+
+class ModeloINP:
+    """
+    Modelo EPANET en arrays. Nudos: un único índice para consumos, embalses y
+    depósitos (nudos["id"][k] es el nombre del nudo k). Líneas: un dict de
+    arrays por tipo (tuberias, bombas, valvulas) con n1/n2 como índices de nudo.
+    demandas: categorías de [DEMANDS] (nudo, demanda_lps, patron_idx).
+    avisos: los de la lectura; avisos_red: los de la última llamada a a_red.
+    """
+    def __init__(self):
+        self.opciones = {"UNITS": "GPM", "HEADLOSS": "H-W", "PATTERN": "1",
+                         "SPECIFIC GRAVITY": "1.0", "VISCOSITY": "1.0"}
+        self.nudos = {}
+        self.tuberias = {}
+        self.bombas = {}
+        self.valvulas = {}
+        self.curvas = {}     # id -> (x, y) en unidades del fichero
+        self.patrones = {}   # id -> array de multiplicadores
+        self.demandas = {}
+        self.avisos = []
+        self.avisos_red = []
+
+    @property
+    def unidades_si(self):
+        return self.opciones["UNITS"] not in UNIDADES_US
+
+    @property
+    def n_nudos(self):
+        return len(self.nudos.get("id", []))
+
+    def demandas_lps(self, periodo=0):
+        """
+        Demanda de cada nudo (l/s) en un periodo, aplicando su patrón (cada patrón se
+        repite con su longitud) y sumando las categorías de [DEMANDS].
+        """
+        factor = np.array([v[periodo % len(v)] for v in self.patrones.values()] + [1.0])
+        idx = self.nudos["patron_idx"]
+        q = self.nudos["demanda_lps"] * factor[np.where(idx >= 0, idx, len(factor) - 1)]
+        d = self.demandas
+        if len(d.get("nudo", [])):
+            idx = d["patron_idx"]
+            np.add.at(q, d["nudo"], d["demanda_lps"] * factor[np.where(idx >= 0, idx, len(factor) - 1)])
+        return q
+
+    def curva_bomba(self, k):
+        """Curva de la bomba k tabulada como (Q l/s, H m)."""
+        c = self.bombas["curva"][k]
+        if c not in self.curvas:
+            raise ValueError(f"La bomba {self.bombas['id'][k]} no tiene curva HEAD.")
+        fq = UNIDADES_CAUDAL[self.opciones["UNITS"]]
+        fh = 1.0 if self.unidades_si else PIE
+        q, h = self.curvas[c]
+        q, h = q * fq, h * fh
+        if len(q) == 1:
+            # Un punto de diseño: H = A - B·Q² con H(0) = 4/3·h0 y Q(H=0) = 2·q0 (criterio EPANET)
+            A = 4.0/3.0 * h[0]; B = h[0] / (3.0 * q[0]**2)
+            qq = np.linspace(0.0, 2.0*q[0], 21)
+            return qq, A - B*qq**2
+        if len(q) == 3 and q[0] == 0.0:
+            # Tres puntos: H = A - B·Q^C
+            A = h[0]
+            C = np.log((A - h[2]) / (A - h[1])) / np.log(q[2] / q[1])
+            B = (A - h[1]) / q[1]**C
+            qq = np.linspace(0.0, (A / B)**(1.0 / C), 21)
+            return qq, A - B*qq**C
+        return q, h
+
+    def a_red(self, s_rel=None, nu=None, periodo=0):
+        """
+        Construye la RedHidraulica equivalente (análisis estático del periodo indicado).
+        Los avisos de la conversión quedan en avisos_red (se rehacen en cada llamada).
+        """
+        hl = self.opciones["HEADLOSS"]
+        if hl not in ("H-W", "D-W"):
+            raise ValueError(f"Fórmula de pérdidas no soportada: {hl} (solo H-W y D-W).")
+        if s_rel is None:
+            s_rel = float(self.opciones["SPECIFIC GRAVITY"])
+        if nu is None:
+            nu = 1e-6 * float(self.opciones["VISCOSITY"])
+        red = RedHidraulica(friccion=HW if hl == "H-W" else DW, nu=nu, s_rel=s_rel)
+        avisos = []
+
+        tipo = self.nudos["tipo"]
+        consumo = tipo == NUDO_CONSUMO
+        # Los nudos se añaden en bloques; 'orden' lleva el índice del modelo al de la red
+        orden = np.empty(len(tipo), dtype=np.int64)
+        orden[consumo] = red.agregar_nudos(demanda_lps=self.demandas_lps(periodo)[consumo],
+                                           cota=self.nudos["cota"][consumo], n=int(consumo.sum()))
+        fijo = ~consumo
+        if fijo.any():
+            orden[fijo] = red.agregar_depositos(self.nudos["H"][fijo])
+
+        t = self.tuberias
+        if len(t.get("id", [])):
+            red.agregar_tuberias(orden[t["n1"]], orden[t["n2"]], t["diametro"], t["longitud"],
+                                 t["rugosidad"], km=t["k_menor"], abierta=t["abierta"])
+        b = self.bombas
+        for k in range(len(b.get("id", []))):
+            if b["curva"][k] not in self.curvas:
+                avisos.append(f"Bomba {b['id'][k]}: sin curva HEAD (POWER no soportado), se omite.")
+                continue
+            Qc, Hc = self.curva_bomba(k)
+            red.agregar_bomba(orden[b["n1"][k]], orden[b["n2"][k]], Qc, Hc, velocidad=b["velocidad"][k],
+                              abierta=bool(b["abierta"][k]))
+        v = self.valvulas
+        if len(v.get("id", [])):
+            red.agregar_valvulas(orden[v["n1"]], orden[v["n2"]], v["Kv"], D_m=v["diametro"], abierta=v["abierta"])
+        self.avisos_red = avisos
+        return red
+
+
+def _columnas(filas, nombres, defectos, seccion):
+    """Completa los campos opcionales y traspone las filas a columnas (listas de str)."""
+    n = len(nombres)
+    completas = []
+    for f in filas:
+        if len(f) < n:
+            falta = defectos[len(f):]
+            if any(d is None for d in falta):
+                raise ValueError(f"[{seccion}] línea incompleta: {' '.join(f)}")
+            f = f + falta
+        completas.append(f[:n])
+    if not completas:
+        return {k: [] for k in nombres}
+    return dict(zip(nombres, (list(c) for c in zip(*completas))))
+
+
+def leer_inp(path):
+    """Lee un fichero .inp de EPANET y retorna un ModeloINP en unidades SI."""
+    modelo = ModeloINP()
+    filas = {s: [] for s in _COLUMNAS}
+    bombas, demandas = [], []
+    curvas, patrones, estados = {}, {}, {}
+    ignoradas = set()
+    for seccion, campos in _lineas(path):
+        if seccion in filas:
+            filas[seccion].append(campos)
+        elif seccion == "PUMPS":
+            bombas.append(campos)
+        elif seccion == "DEMANDS":
+            if len(campos) < 2:
+                raise ValueError(f"[DEMANDS] línea incompleta: {' '.join(campos)}")
+            demandas.append(campos)
+        elif seccion == "STATUS":
+            if len(campos) < 2:
+                raise ValueError(f"[STATUS] línea incompleta: {' '.join(campos)}")
+            estados[campos[0]] = campos[1].upper()
+        elif seccion == "CURVES":
+            if len(campos) < 3:
+                raise ValueError(f"[CURVES] línea incompleta: {' '.join(campos)}")
+            curvas.setdefault(campos[0], []).append((campos[1], campos[2]))
+        elif seccion == "PATTERNS":
+            patrones.setdefault(campos[0], []).extend(campos[1:])
+        elif seccion == "OPTIONS":
+            # Claves de una o dos palabras ("Specific Gravity 1.0")
+            clave2 = " ".join(campos[:2]).upper()
+            if clave2 in ("SPECIFIC GRAVITY",) and len(campos) > 2:
+                modelo.opciones[clave2] = campos[2]
+            elif len(campos) > 1:
+                modelo.opciones[campos[0].upper()] = campos[1]
+        elif seccion not in SECCIONES_SIN_EFECTO:
+            ignoradas.add(seccion)
+    if ignoradas:
+        modelo.avisos.append("Secciones no soportadas (se ignoran): "
+                             + ", ".join(f"[{s}]" for s in sorted(ignoradas)) + ".")
+
+    op = modelo.opciones
+    op["UNITS"], op["HEADLOSS"] = op["UNITS"].upper(), op["HEADLOSS"].upper()
+    if op["UNITS"] not in UNIDADES_CAUDAL:
+        raise ValueError(f"Unidades de caudal desconocidas: {op['UNITS']}")
+    si = modelo.unidades_si
+    f_len = 1.0 if si else PIE                 # longitudes y cotas
+    f_diam = 1e-3 if si else PULGADA           # diámetros (mm o pulgadas)
+    f_q = UNIDADES_CAUDAL[op["UNITS"]]         # caudal -> l/s
+    f_rug = 1e-3 if si else PIE * 1e-3        # ε de D-W (mm o milipies)
+
+    modelo.curvas = {k: (np.array([x for x, _ in v], dtype=float), np.array([y for _, y in v], dtype=float))
+                     for k, v in curvas.items()}
+    modelo.patrones = {k: np.array(v, dtype=float) for k, v in patrones.items()}
+
+    # ---- Nudos: consumos, embalses y depósitos con un único índice ----
+    cols = {s: _columnas(filas[s], *_COLUMNAS[s], s) for s in _COLUMNAS}
+    j, r, t = cols["JUNCTIONS"], cols["RESERVOIRS"], cols["TANKS"]
+    nj, nr, nt = len(j["id"]), len(r["id"]), len(t["id"])
+    ids = j["id"] + r["id"] + t["id"]
+    indice = {k: i for i, k in enumerate(ids)}
+    if len(indice) != len(ids):
+        raise ValueError("Hay nudos con el mismo identificador.")
+    cota_t = np.array(t["cota"], dtype=float) * f_len
+    H_t = cota_t + np.array(t["nivel_ini"], dtype=float) * f_len
+    H_r = np.array(r["H"], dtype=float) * f_len
+    def_patron = op["PATTERN"]
+    pat_ids = list(modelo.patrones)
+    pat_pos = {p: k for k, p in enumerate(pat_ids)}
+    patron_j = [p if p else def_patron for p in j["patron"]]
+    modelo.nudos = dict(
+        id=ids,
+        tipo=np.concatenate([np.full(nj, NUDO_CONSUMO), np.full(nr, NUDO_EMBALSE),
+                             np.full(nt, NUDO_DEPOSITO)]).astype(np.int8),
+        cota=np.concatenate([np.array(j["cota"], dtype=float) * f_len, H_r, cota_t]),
+        demanda_lps=np.concatenate([np.array(j["demanda"], dtype=float) * f_q, np.zeros(nr + nt)]),
+        patron_idx=np.array([pat_pos.get(p, -1) for p in patron_j] + [-1]*(nr + nt), dtype=np.int64),
+        H=np.concatenate([np.full(nj, np.nan), H_r, H_t]),
+        indice=indice,
+    )
+    # [DEMANDS]: las categorías sustituyen a la demanda de [JUNCTIONS] de esos nudos
+    if demandas:
+        d_nudo = np.array([indice.get(c[0], -1) for c in demandas], dtype=np.int64)
+        if (d_nudo < 0).any() or (modelo.nudos["tipo"][d_nudo] != NUDO_CONSUMO).any():
+            malos = [c[0] for c, k in zip(demandas, d_nudo) if k < 0 or modelo.nudos["tipo"][k] != NUDO_CONSUMO]
+            raise ValueError(f"[DEMANDS] en nudos que no son de consumo: {', '.join(malos)}")
+        modelo.nudos["demanda_lps"][d_nudo] = 0.0
+        d_patron = [c[2] if len(c) > 2 else def_patron for c in demandas]
+        modelo.demandas = dict(nudo=d_nudo, demanda_lps=np.array([c[1] for c in demandas], dtype=float) * f_q,
+                               patron_idx=np.array([pat_pos.get(p, -1) for p in d_patron], dtype=np.int64))
+
+    def nudos_de(col):
+        try:
+            return np.array([indice[k] for k in col], dtype=np.int64)
+        except KeyError as e:
+            raise ValueError(f"Línea conectada a un nudo inexistente: {e.args[0]}") from None
+
+    # ---- Tuberías ----
+    p = cols["PIPES"]
+    # [STATUS] manda sobre el estado inicial de [PIPES]
+    estado = np.array([estados.get(i, e.upper()) if estados.get(i) in ("OPEN", "CLOSED") else e.upper()
+                       for i, e in zip(p["id"], p["estado"])])
+    rug = np.array(p["rugosidad"], dtype=float)
+    if op["HEADLOSS"] == "D-W":
+        rug = rug * f_rug
+    if (estado == "CV").any():
+        modelo.avisos.append(f"{int((estado == 'CV').sum())} tuberías con válvula de retención (CV) se tratan como abiertas.")
+    modelo.tuberias = dict(
+        id=p["id"], n1=nudos_de(p["n1"]), n2=nudos_de(p["n2"]),
+        longitud=np.array(p["longitud"], dtype=float) * f_len,
+        diametro=np.array(p["diametro"], dtype=float) * f_diam,
+        rugosidad=rug, k_menor=np.array(p["k_menor"], dtype=float),
+        abierta=estado != "CLOSED",
+    )
+
+    # ---- Bombas: ID N1 N2 y pares clave-valor (HEAD, POWER, SPEED, PATTERN) ----
+    b_ids, b_n1, b_n2, b_curva, b_vel, b_abierta = [], [], [], [], [], []
+    for campos in bombas:
+        b_ids.append(campos[0]); b_n1.append(campos[1]); b_n2.append(campos[2])
+        pares = dict(zip((c.upper() for c in campos[3::2]), campos[4::2]))
+        b_curva.append(pares.get("HEAD", ""))
+        vel = float(pares.get("SPEED", 1.0))
+        # [STATUS]: OPEN/CLOSED o una velocidad relativa (0 = parada)
+        est = estados.get(campos[0])
+        if est not in (None, "OPEN", "CLOSED"):
+            vel = float(est)
+        b_vel.append(vel)
+        b_abierta.append(est != "CLOSED" and vel > 0.0)
+        if "POWER" in pares:
+            modelo.avisos.append(f"Bomba {campos[0]}: potencia constante (POWER) no soportada.")
+    modelo.bombas = dict(id=b_ids, n1=nudos_de(b_n1), n2=nudos_de(b_n2), curva=b_curva,
+                         velocidad=np.array(b_vel, dtype=float), abierta=np.array(b_abierta, dtype=bool))
+
+    # ---- Válvulas: Kv equivalente ----
+    v = cols["VALVES"]
+    D_v = np.array(v["diametro"], dtype=float) * f_diam
+    tipo_v = np.array([x.upper() for x in v["tipo"]])
+    km = np.array(v["k_menor"], dtype=float)
+    # [STATUS]: OPEN/CLOSED fija la válvula; un número sustituye a la consigna
+    est_v = [estados.get(i) for i in v["id"]]
+    consigna = [e if e not in (None, "OPEN", "CLOSED") else x for x, e in zip(v["consigna"], est_v)]
+    # TCV: la consigna es el coeficiente de pérdidas K; el resto solo aporta sus pérdidas menores.
+    # Una TCV en OPEN no aplica su consigna (solo las pérdidas menores)
+    K = np.array([float(x) if tv == "TCV" and e != "OPEN" else 0.0
+                  for x, tv, e in zip(consigna, tipo_v, est_v)]) + km
+    s_rel = float(op["SPECIFIC GRAVITY"])
+    A = np.pi * D_v**2 / 4.0
+    # hf = K·V²/2g = (10/s)·(Q[m³/h]/Kv)²  ->  Kv = 3600·A·√(2g·10/(s·K))
+    with np.errstate(divide="ignore"):
+        Kv = np.where(K > 0, 3600.0 * A * np.sqrt(2.0 * 9.81 * 10.0 / (s_rel * np.where(K > 0, K, 1.0))), np.inf)
+    control = np.isin(tipo_v, VALVULAS_CONTROL)
+    if control.any():
+        modelo.avisos.append(f"{int(control.sum())} válvulas de control (PRV/PSV/PBV/FCV/GPV) se cargan "
+                             "abiertas: sin equivalente Kv.")
+    modelo.valvulas = dict(id=v["id"], n1=nudos_de(v["n1"]), n2=nudos_de(v["n2"]), diametro=D_v,
+                           tipo=tipo_v, Kv=Kv, abierta=np.array([e != "CLOSED" for e in est_v], dtype=bool))
+    lineas = set(p["id"]) | set(b_ids) | set(v["id"])
+    desconocidas = [k for k in estados if k not in lineas]
+    if desconocidas:
+        modelo.avisos.append(f"[STATUS] de líneas inexistentes (se ignoran): {', '.join(desconocidas)}.")
+    return modelo
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+Exportación de tablas y barridos a CSV, CSV comprimido (.csv.gz) o Parquet.
+Se escribe directamente desde arrays NumPy, bloque a bloque, de modo que la
+memoria usada no depende del número de filas (barridos de millones de puntos).
+El CSV lo formatea siempre NumPy (una sola operación de formato por bloque, sin
+bucles Python por fila), así que el fichero es el mismo con o sin pyarrow;
+pyarrow solo se necesita para Parquet.
+
+También incluye la exportación de gráficas en un hilo de trabajo: se renderiza
+una copia de la figura (o fotogramas de un barrido) con un lienzo Agg propio,
+sin bloquear ni tocar el lienzo Tk en pantalla, y la ventana de progreso que
+usan las dos aplicaciones para seguirla.
+"""
+
+import os
+import gzip
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import messagebox
+import numpy as np
+import customtkinter as ctk
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.backends.backend_pdf import PdfPages
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pa_pq
+except ImportError:  # dependencia opcional
+    pa = None
+
+FILAS_POR_BLOQUE = 65536
+
+def formato_desde_ruta(path):
+    """Deduce el formato por la extensión: 'parquet', 'csv.gz' o 'csv'."""
+    p = str(path).lower()
+    if p.endswith(".parquet") or p.endswith(".pq"):
+        return "parquet"
+    if p.endswith(".gz"):
+        return "csv.gz"
+    return "csv"
+
+def iter_bloques(columnas, filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Trocea un dict {nombre: array} en dicts de vistas (sin copia) de como mucho
+    filas_por_bloque filas. Sin filas da un bloque vacío, para que se escriba la cabecera.
+    """
+    arrays = {k: np.asarray(v) for k, v in columnas.items()}
+    n = len(next(iter(arrays.values()))) if arrays else 0
+    for i0 in range(0, max(n, 1), filas_por_bloque):
+        yield {k: v[i0:i0+filas_por_bloque] for k, v in arrays.items()}
+
+def _formato_columna(v, decimales):
+    if v.dtype.kind == "f":
+        return f"%.{decimales}f"
+    if v.dtype.kind in "iu":
+        return "%d"
+    return "%s"
+
+def _lineas_csv(bloque, decimales):
+    """
+    Convierte un bloque en texto CSV sin bucles Python por fila: las columnas se
+    intercalan en un solo array y se formatean con una única operación %.
+    """
+    cols = [np.asarray(v) for v in bloque.values()]
+    n = len(cols[0])
+    if n == 0:
+        return ""
+    fila = ",".join(_formato_columna(v, decimales) for v in cols) + "\n"
+    valores = np.empty((n, len(cols)), dtype=object)
+    for j, v in enumerate(cols):
+        valores[:, j] = v
+    return (fila * n) % tuple(valores.ravel())
+
+def exportar_columnas(path, bloques, formato=None, decimales=6):
+    """
+    Escribe columnas en 'path' por bloques.
+    bloques: dict {nombre: array} o iterable de dicts con las mismas claves
+             (p.ej. un generador que va produciendo un barrido).
+    formato: 'csv', 'csv.gz' o 'parquet' (por defecto, según la extensión).
+    decimales: decimales de las columnas reales en el CSV.
+    Siempre se escribe al menos la cabecera (o el esquema en Parquet).
+    Retorna el número de filas escritas.
+    """
+    if isinstance(bloques, dict):
+        bloques = iter_bloques(bloques)
+    formato = formato or formato_desde_ruta(path)
+    if formato not in ("csv", "csv.gz", "parquet"):
+        raise ValueError(f"Formato de exportación desconocido: {formato}")
+    if formato == "parquet" and pa is None:
+        raise RuntimeError("La exportación a Parquet necesita el paquete 'pyarrow'.")
+
+    n_total = 0
+    if formato == "parquet":
+        writer = None
+        try:
+            for bloque in bloques:
+                tabla = pa.table({k: np.asarray(v) for k, v in bloque.items()})
+                if writer is None:
+                    writer = pa_pq.ParquetWriter(str(path), tabla.schema)
+                writer.write_table(tabla)
+                n_total += tabla.num_rows
+        finally:
+            if writer is not None:
+                writer.close()
+        return n_total
+
+    if formato == "csv.gz":
+        f = gzip.open(path, "wt", compresslevel=6, encoding="utf-8", newline="")
+    else:
+        f = open(path, "w", encoding="utf-8", newline="")
+    with f:
+        cabecera_escrita = False
+        for bloque in bloques:
+            if not cabecera_escrita:
+                f.write(",".join(bloque.keys()) + "\n")
+                cabecera_escrita = True
+            n = len(next(iter(bloque.values())))
+            if n:
+                f.write(_lineas_csv(bloque, decimales))
+            n_total += n
+    return n_total
+
+
+# ---------------- Exportación de gráficas en segundo plano ---------------- #
+# Un único hilo: las exportaciones se encolan y nunca compiten entre sí
+_pool_figuras = ThreadPoolExecutor(max_workers=1, thread_name_prefix="exportar-fig")
+
+class Progreso:
+    """Avance compartido entre el hilo de exportación y la GUI (que lo consulta con after())."""
+    def __init__(self):
+        self.hechos = 0
+        self.total = 1
+
+    def __call__(self, hechos, total):
+        self.hechos, self.total = hechos, total
+
+    @property
+    def fraccion(self):
+        return self.hechos / max(self.total, 1)
+
+def copiar_figura(fig):
+    """Copia independiente de la figura (vía pickle) con su propio lienzo Agg."""
+    copia = pickle.loads(pickle.dumps(fig))
+    FigureCanvasAgg(copia)
+    return copia
+
+def guardar_figura_async(fig, path, progreso=None, **savefig_kw):
+    """
+    Guarda 'fig' en 'path' desde el hilo de exportación.
+    En el hilo llamante solo se serializa el estado de la figura.
+    Retorna un Future con la ruta escrita.
+    """
+    copia = copiar_figura(fig)
+    def tarea():
+        copia.savefig(path, **savefig_kw)
+        if progreso is not None:
+            progreso(1, 1)
+        return path
+    return _pool_figuras.submit(tarea)
+
+def exportar_barrido_figuras(path, valores, dibujar, figsize=(6.8, 4.8), dpi=150, progreso=None):
+    """
+    Renderiza un fotograma por cada valor del barrido con dibujar(fig, valor)
+    sobre una figura Agg nueva (nunca sobre la de pantalla). dibujar se ejecuta en
+    el hilo de exportación: solo debe usar sus argumentos y datos ya calculados,
+    nunca el estado de la App.
+    path '.pdf' -> un PDF multipágina; otra extensión -> secuencia base_000.png, base_001.png...
+    Retorna un Future con la lista de ficheros escritos.
+    """
+    valores = list(valores)
+    def tarea():
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        n = len(valores)
+        if path.lower().endswith(".pdf"):
+            with PdfPages(path) as pdf:
+                for i, v in enumerate(valores):
+                    fig.clf()
+                    dibujar(fig, v)
+                    pdf.savefig(fig)
+                    if progreso is not None:
+                        progreso(i + 1, n)
+            return [path]
+        base, ext = os.path.splitext(path)
+        rutas = []
+        for i, v in enumerate(valores):
+            fig.clf()
+            dibujar(fig, v)
+            ruta = f"{base}_{i:03d}{ext or '.png'}"
+            fig.savefig(ruta, dpi=dpi)
+            rutas.append(ruta)
+            if progreso is not None:
+                progreso(i + 1, n)
+        return rutas
+    return _pool_figuras.submit(tarea)
+
+def seguir_exportacion(padre, titulo, futuro, progreso, mensaje_ok, fuente=None):
+    """
+    Ventana con barra de progreso que consulta el Future sin bloquear la interfaz.
+    mensaje_ok(resultado) da el texto del aviso final; los errores se muestran igual.
+    """
+    win = ctk.CTkToplevel(padre)
+    win.title(titulo)
+    win.geometry("360x100")
+    win.resizable(False, False)
+    win.transient(padre)
+    ctk.CTkLabel(win, text=titulo, font=fuente).pack(pady=(15, 5))
+    pb = ctk.CTkProgressBar(win)
+    pb.pack(fill="x", padx=20, pady=5)
+    pb.set(0.0)
+
+    def tick():
+        pb.set(progreso.fraccion)
+        if not futuro.done():
+            win.after(50, tick)
+            return
+        try: win.destroy()
+        except Exception: pass
+        try:
+            messagebox.showinfo("Guardado", mensaje_ok(futuro.result()))
+        except Exception as e:
+            messagebox.showerror("Error al guardar", str(e))
+    tick()
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Golpe de ariete en la tubería de impulsión por el método de las características.
+
+Tubería única de longitud L y diámetro D discretizada en N tramos (dx = L/N,
+dt = dx/a). Contornos:
+- x = 0: bomba a velocidad constante, H = a0 + a1·Q + a2·Q² (las pérdidas de
+  aspiración pueden ir incluidas en el ajuste). Si el caudal se invertiría, la
+  retención de la bomba cierra: Q = 0. Sin retención y con (H_A, 0, 0) el
+  contorno es un depósito de nivel H_A.
+- x = L: válvula que descarga al depósito B (altura H_B) con pérdidas
+  H - H_B = Cv(t)·Q·|Q|; Cv(t) sale de la ley de cierre (Kv(θ(t))).
+
+En cada paso de tiempo todos los nudos interiores se actualizan a la vez con
+operaciones NumPy sobre arrays preasignados, de modo que miles de nudos por
+decenas de miles de pasos se resuelven en segundos.
+"""
+
+import numpy as np
+
+G = 9.81
+
+
+class ResultadoTransitorio:
+    """Envolvente de alturas a lo largo de la tubería e historia en los extremos."""
+    def __init__(self, x, t, H0, H_max, H_min, H_valvula, Q_valvula, H_bomba, a, V0):
+        self.x = x                  # posición (m), 0 = bomba, L = válvula
+        self.t = t                  # tiempo (s)
+        self.H0 = H0                # perfil piezométrico inicial (m)
+        self.H_max = H_max          # envolvente de máximos (m)
+        self.H_min = H_min          # envolvente de mínimos (m)
+        self.H_valvula = H_valvula  # altura aguas arriba de la válvula frente a t
+        self.Q_valvula = Q_valvula  # caudal por la válvula frente a t (m³/s)
+        self.H_bomba = H_bomba      # altura en la impulsión de la bomba frente a t
+        self.joukowsky = a * V0 / G # sobrepresión de cierre instantáneo a·V0/g (m)
+        self.periodo = 2.0 * x[-1] / a  # tiempo de ida y vuelta de la onda 2L/a (s)
+
+    @property
+    def sobrepresion_max(self):
+        return float(np.max(self.H_max - self.H0))
+
+    @property
+    def depresion_max(self):
+        return float(np.max(self.H0 - self.H_min))
+
+
+def celeridad_onda(D_m, espesor_m, E_tubo=2.0e11, K_fluido=2.2e9, rho=1000.0):
+    """Celeridad de Korteweg a = √(K/ρ / (1 + K·D/(E·e))) (m/s); por defecto acero y agua."""
+    return np.sqrt(K_fluido / rho / (1.0 + K_fluido * D_m / (E_tubo * espesor_m)))
+
+
+def cierre_valvula_moc(L, D, a, f, Q0, H_B, bomba, ley_cierre, t_total, n_tramos=1000, retencion=True):
+    """
+    Simula el transitorio partiendo del régimen permanente con caudal Q0 (m³/s).
+    f:          factor de fricción de Darcy (permanente) de la tubería.
+    bomba:      (a0, a1, a2) de la curva H(Q) en el contorno aguas arriba (Q en m³/s).
+    ley_cierre: función vectorizada t -> Cv(t) (m/(m³/s)²); np.inf = válvula cerrada.
+    retencion:  False = el caudal puede invertirse en el contorno aguas arriba.
+    El término independiente a0 se ajusta para que la bomba pase por el régimen
+    inicial y el transitorio arranque sin perturbaciones espurias.
+    """
+    N = int(n_tramos)
+    dx = L / N
+    dt = dx / a
+    n_pasos = int(np.ceil(t_total / dt))
+    A = np.pi * D**2 / 4.0
+    B = a / (G * A)
+    R = f * dx / (2.0 * G * D * A**2)
+
+    t = np.arange(n_pasos + 1) * dt
+    Cv = np.asarray(ley_cierre(t), dtype=float)
+
+    # Régimen permanente: pérdidas lineales a lo largo de la tubería
+    x = np.linspace(0.0, L, N + 1)
+    H_val0 = H_B + (0.0 if not np.isfinite(Cv[0]) else Cv[0] * Q0 * abs(Q0))
+    H = H_val0 + R * Q0 * abs(Q0) * (N - np.arange(N + 1))
+    Q = np.full(N + 1, float(Q0))
+    H0 = H.copy()
+    a0, a1, a2 = bomba
+    a0 = H[0] - (a1 * Q0 + a2 * Q0**2)
+
+    H_max = H.copy(); H_min = H.copy()
+    H_val = np.empty(n_pasos + 1); Q_val = np.empty(n_pasos + 1); H_bom = np.empty(n_pasos + 1)
+    H_val[0], Q_val[0], H_bom[0] = H[-1], Q[-1], H[0]
+
+    CP = np.empty(N + 1); CM = np.empty(N + 1)
+    for k in range(1, n_pasos + 1):
+        # Invariantes de Riemann desde los nudos vecinos (C+ viene de i-1, C- de i+1)
+        RQ = R * Q * np.abs(Q)
+        CP[1:] = H[:-1] + B * Q[:-1] - RQ[:-1]
+        CM[:-1] = H[1:] - B * Q[1:] + RQ[1:]
+        # Nudos interiores
+        Q[1:-1] = (CP[1:-1] - CM[1:-1]) / (2.0 * B)
+        H[1:-1] = 0.5 * (CP[1:-1] + CM[1:-1])
+
+        # Bomba (C-): a2·Q² + (a1 - B)·Q + (a0 - CM) = 0; raíz positiva en forma estable.
+        # Si la bomba no vence CM (c ≤ 0) la retención cierra y Q = 0
+        cm = CM[0]; b_ = a1 - B; c_ = a0 - cm
+        q = 2.0 * c_ / (-b_ + np.sqrt(max(b_*b_ - 4.0*a2*c_, 0.0))) if c_ > 0.0 or not retencion else 0.0
+        Q[0] = q
+        H[0] = cm + B * q
+
+        # Válvula (C+): Cv·Q·|Q| + B·Q - (CP - H_B) = 0
+        cp = CP[-1]; cv = Cv[k]; dH = cp - H_B
+        if not np.isfinite(cv):
+            q = 0.0
+        elif cv <= 0.0:
+            q = dH / B
+        else:
+            q = np.copysign((-B + np.sqrt(B * B + 4.0 * cv * abs(dH))) / (2.0 * cv), dH)
+        Q[-1] = q
+        H[-1] = cp - B * q
+
+        np.maximum(H_max, H, out=H_max)
+        np.minimum(H_min, H, out=H_min)
+        H_val[k], Q_val[k], H_bom[k] = H[-1], Q[-1], H[0]
+
+    return ResultadoTransitorio(x, t, H0, H_max, H_min, H_val, Q_val, H_bom, a, Q0 / A)
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Todas las intersecciones entre la curva de la bomba (lineal a tramos) y la curva
+de la instalación, con su estabilidad.
+
+bisect_root(f, 0, Qmax) devuelve como mucho una raíz, y ninguna si los extremos
+tienen el mismo signo. Con curvas planas o con joroba puede haber varias
+intersecciones, o una tangente, y se pierden sin aviso. Aquí cada tramo de la
+tabla de la bomba se subdivide y se compara con la instalación. Se buscan:
+- cambios de signo, refinados por bisección simultánea;
+- mínimos locales de |H_bomba - H_inst| que tocan cero, o sea tangencias,
+  refinados por sección áurea.
+Todo va vectorizado sobre casos (aperturas, presiones, bombas distintas):
+cada caso es una fila.
+
+Estabilidad: el punto es estable si d(H_bomba - H_inst)/dQ < 0, es decir, si
+un exceso de caudal hace que la instalación pida más altura de la que da la bomba.
+"""
+
+import numpy as np
+
+ORO = (np.sqrt(5.0) - 1.0) / 2.0
+
+
+class Intersecciones:
+    """Raíces por caso (filas), ordenadas por Q y rellenadas con NaN hasta el máximo de raíces."""
+    def __init__(self, Q, H, estable, tangente):
+        self.Q = Q                  # (n_casos, k) caudal de cada intersección
+        self.H = H                  # (n_casos, k) altura de la bomba en ella
+        self.estable = estable      # (n_casos, k) bool
+        self.tangente = tangente    # (n_casos, k) bool: toca sin cruzar (equilibrio marginal)
+        self.n = np.sum(~np.isnan(Q), axis=1)
+
+    def primera_estable(self):
+        """Menor caudal estable de cada caso (el que alcanza un arranque desde Q = 0), NaN si no hay."""
+        Qe = np.where(self.estable, self.Q, np.nan)
+        hay = ~np.all(np.isnan(Qe), axis=1)
+        return np.where(hay, np.nanmin(np.where(hay[:, None], Qe, 0.0), axis=1), np.nan)
+
+    def describir(self, i, unidad="l/s"):
+        """Texto corto con las raíces del caso i."""
+        partes = []
+        for q, e, t in zip(self.Q[i], self.estable[i], self.tangente[i]):
+            if np.isnan(q): continue
+            tipo = "tangente" if t else ("estable" if e else "inestable")
+            partes.append(f"{q:.2f} {unidad} ({tipo})")
+        return ", ".join(partes) if partes else "ninguna"
+
+
+def _rellenar(filas, valores, n_casos, relleno):
+    """Reparte valores planos (con su fila) en una matriz (n_casos, k) rellenada."""
+    cuenta = np.bincount(filas, minlength=n_casos)
+    k = max(int(cuenta.max()) if cuenta.size else 0, 1)
+    orden = np.argsort(filas, kind="stable")
+    filas = filas[orden]
+    inicio = np.concatenate([[0], np.cumsum(cuenta)[:-1]])
+    col = np.arange(filas.size) - inicio[filas]
+    salida = []
+    for v, r in zip(valores, relleno):
+        m = np.full((n_casos, k), r, dtype=np.asarray(v).dtype if np.asarray(v).size else type(r))
+        m[filas, col] = np.asarray(v)[orden]
+        salida.append(m)
+    return salida, cuenta
+
+
+def _sistema_en(H_sistema, filas, x, n_casos, q_relleno):
+    """H_sistema en puntos sueltos x, cada uno de su fila: se colocan en una matriz (n_casos, k)."""
+    (X,), cuenta = _rellenar(filas, [x], n_casos, [np.nan])
+    X = np.where(np.isnan(X), q_relleno[:, None], X)
+    Hs = np.asarray(H_sistema(X), dtype=float)
+    orden = np.argsort(filas, kind="stable")
+    inicio = np.concatenate([[0], np.cumsum(cuenta)[:-1]])
+    col = np.empty(filas.size, dtype=int)
+    col[orden] = np.arange(filas.size) - inicio[filas[orden]]
+    return Hs[filas, col]
+
+
+def intersecciones(Qb, Hb, H_sistema, n_sub=8, tol=1e-9, itmax=60, tol_tangente=1e-6):
+    """
+    Qb, Hb:    tabla de la bomba, (n_p,) común a todos los casos o (n_casos, n_p).
+    H_sistema: función vectorizada q (n_casos, m) -> H (n_casos, m) de la instalación;
+               el número de casos se deduce de su salida si la tabla es común.
+    n_sub:     subdivisiones de cada tramo de la tabla para separar raíces y tangencias.
+    Devuelve un Intersecciones con todas las raíces de cada caso.
+    """
+    Qb = np.atleast_2d(np.asarray(Qb, dtype=float))
+    Hb = np.atleast_2d(np.asarray(Hb, dtype=float))
+    n_seg = Qb.shape[1] - 1
+    u = np.arange(n_sub) / n_sub
+
+    # Muestras: n_sub por tramo más el último punto de la tabla
+    q = (Qb[:, :-1, None] + (Qb[:, 1:, None] - Qb[:, :-1, None]) * u).reshape(Qb.shape[0], -1)
+    q = np.concatenate([q, Qb[:, -1:]], axis=1)
+    Hs = np.asarray(H_sistema(q), dtype=float)
+    n_casos = Hs.shape[0]
+    q = np.broadcast_to(q, Hs.shape)
+    Qb = np.broadcast_to(Qb, (n_casos, Qb.shape[1]))
+    Hb = np.broadcast_to(Hb, (n_casos, Hb.shape[1]))
+    pend = np.diff(Hb, axis=1) / np.diff(Qb, axis=1)
+    seg = np.minimum(np.arange(q.shape[1]) // n_sub, n_seg - 1)
+    f = Hb[:, seg] + pend[:, seg] * (q - Qb[:, seg]) - Hs
+
+    def tramo(filas, x):
+        return np.minimum(np.sum(Qb[filas, 1:-1] <= x[:, None], axis=1), n_seg - 1)
+
+    def f_en(filas, x, s=None):
+        """H_bomba - H_inst en puntos sueltos; con s fijo la bomba se prolonga linealmente desde ese tramo."""
+        s = tramo(filas, x) if s is None else s
+        Hp = Hb[filas, s] + pend[filas, s] * (x - Qb[filas, s])
+        return Hp - _sistema_en(H_sistema, filas, x, n_casos, Qb[:, 0])
+
+    # 1) Cambios de signo estrictos entre muestras consecutivas
+    fi, ci = np.nonzero(f[:, :-1] * f[:, 1:] < 0.0)
+    a = q[fi, ci].copy(); b = q[fi, ci + 1].copy()
+    fa = f[fi, ci].copy()
+    if fi.size:
+        for _ in range(itmax):
+            m = 0.5 * (a + b)
+            fm = f_en(fi, m, seg[ci])
+            izq = fa * fm <= 0.0
+            b = np.where(izq, m, b)
+            a = np.where(izq, a, m); fa = np.where(izq, fa, fm)
+            if np.all(b - a < tol): break
+
+    # Ceros exactos en la muestra: cruce si los vecinos tienen signos opuestos, tangencia si
+    # tienen el mismo; en un tramo coincidente (ceros seguidos) solo se guardan sus extremos
+    cero = f == 0.0
+    vecino_izq = np.pad(f[:, :-1], ((0, 0), (1, 0)), constant_values=np.nan)
+    vecino_der = np.pad(f[:, 1:], ((0, 0), (0, 1)), constant_values=np.nan)
+    run = (vecino_izq == 0.0) | (vecino_der == 0.0)
+    interior = (vecino_izq == 0.0) & (vecino_der == 0.0)
+    toca = vecino_izq * vecino_der > 0.0
+    fz, cz = np.nonzero(cero & ~interior)
+    filas_r = np.concatenate([fi, fz])
+    Q_r = np.concatenate([0.5 * (a + b), q[fz, cz]])
+    tang_r = np.concatenate([np.zeros(fi.size, dtype=bool), run[fz, cz] | toca[fz, cz]])
+
+    # 2) Tangencias: mínimo local de |f| sin cambio de signo en las muestras vecinas
+    af = np.abs(f)
+    minimo = (f[:, :-2] * f[:, 1:-1] > 0.0) & (f[:, 1:-1] * f[:, 2:] > 0.0) & \
+             (af[:, 1:-1] <= af[:, :-2]) & (af[:, 1:-1] <= af[:, 2:])
+    ft, ct = np.nonzero(minimo)
+    if ft.size:
+        g = lambda x: np.abs(f_en(ft, x))
+        lo = q[ft, ct].copy(); hi = q[ft, ct + 2].copy()
+        x1 = hi - ORO * (hi - lo); x2 = lo + ORO * (hi - lo)
+        g1, g2 = g(x1), g(x2)
+        for _ in range(itmax):
+            izq = g1 < g2
+            hi = np.where(izq, x2, hi); lo = np.where(izq, lo, x1)
+            x1, x2 = np.where(izq, hi - ORO * (hi - lo), x2), np.where(izq, x1, lo + ORO * (hi - lo))
+            g1, g2 = np.where(izq, g(x1), g2), np.where(izq, g1, g(x2))
+            if np.all(hi - lo < tol): break
+        xt = 0.5 * (lo + hi)
+        toca = g(xt) < tol_tangente
+        filas_r = np.concatenate([filas_r, ft[toca]])
+        Q_r = np.concatenate([Q_r, xt[toca]])
+        tang_r = np.concatenate([tang_r, np.ones(int(toca.sum()), dtype=bool)])
+
+    # 3) Estabilidad: signo de d(H_bomba - H_inst)/dQ en la raíz (diferencias centradas,
+    #    laterales en los extremos de la tabla)
+    if Q_r.size:
+        s_r = tramo(filas_r, Q_r)
+        h = 1e-6 * np.maximum(Qb[filas_r, -1], 1.0)
+        x_lo = np.maximum(Q_r - h, Qb[filas_r, 0]); x_hi = np.minimum(Q_r + h, Qb[filas_r, -1])
+        df = (f_en(filas_r, x_hi, s_r) - f_en(filas_r, x_lo, s_r)) / (x_hi - x_lo)
+        H_r = Hb[filas_r, s_r] + pend[filas_r, s_r] * (Q_r - Qb[filas_r, s_r])
+    else:
+        df = H_r = np.empty(0)
+    estable = (df < 0.0) & ~tang_r
+
+    # Orden por caudal dentro de cada caso y sin duplicados (tangencia hallada dos veces)
+    orden = np.lexsort((Q_r, filas_r))
+    filas_r, Q_r, H_r, estable, tang_r = filas_r[orden], Q_r[orden], H_r[orden], estable[orden], tang_r[orden]
+    nuevo = np.ones(Q_r.size, dtype=bool)
+    nuevo[1:] = (filas_r[1:] != filas_r[:-1]) | (np.diff(Q_r) > 1e3 * tol)
+    (Q, H, est, tan), _ = _rellenar(filas_r[nuevo], [Q_r[nuevo], H_r[nuevo], estable[nuevo], tang_r[nuevo]],
+                                    n_casos, [np.nan, np.nan, False, False])
+    return Intersecciones(Q, H, est, tan)
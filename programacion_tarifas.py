@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Programación horaria del bombeo con tarifa por horas (discriminación horaria).
+
+Cada hora se elige entre parar o una de las opciones de funcionamiento (rodete o
+velocidad), cada una con su caudal y su potencia ya calculados: el punto de
+funcionamiento no se resuelve dentro del bucle, solo se consulta la tabla.
+Programación dinámica sobre el volumen almacenado discretizado:
+- estado:   volumen en [0, V_max] (m³), n_estados niveles;
+- etapa:    hora del día (24);
+- decisión: opción de funcionamiento (0 = parada);
+- coste:    P·precio de la hora.
+La recursión hacia atrás va vectorizada sobre días y estados, así que un año de
+programas diarios (365 × 24 × estados × opciones) se resuelve en una fracción de
+segundo. Vale para:
+- un objetivo diario de volumen u horas de funcionamiento (lo que sobra rebosa);
+- un depósito con demanda horaria, límites de llenado y volumen final mínimo.
+"""
+
+import numpy as np
+
+HORAS = 24
+
+# Periodos de la tarifa 2.0TD: valle 0-8 h y fines de semana, punta 10-14 h y 18-22 h
+PERIODO_VALLE, PERIODO_LLANO, PERIODO_PUNTA = 0, 1, 2
+HORAS_PUNTA = [10, 11, 12, 13, 18, 19, 20, 21]
+
+
+def tarifa_tres_periodos(punta, llano, valle, n_dias=365, dia_semana_inicial=0):
+    """Precios (n_dias, 24) en €/kWh; dia_semana_inicial = 0 si el primer día es lunes."""
+    periodo = np.full(HORAS, PERIODO_LLANO)
+    periodo[:8] = PERIODO_VALLE
+    periodo[HORAS_PUNTA] = PERIODO_PUNTA
+    precio = np.array([valle, llano, punta], dtype=float)[periodo]
+    finde = (np.arange(n_dias) + dia_semana_inicial) % 7 >= 5
+    return np.where(finde[:, None], float(valle), precio[None, :])
+
+
+class ProgramaHorario:
+    """Programa óptimo de cada día (filas) y su coste."""
+    def __init__(self, opcion, V, coste, energia_kWh, volumen_m3, factible, etiquetas):
+        self.opcion = opcion            # (n_dias, 24) índice de la opción (0 = parada)
+        self.V = V                      # (n_dias, 25) volumen almacenado al inicio de cada hora (m³)
+        self.coste = coste              # (n_dias,) €
+        self.energia_kWh = energia_kWh  # (n_dias,)
+        self.volumen_m3 = volumen_m3    # (n_dias,) bombeado con los caudales exactos
+        self.factible = factible        # (n_dias,) False si no hay programa que cumpla
+        self.etiquetas = etiquetas      # nombre de cada opción, etiquetas[0] = "Parada"
+
+    @property
+    def horas_marcha(self):
+        return np.sum(self.opcion > 0, axis=1)
+
+    def resumen(self):
+        ok = self.factible
+        return dict(dias=int(ok.size), factibles=int(ok.sum()),
+                    coste=float(self.coste[ok].sum()), energia_kWh=float(self.energia_kWh[ok].sum()),
+                    volumen_m3=float(self.volumen_m3[ok].sum()),
+                    precio_medio=float(self.coste[ok].sum() / max(self.energia_kWh[ok].sum(), 1e-12)))
+
+
+def programar(precios, Q_m3h, P_kW, V_max, n_estados=241, demanda=None, V0=0.0, V_fin=None,
+              rebose=False, etiquetas=None):
+    """
+    precios:  (n_dias, 24) o (24,) €/kWh.
+    Q_m3h:    caudal de cada opción de funcionamiento (n_opt,); la parada se añade como opción 0.
+    P_kW:     potencia absorbida de cada opción (n_opt,).
+    V_max:    capacidad del depósito o volumen objetivo (m³).
+    demanda:  volumen extraído en cada hora (24,) o (n_dias, 24) m³; None = sin demanda.
+    V0:       volumen al empezar el día; V_fin: mínimo al acabarlo (por defecto V0).
+    rebose:   True = lo que supere V_max se pierde (objetivo diario); False = no se puede rebosar.
+    Los caudales y la demanda se llevan a la malla de volumen (ΔV = V_max/(n_estados-1)) del
+    lado seguro: lo bombeado por defecto y la demanda por exceso, así que un día factible
+    en la malla también cumple con los caudales exactos.
+    """
+    precios = np.atleast_2d(np.asarray(precios, dtype=float))
+    n_d = precios.shape[0]
+    Q_all = np.concatenate([[0.0], np.asarray(Q_m3h, dtype=float)])
+    P_all = np.concatenate([[0.0], np.asarray(P_kW, dtype=float)])
+    n_S = int(n_estados)
+    dV = V_max / (n_S - 1)
+    paso = np.floor(Q_all / dV + 1e-9).astype(int)
+    dem = np.zeros((n_d, HORAS)) if demanda is None else np.broadcast_to(np.asarray(demanda, dtype=float), (n_d, HORAS))
+    dem_paso = np.ceil(dem / dV - 1e-9).astype(int)
+    s0 = int(round(V0 / dV))
+    s_fin = int(np.ceil((V0 if V_fin is None else V_fin) / dV - 1e-9))
+
+    s = np.arange(n_S)
+    dias = np.arange(n_d)[:, None, None]
+    J = np.broadcast_to(np.where(s >= s_fin, 0.0, np.inf), (n_d, n_S))
+    decision = np.empty((HORAS, n_d, n_S), dtype=np.int16)
+    coste = precios[:, :, None] * P_all                        # (n_d, 24, n_opt+1)
+    for h in range(HORAS - 1, -1, -1):
+        sig = s[None, :, None] + paso - dem_paso[:, h, None, None]   # (n_d, n_S, n_opt+1)
+        if rebose:
+            sig = np.minimum(sig, n_S - 1)
+        ok = (sig >= 0) & (sig < n_S)
+        total = np.where(ok, coste[:, h, None, :] + J[dias, np.clip(sig, 0, n_S - 1)], np.inf)
+        decision[h] = np.argmin(total, axis=2)                 # a igualdad de coste, parar
+        J = np.take_along_axis(total, decision[h][..., None].astype(np.intp), axis=2)[..., 0]
+
+    # Reconstrucción hacia delante de todos los días a la vez
+    estado = np.full(n_d, s0)
+    opcion = np.empty((n_d, HORAS), dtype=int)
+    S = np.empty((n_d, HORAS + 1), dtype=int); S[:, 0] = estado
+    for h in range(HORAS):
+        k = decision[h, np.arange(n_d), estado]
+        opcion[:, h] = k
+        estado = estado + paso[k] - dem_paso[:, h]
+        estado = np.clip(np.minimum(estado, n_S - 1) if rebose else estado, 0, n_S - 1)
+        S[:, h + 1] = estado
+    factible = np.isfinite(J[:, s0])
+    if etiquetas is None:
+        etiquetas = [f"Opción {i}" for i in range(1, Q_all.size)]
+    return ProgramaHorario(opcion, S * dV, np.where(factible, J[:, s0], np.nan),
+                           np.sum(P_all[opcion], axis=1), np.sum(Q_all[opcion], axis=1), factible,
+                           ["Parada"] + list(etiquetas))
+
+
+def programar_volumen(precios, Q_m3h, P_kW, volumen_m3, n_estados=241, etiquetas=None):
+    """Volumen diario mínimo (m³) al menor coste; el exceso de la última hora rebosa."""
+    return programar(precios, Q_m3h, P_kW, volumen_m3, n_estados, V0=0.0, V_fin=volumen_m3,
+                     rebose=True, etiquetas=etiquetas)
+
+
+def programar_horas(precios, P_kW, horas, etiquetas=None):
+    """Horas de marcha diarias (entero) al menor coste: el estado cuenta horas, no volumen."""
+    horas = int(horas)
+    P_kW = np.asarray(P_kW, dtype=float)
+    if horas <= 0:
+        # Sin horas que cumplir la malla tendría un solo estado: todo el día parada, coste nulo
+        n_d = np.atleast_2d(np.asarray(precios, dtype=float)).shape[0]
+        if etiquetas is None:
+            etiquetas = [f"Opción {i}" for i in range(1, P_kW.size + 1)]
+        return ProgramaHorario(np.zeros((n_d, HORAS), dtype=int), np.zeros((n_d, HORAS + 1)), np.zeros(n_d),
+                               np.zeros(n_d), np.zeros(n_d), np.ones(n_d, dtype=bool), ["Parada"] + list(etiquetas))
+    return programar(precios, np.ones(P_kW.size), P_kW, float(horas), horas + 1, V0=0.0,
+                     V_fin=float(horas), rebose=True, etiquetas=etiquetas)
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Propiedades del fluido en función de la temperatura: presión de vapor, densidad y
+viscosidad cinemática, vectorizadas sobre arrays de temperatura.
+
+Cada fluido se define con correlaciones:
+- P_v(T): Antoine, log10(P_v/mmHg) = A - B/(C + T), con uno o varios tramos de T;
+- ρ(T):   función de T (polinomio de Kell para el agua);
+- μ(T):   función de T (Vogel para el agua, Andrade en los demás).
+Al crearlo se tabulan una sola vez en una malla fina de T y después solo se
+interpola (malla uniforme: el índice es aritmético, sin búsqueda), así que las
+series temporales largas o los Monte Carlo de millones de temperaturas cuestan
+unas pocas operaciones por elemento. Fuera del intervalo tabulado el
+valor se mantiene en el extremo, como la tabla de Pv de Problema 3.
+"""
+
+import numpy as np
+
+G = 9.81
+MMHG_PA = 101325.0 / 760.0
+
+
+def antoine_Pa(T_C, tramos):
+    """P_v (Pa) con Antoine a tramos: tramos = [(T_hasta, A, B, C), ...] ordenados por T_hasta."""
+    T = np.asarray(T_C, dtype=float)
+    limites = np.array([t[0] for t in tramos[:-1]])
+    coef = np.array([t[1:] for t in tramos])
+    k = coef[np.searchsorted(limites, T)]
+    return MMHG_PA * 10.0**(k[..., 0] - k[..., 1] / (k[..., 2] + T))
+
+
+def densidad_kell(T_C):
+    """Densidad del agua (kg/m³), Kell (1975), 0-150 °C."""
+    T = np.asarray(T_C, dtype=float)
+    num = (999.83952 + 16.945176*T - 7.9870401e-3*T**2 - 46.170461e-6*T**3
+           + 105.56302e-9*T**4 - 280.54253e-12*T**5)
+    return num / (1.0 + 16.879850e-3*T)
+
+
+def viscosidad_vogel_agua(T_C):
+    """Viscosidad dinámica del agua (Pa·s), μ = 2.414e-5·10^(247.8/(T - 140)) con T en K."""
+    return 2.414e-5 * 10.0**(247.8 / (np.asarray(T_C, dtype=float) + 273.15 - 140.0))
+
+
+class Fluido:
+    """
+    Fluido con propiedades tabuladas en [T_min, T_max] (°C) cada paso_T.
+    antoine: tramos de antoine_Pa; rho, mu: funciones vectorizadas de T (°C).
+    """
+    def __init__(self, nombre, antoine, rho, mu, T_min=0.0, T_max=150.0, paso_T=0.05):
+        self.nombre = nombre
+        self.T = np.linspace(T_min, T_max, int(round((T_max - T_min) / paso_T)) + 1)
+        self._pv = antoine_Pa(self.T, antoine)
+        self._rho = np.asarray(rho(self.T), dtype=float)
+        self._nu = np.asarray(mu(self.T), dtype=float) / self._rho
+        self._dT = self.T[1] - self.T[0]
+
+    def _interp(self, T_C, tabla):
+        """Interpolación lineal en la malla uniforme: el índice se calcula, no se busca."""
+        x = np.clip((np.asarray(T_C, dtype=float) - self.T[0]) / self._dT, 0.0, self.T.size - 1)
+        i = np.minimum(x.astype(int), self.T.size - 2)
+        return tabla[i] + (x - i) * (tabla[i + 1] - tabla[i])
+
+    def pv(self, T_C):
+        """Presión de vapor (Pa)."""
+        return self._interp(T_C, self._pv)
+
+    def rho(self, T_C):
+        """Densidad (kg/m³)."""
+        return self._interp(T_C, self._rho)
+
+    def nu(self, T_C):
+        """Viscosidad cinemática (m²/s)."""
+        return self._interp(T_C, self._nu)
+
+    def s(self, T_C):
+        """Densidad relativa respecto al agua a 4 °C."""
+        return self.rho(T_C) / 1000.0
+
+    def pv_m(self, T_C):
+        """Presión de vapor en metros de columna del propio fluido a esa temperatura."""
+        return self.pv(T_C) / (self.rho(T_C) * G)
+
+
+AGUA = Fluido("Agua",
+              antoine=[(99.0, 8.07131, 1730.63, 233.426), (374.0, 8.14019, 1810.94, 244.485)],
+              rho=densidad_kell, mu=viscosidad_vogel_agua, T_min=0.0, T_max=150.0)
+
+ETANOL = Fluido("Etanol",
+                antoine=[(78.3, 8.20417, 1642.89, 230.300)],
+                rho=lambda T: 806.3 - 0.85*T,
+                mu=lambda T: 4.64e-6 * np.exp(1629.0 / (T + 273.15)),
+                T_min=0.0, T_max=78.0)
+
+FLUIDOS = {f.nombre: f for f in (AGUA, ETANOL)}
+
+
+def registrar_fluido(fluido):
+    """Añade un fluido definido por el usuario a FLUIDOS (p. ej. una salmuera o un aceite)."""
+    FLUIDOS[fluido.nombre] = fluido
+    return fluido
@@ -0,0 +1,372 @@
+# -*- coding: utf-8 -*-
+"""
+Resolución de redes hidráulicas (ramificadas o malladas) por el método del
+gradiente global (Todini-Pilati): Newton-Raphson sobre caudales y alturas con
+matrices dispersas de scipy.sparse.
+
+Elementos:
+- Nudos de consumo (altura desconocida, demanda en l/s, cota en m).
+- Depósitos de nivel fijo (altura piezométrica conocida).
+- Líneas entre dos nudos:
+    · tuberías: Hazen-Williams (rugosidad = C_HW) o Darcy-Weisbach/Colebrook
+      (rugosidad = ε en m), más pérdidas menores K·V²/2g;
+    · bombas: curva H(Q) tabulada en l/s (p.ej. Qb_ls/Hb_m) escalada con la
+      velocidad relativa por las leyes de semejanza;
+    · válvulas: hf = (Q[m³/h]/Kv)²·10/s, con Kv de las tablas de la válvula.
+
+Todo se guarda en arrays (uno por atributo, no un objeto por elemento). Las
+ramas en árbol se resuelven directamente por continuidad y Newton solo actúa
+sobre el núcleo mallado: ~10⁴ tuberías se resuelven en unas décimas de segundo
+y ~10⁵ en torno a un segundo (el coste lo marca la factorización dispersa).
+Convenio de signos: Q > 0 va del nudo 'desde' al nudo 'hasta'.
+"""
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import splu
+
+from friccion import factor_friccion, G
+
+HW = "HW"
+DW = "DW"
+
+TUBERIA, BOMBA, VALVULA = 0, 1, 2
+
+RQTOL = 1e-7        # gradiente mínimo dh/dQ (evita matrices singulares con Q≈0)
+R_CERRADA = 1e8     # resistencia de una línea cerrada (h = R·Q)
+
+
+class SolucionRed:
+    """Resultado de RedHidraulica.resolver() (arrays indexados como nudos y líneas)."""
+    def __init__(self, H, Q_lps, cota, iteraciones, convergido, error):
+        self.H = H                  # altura piezométrica de cada nudo (m)
+        self.Q_lps = Q_lps          # caudal de cada línea (l/s)
+        self.presion_m = H - cota   # presión en m.c.l.
+        self.iteraciones = iteraciones
+        self.convergido = convergido
+        self.error = error          # Σ|ΔQ| / Σ|Q| de la última iteración
+
+
+class _SistemaLineal:
+    """
+    Factorización LU dispersa de M (simétrica definida positiva) en cada
+    iteración de Newton. La ordenación que reduce el relleno solo depende de la
+    topología: se calcula en la primera factorización y después M se ensambla
+    ya permutada y se factoriza sin reordenar ni pivotar.
+    """
+    def __init__(self):
+        self.perm = None   # posición de cada incógnita en la numeración permutada
+
+    def resolver(self, M, b):
+        if self.perm is None:
+            lu = splu(M, permc_spec="MMD_AT_PLUS_A", options=dict(SymmetricMode=True))
+            self.perm = lu.perm_c
+            return lu.solve(b)
+        # panel_size=1: en grafos tan dispersos los paneles anchos de SuperLU solo añaden trabajo
+        lu = splu(M, permc_spec="NATURAL", options=dict(SymmetricMode=True, DiagPivotThresh=0.0),
+                  panel_size=1)
+        return lu.solve(b)
+
+
+class RedHidraulica:
+    """
+    Red con nudos (consumo o depósito) y líneas (tubería, bomba, válvula).
+    friccion: HW o DW (modelo de las tuberías); nu: viscosidad cinemática (m²/s);
+    s_rel: densidad relativa (pérdidas en válvulas, como en hf_valve_new).
+    """
+    def __init__(self, friccion=HW, nu=1e-6, s_rel=1.0):
+        if friccion not in (HW, DW):
+            raise ValueError(f"Modelo de fricción desconocido: {friccion}")
+        self.friccion = friccion
+        self.nu = nu
+        self.s_rel = s_rel
+        # Nudos
+        self._fijo = []      # bloques de arrays bool: True si es depósito
+        self._H0 = []        # altura fija (depósitos) o NaN
+        self._demanda = []   # l/s
+        self._cota = []      # m
+        self.nombres_nudos = {}
+        self.n_nudos = 0
+        # Líneas
+        self._tipo, self._desde, self._hasta = [], [], []
+        self._D, self._L, self._rug, self._km = [], [], [], []
+        self._Kv, self._vel, self._curva = [], [], []
+        self._abierta = []
+        self.curvas = []     # lista de (Q_lps, H_m) de las bombas
+        self.nombres_lineas = {}
+        self.n_lineas = 0
+        self._compilada = None
+
+    # -------------------- Construcción -------------------- #
+    def _nuevos_nudos(self, n, fijo, H0, demanda, cota, nombres):
+        i0 = self.n_nudos
+        idx = np.arange(i0, i0 + n)
+        self._fijo.append(np.full(n, fijo))
+        self._H0.append(np.broadcast_to(np.asarray(H0, dtype=float), (n,)).copy())
+        self._demanda.append(np.broadcast_to(np.asarray(demanda, dtype=float), (n,)).copy())
+        self._cota.append(np.broadcast_to(np.asarray(cota, dtype=float), (n,)).copy())
+        if nombres is not None:
+            self.nombres_nudos.update(zip(nombres, idx.tolist()))
+        self.n_nudos += n
+        self._compilada = None
+        return idx
+
+    def agregar_nudos(self, demanda_lps=0.0, cota=0.0, n=None, nombres=None):
+        """Añade nudos de consumo (escalares o arrays). Retorna sus índices."""
+        if n is None:
+            n = max(np.size(demanda_lps), np.size(cota), len(nombres) if nombres is not None else 1)
+        return self._nuevos_nudos(n, False, np.nan, demanda_lps, cota, nombres)
+
+    def agregar_depositos(self, H, nombres=None):
+        """Añade depósitos de nivel fijo con altura piezométrica H (m). Retorna sus índices."""
+        H = np.atleast_1d(np.asarray(H, dtype=float))
+        return self._nuevos_nudos(len(H), True, H, 0.0, H, nombres)
+
+    def indice(self, nudo):
+        """Índice de un nudo dado por nombre o por índice."""
+        return self.nombres_nudos[nudo] if isinstance(nudo, str) else int(nudo)
+
+    def _indices(self, nudos):
+        nudos = np.atleast_1d(nudos)
+        if nudos.dtype.kind in "iu":
+            return nudos.astype(np.int64)
+        return np.array([self.indice(x) for x in nudos], dtype=np.int64)
+
+    def _nuevas_lineas(self, tipo, desde, hasta, nombres, D=np.nan, L=np.nan, rug=np.nan,
+                       km=0.0, Kv=np.nan, vel=1.0, curva=-1, abierta=True):
+        desde, hasta = self._indices(desde), self._indices(hasta)
+        n = len(desde)
+        if len(hasta) != n:
+            raise ValueError("'desde' y 'hasta' deben tener la misma longitud.")
+        b = lambda v, dt=float: np.broadcast_to(np.asarray(v, dtype=dt), (n,)).copy()
+        self._tipo.append(np.full(n, tipo, dtype=np.int8))
+        self._desde.append(desde); self._hasta.append(hasta)
+        self._D.append(b(D)); self._L.append(b(L)); self._rug.append(b(rug)); self._km.append(b(km))
+        self._Kv.append(b(Kv)); self._vel.append(b(vel)); self._curva.append(b(curva, np.int64))
+        self._abierta.append(b(abierta, bool))
+        idx = np.arange(self.n_lineas, self.n_lineas + n)
+        if nombres is not None:
+            self.nombres_lineas.update(zip(nombres, idx.tolist()))
+        self.n_lineas += n
+        self._compilada = None
+        return idx
+
+    def agregar_tuberias(self, desde, hasta, D_m, L_m, rugosidad, km=0.0, abierta=True, nombres=None):
+        """Tuberías (arrays o escalares). rugosidad: C_HW (HW) o ε en m (DW)."""
+        return self._nuevas_lineas(TUBERIA, desde, hasta, nombres, D=D_m, L=L_m, rug=rugosidad,
+                                   km=km, abierta=abierta)
+
+    def agregar_bomba(self, desde, hasta, Q_lps, H_m, velocidad=1.0, abierta=True, nombre=None):
+        """Bomba de 'desde' (aspiración) a 'hasta' (impulsión) con curva tabulada H(Q)."""
+        Q_lps = np.asarray(Q_lps, dtype=float); H_m = np.asarray(H_m, dtype=float)
+        if Q_lps.ndim != 1 or len(Q_lps) < 2 or len(Q_lps) != len(H_m):
+            raise ValueError("La curva de la bomba necesita al menos dos puntos (Q, H).")
+        self.curvas.append((Q_lps, H_m))
+        return self._nuevas_lineas(BOMBA, desde, hasta, None if nombre is None else [nombre],
+                                   vel=velocidad, curva=len(self.curvas) - 1, abierta=abierta)
+
+    def agregar_valvulas(self, desde, hasta, Kv, km=0.0, D_m=np.nan, abierta=True, nombres=None):
+        """Válvulas con coeficiente Kv (m³/h con 1 bar); Kv≈0 equivale a cerrada."""
+        return self._nuevas_lineas(VALVULA, desde, hasta, nombres, D=D_m, Kv=Kv, km=km, abierta=abierta)
+
+    # -------------------- Compilación a arrays -------------------- #
+    def _compilar(self):
+        if self._compilada is not None:
+            return self._compilada
+        cat = lambda l, dt=float: np.concatenate(l) if l else np.zeros(0, dtype=dt)
+        fijo = cat(self._fijo, bool)
+        c = dict(
+            fijo=fijo, H0=cat(self._H0), demanda=cat(self._demanda) / 1000.0, cota=cat(self._cota),
+            tipo=cat(self._tipo, np.int8), desde=cat(self._desde, np.int64), hasta=cat(self._hasta, np.int64),
+            D=cat(self._D), L=cat(self._L), rug=cat(self._rug), km=cat(self._km),
+            Kv=cat(self._Kv), vel=cat(self._vel), curva=cat(self._curva, np.int64),
+            abierta=cat(self._abierta, bool),
+        )
+        if not fijo.any():
+            raise ValueError("La red necesita al menos un depósito de nivel fijo.")
+        self._particion_bosque(c)
+        # Numeración de incógnitas: solo nudos de consumo del núcleo mallado
+        libre = c["nucleo_nudo"] & ~fijo
+        c["n_libres"] = int(libre.sum())
+        c["col"] = np.where(libre, np.cumsum(libre) - 1, -1)
+
+        tipo = c["tipo"]
+        tub = tipo == TUBERIA
+        # Coeficientes constantes de cada línea: h = r·|Q|^(n-1)·Q (+ menores)
+        A = np.pi * c["D"]**2 / 4.0
+        c["A"] = A
+        c["r_hw"] = np.where(tub, 10.67 * c["L"] / (c["rug"]**1.852 * c["D"]**4.87), 0.0) if self.friccion == HW \
+            else np.zeros(len(tipo))
+        c["r_menor"] = np.where(np.isfinite(A) & (c["km"] > 0), c["km"] / (2.0 * G * np.where(np.isfinite(A), A, 1.0)**2), 0.0)
+        Kv = c["Kv"]
+        val = tipo == VALVULA
+        c["r_val"] = np.where(val & (Kv > 1e-6), (10.0 / self.s_rel) * 3600.0**2 / np.where(Kv > 1e-6, Kv, 1.0)**2, 0.0)
+        c["cerrada"] = ~c["abierta"] | (val & ~(Kv > 1e-6))
+        # Pendientes de las curvas de bomba (tramos) en unidades SI
+        c["curvas_si"] = [(Q / 1000.0, H) for Q, H in self.curvas]
+        self._compilada = c
+        return c
+
+    def _particion_bosque(self, c):
+        """
+        Separa el bosque (ramas en árbol) del núcleo mallado podando hojas por
+        niveles. En el bosque el caudal sale directamente de la continuidad
+        (demanda acumulada aguas abajo) y la altura se obtiene al final
+        recorriendo los niveles hacia atrás, así que Newton y la matriz dispersa
+        solo trabajan con el núcleo. Para localizar la única línea viva de una
+        hoja se guarda, por nudo, el XOR de los índices de sus líneas vivas.
+        """
+        fijo, i, j = c["fijo"], c["desde"], c["hasta"]
+        n, nl = len(fijo), len(i)
+        e_idx = np.arange(nl, dtype=np.int64)
+        grado = np.bincount(i, minlength=n) + np.bincount(j, minlength=n)
+        xor = np.zeros(n, dtype=np.int64)
+        np.bitwise_xor.at(xor, i, e_idx); np.bitwise_xor.at(xor, j, e_idx)
+        acum = c["demanda"].copy()
+        vivo = np.ones(n, dtype=bool)
+        bosque = np.zeros(nl, dtype=bool)
+        niveles = []
+        candidatos = np.arange(n)
+        while len(candidatos):
+            hojas = candidatos[vivo[candidatos] & ~fijo[candidatos] & (grado[candidatos] == 1)]
+            if not len(hojas):
+                break
+            e = xor[hojas]
+            m = i[e] ^ j[e] ^ hojas
+            # Dos hojas unidas entre sí (componente sin depósito): solo se poda una
+            ok = ~((grado[m] == 1) & ~fijo[m] & (hojas < m))
+            hojas, e, m = hojas[ok], e[ok], m[ok]
+            vivo[hojas] = False
+            bosque[e] = True
+            grado[hojas] = 0
+            acum += np.bincount(m, weights=acum[hojas], minlength=n)
+            grado -= np.bincount(m, minlength=n)
+            np.bitwise_xor.at(xor, m, e)
+            niveles.append((hojas, e, m))
+            candidatos = np.unique(m)
+        # Caudal del bosque: la demanda acumulada de la hoja, con signo según el sentido de la línea
+        Q_bosque = np.zeros(nl)
+        for hojas, e, m in niveles:
+            Q_bosque[e] = np.where(j[e] == hojas, acum[hojas], -acum[hojas])
+        c.update(bosque=bosque, niveles=niveles, Q_bosque=Q_bosque, demanda_nucleo=acum, nucleo_nudo=vivo)
+
+    # -------------------- Pérdidas y derivadas -------------------- #
+    def _perdidas(self, c, Q):
+        """h(Q) y g = dh/dQ de cada línea (Q en m³/s). Las bombas dan h = -ganancia."""
+        aQ = np.abs(Q)
+        h = np.zeros_like(Q); g = np.zeros_like(Q)
+        tub = c["tipo"] == TUBERIA
+        if self.friccion == HW:
+            r = c["r_hw"][tub]
+            h[tub] = r * aQ[tub]**0.852 * Q[tub]
+            g[tub] = 1.852 * r * aQ[tub]**0.852
+        else:
+            D, L = c["D"][tub], c["L"][tub]
+            Re = aQ[tub] / c["A"][tub] * D / self.nu
+            eps_rel = c["rug"][tub] / D
+            f = factor_friccion(Re, eps_rel)
+            # df/dln(Re) por diferencias: con ella dh/dQ = C·|Q|·(2f + df/dlnRe) es exacta
+            # (en laminar h resulta lineal en Q) y Newton mantiene la convergencia cuadrática
+            df = (factor_friccion(Re * (1.0 + 1e-6), eps_rel) - f) / 1e-6
+            C = 8.0 * L / (G * np.pi**2 * D**5)
+            h[tub] = C * f * aQ[tub] * Q[tub]
+            g[tub] = C * aQ[tub] * (2.0*f + df)
+        # Pérdidas menores y válvulas: r·|Q|·Q
+        r2 = c["r_menor"] + c["r_val"]
+        h += r2 * aQ * Q
+        g += 2.0 * r2 * aQ
+        # Bombas: H = ω²·Hc(Q/ω); tramos lineales con extrapolación del primero/último
+        for k, (Qc, Hc) in enumerate(c["curvas_si"]):
+            m = c["curva"] == k
+            if not m.any():
+                continue
+            w = c["vel"][m]
+            q = Q[m] / np.maximum(w, 1e-9)
+            i = np.clip(np.searchsorted(Qc, q) - 1, 0, len(Qc) - 2)
+            pend = (Hc[i+1] - Hc[i]) / (Qc[i+1] - Qc[i])
+            ganancia = w**2 * (Hc[i] + pend * (q - Qc[i]))
+            h[m] = -ganancia
+            g[m] = -w * pend
+        # Líneas cerradas y regularización de gradientes nulos
+        cerr = c["cerrada"] | ((c["tipo"] == BOMBA) & (c["vel"] <= 0))
+        h[cerr] = R_CERRADA * Q[cerr]; g[cerr] = R_CERRADA
+        peq = g < RQTOL
+        g[peq] = RQTOL
+        h[peq & ~(c["tipo"] == BOMBA)] = RQTOL * Q[peq & ~(c["tipo"] == BOMBA)]
+        return h, g
+
+    # -------------------- Gradiente global -------------------- #
+    def resolver(self, tol=1e-4, itmax=100, Q0_lps=None):
+        """
+        Newton-Raphson del gradiente global sobre el núcleo mallado:
+            [A·diag(1/g)·Aᵀ]·H = A·(Q - h/g) - A·diag(1/g)·A0ᵀ·H0 - d
+            Q ← Q - (h - ΔH)/g
+        donde A es la incidencia línea-nudo de los nudos de consumo y A0 la de
+        los depósitos. Converge cuando Σ|ΔQ|/Σ|Q| < tol en el núcleo (EPANET usa
+        1e-3 por defecto); después se reconstruyen las alturas del bosque.
+        """
+        c = self._compilar()
+        nlib = c["n_libres"]
+        fijo, bosque = c["fijo"], c["bosque"]
+        i, j = c["desde"], c["hasta"]
+        nuc = ~bosque
+        H = np.where(fijo, c["H0"], 0.0)
+        libres = np.flatnonzero(c["col"] >= 0)
+        d = c["demanda_nucleo"][libres]
+
+        if Q0_lps is not None:
+            Q = np.asarray(Q0_lps, dtype=float) / 1000.0
+        else:
+            # Arranque: 1 m/s en tuberías/válvulas con diámetro, punto medio de la curva en bombas
+            A = np.where(np.isfinite(c["A"]), c["A"], 0.01)
+            Q = A * 1.0
+            for k, (Qc, _) in enumerate(c["curvas_si"]):
+                m = c["curva"] == k
+                Q[m] = 0.5 * (Qc[0] + Qc[-1]) * c["vel"][m]
+        Q = np.where(bosque, c["Q_bosque"], Q)
+
+        # Solo líneas del núcleo; sus extremos son nudos del núcleo o depósitos
+        e = np.flatnonzero(nuc)
+        ie, je = i[e], j[e]
+        ci, cj = c["col"][ie], c["col"][je]
+        li, lj = ci >= 0, cj >= 0
+        H0i = np.where(fijo[ie], c["H0"][ie], 0.0)
+        H0j = np.where(fijo[je], c["H0"][je], 0.0)
+        lineal = _SistemaLineal()
+        convergido, error, it = len(e) == 0, 0.0, 0
+        while not convergido and it < itmax:
+            it += 1
+            h, g = self._perdidas(c, Q)
+            y = 1.0 / g[e]
+            ambos = li & lj
+            # Matriz del sistema (nlib × nlib), simétrica y definida positiva
+            diag = np.bincount(ci[li], weights=y[li], minlength=nlib) + \
+                   np.bincount(cj[lj], weights=y[lj], minlength=nlib)
+            filas = np.concatenate([np.arange(nlib), ci[ambos], cj[ambos]])
+            cols = np.concatenate([np.arange(nlib), cj[ambos], ci[ambos]])
+            vals = np.concatenate([diag, -y[ambos], -y[ambos]])
+            M = sp.csc_matrix((vals, (filas, cols)), shape=(nlib, nlib))
+            # Término independiente: entra por 'hasta' (+) y sale por 'desde' (-)
+            u = Q[e] - h[e]*y + y*(H0i - H0j)
+            rhs = np.bincount(cj[lj], weights=u[lj], minlength=nlib) - \
+                  np.bincount(ci[li], weights=u[li], minlength=nlib) - d
+            if nlib:
+                H[libres] = lineal.resolver(M, rhs)
+                if it == 1:
+                    # Se renumeran las incógnitas con la ordenación de la primera factorización
+                    perm = lineal.perm
+                    ci = np.where(li, perm[np.maximum(ci, 0)], -1)
+                    cj = np.where(lj, perm[np.maximum(cj, 0)], -1)
+                    d = d[np.argsort(perm)]
+                    libres = libres[np.argsort(perm)]
+            Q_nuevo = Q[e] - (h[e] - (H[ie] - H[je])) * y
+            error = np.abs(Q_nuevo - Q[e]).sum() / max(np.abs(Q_nuevo).sum(), 1e-12)
+            Q[e] = Q_nuevo
+            convergido = error < tol
+
+        # Alturas del bosque, del núcleo hacia las hojas
+        if c["niveles"]:
+            h, _ = self._perdidas(c, Q)
+            for hojas, eb, m in reversed(c["niveles"]):
+                H[hojas] = np.where(i[eb] == m, H[m] - h[eb], H[m] + h[eb])
+        return SolucionRed(H, Q * 1000.0, c["cota"], it, convergido, error)
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Cadena de rendimientos de la red al agua: bomba, motor y variador de frecuencia.
+
+    P_eléctrica = P_eje / (η_motor(carga) · η_variador(n/n0, par))
+
+- Motor: η en función de la carga P_eje/P_nominal (tabla del fabricante o la de un
+  motor IE3 típico). Por debajo de la primera carga tabulada se mantiene el extremo.
+- Variador: mapa η(n/n0, par relativo) en una malla (velocidades × pares), como los
+  puntos de pérdidas de la IEC 61800-9-2; el par relativo es carga/(n/n0).
+  Sin variador (arranque directo) η_variador = 1.
+Las tablas se leen de CSV y se interpolan vectorizadas (lineal y bilineal), así que
+un barrido o una serie de un año de puntos de funcionamiento es una sola llamada.
+"""
+
+import numpy as np
+
+# Motor IE3 de 4 polos típico (15-45 kW): η frente a la carga P_eje/P_nominal
+CARGA_MOTOR = np.array([0.10, 0.25, 0.50, 0.75, 1.00, 1.25])
+ETA_MOTOR_IE3 = np.array([0.700, 0.880, 0.920, 0.932, 0.930, 0.922])
+
+# Variador típico: filas = n/n0, columnas = par relativo
+VEL_VARIADOR = np.array([0.25, 0.50, 0.75, 0.90, 1.00])
+PAR_VARIADOR = np.array([0.25, 0.50, 0.75, 1.00])
+ETA_VARIADOR = np.array([[0.800, 0.865, 0.895, 0.910],
+                         [0.880, 0.925, 0.943, 0.952],
+                         [0.910, 0.945, 0.958, 0.965],
+                         [0.920, 0.952, 0.963, 0.970],
+                         [0.925, 0.955, 0.966, 0.972]])
+
+# Potencias normalizadas IEC de motores (kW)
+POTENCIAS_IEC_KW = np.array([0.75, 1.1, 1.5, 2.2, 3.0, 4.0, 5.5, 7.5, 11.0, 15.0, 18.5, 22.0, 30.0,
+                             37.0, 45.0, 55.0, 75.0, 90.0, 110.0, 132.0, 160.0, 200.0, 250.0, 315.0])
+
+
+def motor_normalizado(P_eje_max_kW, margen=1.15):
+    """Menor potencia IEC que cubre P_eje_max·margen (el mismo margen que el arranque de Problema 1)."""
+    i = np.searchsorted(POTENCIAS_IEC_KW, margen * float(P_eje_max_kW) - 1e-9)
+    return float(POTENCIAS_IEC_KW[min(i, POTENCIAS_IEC_KW.size - 1)])
+
+
+def _tramo(x, xp):
+    """Índice del tramo y peso lineal de x en la malla xp (x limitado a la malla)."""
+    x = np.clip(x, xp[0], xp[-1])
+    i = np.clip(np.searchsorted(xp, x, side="right") - 1, 0, xp.size - 2)
+    return i, (x - xp[i]) / (xp[i + 1] - xp[i])
+
+
+class Motor:
+    """Motor de P_nom_kW con η(carga) tabulada (cargas en tanto por uno, crecientes)."""
+    def __init__(self, P_nom_kW, carga=CARGA_MOTOR, eta=ETA_MOTOR_IE3):
+        self.P_nom_kW = float(P_nom_kW)
+        self.carga = np.asarray(carga, dtype=float)
+        self.eta_tab = np.asarray(eta, dtype=float)
+
+    def eta(self, P_eje_kW):
+        return np.interp(np.asarray(P_eje_kW, dtype=float) / self.P_nom_kW, self.carga, self.eta_tab)
+
+    @classmethod
+    def desde_csv(cls, path, P_nom_kW):
+        """CSV de dos columnas: carga (tanto por uno o %) y η (tanto por uno o %)."""
+        t = np.loadtxt(path, delimiter=",", ndmin=2, comments="#")
+        carga, eta = t[:, 0], t[:, 1]
+        carga = carga / 100.0 if carga.max() > 3.0 else carga
+        eta = eta / 100.0 if eta.max() > 1.0 else eta
+        orden = np.argsort(carga)
+        return cls(P_nom_kW, carga[orden], eta[orden])
+
+
+class Variador:
+    """Mapa η(n/n0, par relativo) en una malla; fuera de ella se mantiene el borde."""
+    def __init__(self, velocidad=VEL_VARIADOR, par=PAR_VARIADOR, eta=ETA_VARIADOR):
+        self.velocidad = np.asarray(velocidad, dtype=float)
+        self.par = np.asarray(par, dtype=float)
+        self.eta_tab = np.asarray(eta, dtype=float)
+
+    def eta(self, n_rel, par_rel):
+        i, wi = _tramo(np.asarray(n_rel, dtype=float), self.velocidad)
+        j, wj = _tramo(np.asarray(par_rel, dtype=float), self.par)
+        F = self.eta_tab
+        return ((1 - wi) * ((1 - wj) * F[i, j] + wj * F[i, j + 1])
+                + wi * ((1 - wj) * F[i + 1, j] + wj * F[i + 1, j + 1]))
+
+    @classmethod
+    def desde_csv(cls, path):
+        """
+        CSV en forma de matriz: la primera fila son los pares relativos (tras una celda
+        vacía o cualquier número), la primera columna las velocidades n/n0 y el resto η.
+        Velocidades y pares en tanto por uno o en %; η en tanto por uno o en %.
+        """
+        t = np.genfromtxt(path, delimiter=",", comments="#")
+        vel, par, eta = t[1:, 0], t[0, 1:], t[1:, 1:]
+        vel = vel / 100.0 if vel.max() > 3.0 else vel
+        par = par / 100.0 if par.max() > 3.0 else par
+        eta = eta / 100.0 if np.nanmax(eta) > 1.0 else eta
+        return cls(vel, par, eta)
+
+
+class CadenaElectrica:
+    """Motor y, opcionalmente, variador; todo vectorizado sobre puntos de funcionamiento."""
+    def __init__(self, motor, variador=None):
+        self.motor = motor
+        self.variador = variador
+
+    def rendimiento(self, P_eje_kW, n_rel=1.0):
+        """η_motor·η_variador para la potencia en el eje (kW) y la velocidad relativa."""
+        P = np.asarray(P_eje_kW, dtype=float)
+        eta = self.motor.eta(P)
+        if self.variador is not None:
+            n = np.maximum(np.asarray(n_rel, dtype=float), 1e-3)
+            eta = eta * self.variador.eta(n, P / self.motor.P_nom_kW / n)
+        return eta
+
+    def P_electrica(self, P_eje_kW, n_rel=1.0):
+        """Potencia tomada de la red (kW); 0 con la bomba parada y NaN donde P_eje es NaN."""
+        P = np.asarray(P_eje_kW, dtype=float)
+        return np.where(P > 0.0, P / np.maximum(self.rendimiento(P, n_rel), 1e-6), np.where(np.isnan(P), np.nan, 0.0))
+
+    def kWh_m3(self, P_eje_kW, Q_lps, n_rel=1.0):
+        """Energía eléctrica específica (kWh/m³); NaN sin caudal."""
+        Q_m3h = np.asarray(Q_lps, dtype=float) * 3.6
+        return np.where(Q_m3h > 0.0, self.P_electrica(P_eje_kW, n_rel) / np.where(Q_m3h > 0.0, Q_m3h, 1.0), np.nan)
+
+    def resumen(self):
+        txt = f"motor {self.motor.P_nom_kW:g} kW"
+        return txt + (" con variador" if self.variador is not None else " (arranque directo)")
+
+
+def clave_tablas(tabla_motor, variador=None):
+    """Clave de caché por el contenido de las tablas (no por la identidad de los objetos)."""
+    clave = tuple(np.asarray(v, dtype=float).tobytes() for v in tabla_motor)
+    if variador is not None:
+        clave += tuple(v.tobytes() for v in (variador.velocidad, variador.par, variador.eta_tab))
+    return clave
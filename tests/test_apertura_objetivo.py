@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""Problema inverso de la válvula con altura objetivo fuera de la curva de la bomba."""
+
+import numpy as np
+
+from Problema_1 import apertura_objetivo, Hb_m
+
+K_LPS = 2e-3      # instalación de Hazen-Williams (hf = k·Q^1.852)
+DELTA_Z = 10.0
+
+
+def test_altura_objetivo_alcanzable():
+    r = apertura_objetivo(K_LPS, 1.0, 150.0, DELTA_Z, H_obj=30.0)
+    assert r["alcanzable"]
+    assert np.isclose(r["H"], 30.0)
+    assert 0.0 < r["theta"] <= 90.0
+
+
+def test_altura_por_encima_de_la_de_cierre():
+    r = apertura_objetivo(K_LPS, 1.0, 150.0, DELTA_Z, H_obj=Hb_m.max() + 7.0)
+    assert not r["alcanzable"]
+    assert np.isnan(r["theta"]) and np.isnan(r["Kv"])
+
+
+def test_altura_por_debajo_de_la_curva():
+    r = apertura_objetivo(K_LPS, 1.0, 150.0, DELTA_Z, H_obj=Hb_m.min() - 1.0)
+    assert not r["alcanzable"]
+    assert np.isnan(r["theta"])
+
+
+def test_rejilla_mezcla_alcanzables_y_no():
+    H_obj = np.array([45.0, 30.0, -1.0])
+    r = apertura_objetivo(K_LPS, 1.0, np.array([100.0, 150.0])[None, :], DELTA_Z, H_obj=H_obj[:, None])
+    assert r["alcanzable"].shape == (3, 2)
+    assert not r["alcanzable"][0].any() and not r["alcanzable"][2].any()
+    assert r["alcanzable"][1].all()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""Lectura de un .inp pequeño: secciones, [DEMANDS], [STATUS] y alturas resueltas."""
+
+import numpy as np
+
+from epanet_inp import leer_inp, NUDO_CONSUMO, NUDO_EMBALSE
+
+INP = """
+[TITLE]
+Prueba
+
+[JUNCTIONS]
+;ID  Cota  Demanda
+J1   5     0
+J2   2     10
+J3   0     4
+
+[RESERVOIRS]
+R    100
+
+[PIPES]
+;ID  N1  N2  L     D    C
+P1   J1  J2  500   200  120
+P2   J1  J3  800   150  120
+P3   J2  J3  300   100  120
+
+[PUMPS]
+B1   R   J1  HEAD C1
+
+[CURVES]
+C1   0   60
+C1   10  55
+C1   20  45
+C1   30  30
+
+[DEMANDS]
+J2   5
+J2   3
+
+[STATUS]
+P3   Closed
+
+[OPTIONS]
+Units     LPS
+Headloss  H-W
+
+[END]
+"""
+
+
+def _r_hw(D, L, C):
+    return 10.67 * L / (C**1.852 * D**4.87)
+
+
+def test_lectura_y_resolucion(tmp_path):
+    ruta = tmp_path / "red.inp"
+    ruta.write_text(INP, encoding="utf-8")
+    m = leer_inp(ruta)
+    assert m.avisos == []
+    assert m.nudos["id"] == ["J1", "J2", "J3", "R"]
+    assert list(m.nudos["tipo"]) == [NUDO_CONSUMO] * 3 + [NUDO_EMBALSE]
+    assert np.allclose(m.nudos["cota"], [5.0, 2.0, 0.0, 100.0])
+    # [DEMANDS] sustituye la demanda de J2 en [JUNCTIONS] y suma sus categorías
+    assert np.allclose(m.demandas_lps(), [0.0, 8.0, 4.0, 0.0])
+    assert np.allclose(m.tuberias["diametro"], [0.2, 0.15, 0.1])
+    assert list(m.tuberias["abierta"]) == [True, True, False]
+    assert list(m.bombas["n1"]) == [3] and list(m.bombas["n2"]) == [0]
+    Qc, Hc = m.curva_bomba(0)
+    assert np.allclose(Qc, [0, 10, 20, 30]) and np.allclose(Hc, [60, 55, 45, 30])
+
+    sol = m.a_red().resolver(tol=1e-10)
+    assert sol.convergido and m.avisos_red == []
+    # Con P3 cerrada la red es un árbol: la bomba da los 12 l/s de demanda
+    H1 = 100.0 + np.interp(12.0, Qc, Hc)
+    H2 = H1 - _r_hw(0.2, 500.0, 120.0) * 0.008**1.852
+    H3 = H1 - _r_hw(0.15, 800.0, 120.0) * 0.004**1.852
+    assert np.allclose(sol.Q_lps[:2], [8.0, 4.0], atol=1e-6)
+    assert np.allclose(sol.H, [H1, H2, H3, 100.0], atol=1e-5)
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""Derivada analítica de las pérdidas de Darcy-Weisbach/Colebrook."""
+
+import numpy as np
+
+from friccion import TuberiasSerieDW, factor_friccion, factor_friccion_y_derivada
+
+
+def test_derivada_de_f_en_todos_los_regimenes():
+    Re = np.array([500.0, 1999.0, 2500.0, 3500.0, 4001.0, 1e4, 1e6])
+    f, df = factor_friccion_y_derivada(Re, 1e-3)
+    assert np.array_equal(f, factor_friccion(Re, 1e-3))
+    h = 1e-7
+    df_num = (factor_friccion(Re * (1 + h), 1e-3) - factor_friccion(Re * (1 - h), 1e-3)) / (2 * h)
+    assert np.allclose(df, df_num, rtol=1e-6)
+
+
+def test_dhf_frente_a_diferencias():
+    for nu in (1e-6, 3e-4, 1e-3):     # turbulento, transición y laminar en parte del rango
+        t = TuberiasSerieDW([0.2, 0.15], [200.0, 500.0], 1e-4, nu)
+        q = np.array([0.5, 5.0, 20.0, 40.0, 60.0])
+        h = 1e-5 * q
+        dh_num = (t.hf(q + h) - t.hf(q - h)) / (2 * h)
+        assert np.allclose(t.dhf(q), dh_num, rtol=1e-7)
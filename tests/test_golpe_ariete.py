@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""Cierre instantáneo en depósito-tubería-válvula: Joukowsky y periodo 4L/a."""
+
+import numpy as np
+
+from golpe_ariete import cierre_valvula_moc, G
+
+
+def test_cierre_instantaneo_sin_friccion():
+    L, D, a, H = 1000.0, 0.5, 1000.0, 100.0
+    A = np.pi * D**2 / 4.0
+    V0 = 1.0
+    # Válvula sin pérdidas en t = 0 y cerrada después; depósito aguas arriba (sin retención)
+    ley = lambda t: np.where(t > 0.0, np.inf, 0.0)
+    r = cierre_valvula_moc(L, D, a, 0.0, V0 * A, H, (H, 0.0, 0.0), ley, 4.5 * 4.0 * L / a,
+                           n_tramos=200, retencion=False)
+    dH = a * V0 / G
+    assert np.isclose(r.joukowsky, dH)
+    assert np.isclose(r.H_valvula[1], H + dH, rtol=1e-9)
+    assert np.isclose(r.sobrepresion_max, dH, rtol=1e-9)
+    assert np.isclose(r.depresion_max, dH, rtol=1e-9)
+    # La altura en la válvula alterna H ± ΔH cada 2L/a: periodo 4L/a
+    baja = np.flatnonzero(np.diff(np.sign(r.H_valvula - H)) < 0)
+    assert np.allclose(np.diff(r.t[baja]), 4.0 * L / a)
+    # La onda reflejada en el depósito llega a la válvula en 2L/a (con la resolución de un paso)
+    assert abs(r.t[baja[0] + 1] - 2.0 * L / a) <= r.t[1] * 1.0001
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""Todas las raíces bomba-instalación: dos cruces, tangencia, ninguna y el caso normal."""
+
+import numpy as np
+
+from intersecciones import intersecciones
+
+# Bomba con joroba: máximo H = 43.125 m en Q = 12.5 l/s (punto de la tabla)
+QB = np.arange(0.0, 51.0, 2.5)
+HB = 40.0 + 0.5 * QB - 0.02 * QB**2
+
+
+def _raices_lineales(c):
+    """Cortes de la bomba lineal a tramos con la horizontal H = c."""
+    i = np.flatnonzero((HB[:-1] - c) * (HB[1:] - c) < 0.0)
+    return QB[i] + (c - HB[i]) / (HB[i+1] - HB[i]) * (QB[i+1] - QB[i])
+
+
+def test_cruces_tangencia_y_ninguna():
+    # Filas: instalación plana a 41 m (dos cruces), a 43.125 m (tangente), a 50 m (ninguna)
+    # y una instalación normal 10 + 0.02·Q² (un único punto estable)
+    C = np.array([41.0, 43.125, 50.0, 10.0])
+    k = np.array([0.0, 0.0, 0.0, 0.02])
+    r = intersecciones(QB, HB, lambda q: C[:, None] + k[:, None] * q**2)
+    assert list(r.n) == [2, 1, 0, 1]
+
+    # Dos cruces: el de la rama ascendente es inestable, el de la descendente estable
+    esperado = _raices_lineales(41.0)
+    assert np.allclose(r.Q[0, :2], esperado, atol=1e-7)
+    assert list(r.estable[0, :2]) == [False, True]
+    assert not r.tangente[0, :2].any()
+    assert np.allclose(r.H[0, :2], 41.0, atol=1e-6)
+
+    # Tangencia en la cresta: marginal, ni estable ni cruce
+    assert np.isclose(r.Q[1, 0], 12.5, atol=1e-6)
+    assert r.tangente[1, 0] and not r.estable[1, 0]
+
+    assert np.isnan(r.Q[2]).all()
+
+    q = r.Q[3, 0]
+    assert np.isclose(np.interp(q, QB, HB), 10.0 + 0.02 * q**2, atol=1e-6)
+    assert r.estable[3, 0]
+
+    pe = r.primera_estable()
+    assert np.isclose(pe[0], esperado[1], atol=1e-7)
+    assert np.isnan(pe[1]) and np.isnan(pe[2])
+    assert np.isclose(pe[3], q)
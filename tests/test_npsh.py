@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""Problema 3: caudal máximo sin cavitación y años hasta cavitar."""
+
+import numpy as np
+
+from Problema_3 import (Q_max_sin_cavitacion, anios_hasta_cavitacion, npsh_disp, npsh_req,
+                        patm_bar_from_z, pv_bar_from_T, Q_MIN_LS, Q_MAX_LS)
+
+
+def _q_max_barrido(Z_D, T, z, anios, seg, n=200001):
+    """Mayor Q de una rejilla fina con NPSH_disp ≥ NPSH_req + NPSH_seg (NaN si ninguno)."""
+    q = np.linspace(Q_MIN_LS, Q_MAX_LS, n)
+    ok = npsh_disp(patm_bar_from_z(z), pv_bar_from_T(T), z, Z_D, q, anios) >= npsh_req(q) + seg
+    return q[np.flatnonzero(ok)[-1]] if ok.any() else np.nan
+
+
+def test_q_max_frente_a_barrido():
+    Z_D = np.linspace(2.0, 8.0, 7)[:, None]
+    T = np.array([5.0, 20.0, 40.0, 60.0])
+    z, anios, seg = 300.0, 10.0, 0.5
+    Q = Q_max_sin_cavitacion(Z_D + z, T, z, anios, npsh_seg_m=seg)
+    assert Q.shape == (7, 4)
+    interiores = 0
+    for i in range(7):
+        for j in range(4):
+            ref = _q_max_barrido(Z_D[i, 0] + z, T[j], z, anios, seg)
+            if np.isnan(ref):
+                assert np.isnan(Q[i, j])
+                continue
+            assert abs(Q[i, j] - ref) <= (Q_MAX_LS - Q_MIN_LS) / 200000 + 1e-9
+            interiores += Q_MIN_LS < ref < Q_MAX_LS
+    assert interiores >= 10
+
+
+def test_q_max_todo_seguro_y_cavita_al_minimo():
+    Q = Q_max_sin_cavitacion(np.array([-20.0, 30.0]), 20.0, 0.0, 5.0)
+    assert Q[0] == Q_MAX_LS
+    assert np.isnan(Q[1])
+
+
+def test_anios_hasta_cavitacion():
+    Q = np.array([14.0, 18.0, 22.0, 26.0, 28.0, 30.0])
+    patm, pv = patm_bar_from_z(0.0), pv_bar_from_T(20.0)
+    Z_a, Z_D, seg = 0.0, 3.8, 0.5
+    anios = anios_hasta_cavitacion(Q, patm, pv, Z_a, Z_D, seg)
+    pos = anios > 0
+    assert pos.any() and (~pos).any()
+    disp = npsh_disp(patm, pv, Z_a, Z_D, Q[pos], anios[pos])
+    assert np.allclose(disp, npsh_req(Q[pos]) + seg, atol=1e-9)
+    # Con la tubería nueva ya no se cumple: 0 años
+    assert np.all(npsh_disp(patm, pv, Z_a, Z_D, Q[~pos], 0.0) <= npsh_req(Q[~pos]) + seg)
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""Programación horaria: un día factible cumple el objetivo con los caudales exactos."""
+
+import numpy as np
+
+from programacion_tarifas import programar_horas, programar_volumen, tarifa_tres_periodos
+
+
+def test_volumen_exacto_no_queda_por_debajo_del_objetivo():
+    p = programar_volumen(np.full(24, 0.1), [48.5], [10.0], 1000.0)
+    assert p.factible.all()
+    assert p.volumen_m3[0] >= 1000.0
+
+
+def test_volumen_con_varias_opciones_y_tarifa():
+    precios = tarifa_tres_periodos(0.30, 0.20, 0.10, n_dias=7)
+    p = programar_volumen(precios, [37.3, 52.9], [9.1, 15.4], 800.0)
+    assert p.factible.all()
+    assert np.all(p.volumen_m3 >= 800.0)
+
+
+def test_horas_exactas():
+    p = programar_horas(tarifa_tres_periodos(0.30, 0.20, 0.10, n_dias=3), [12.0], 10)
+    assert np.all(p.horas_marcha == 10)
+
+
+def test_cero_horas_todo_parada():
+    p = programar_horas(tarifa_tres_periodos(0.30, 0.20, 0.10, n_dias=2), [12.0], 0)
+    assert p.factible.all()
+    assert np.all(p.opcion == 0)
+    assert np.all(p.coste == 0.0)
+    assert p.etiquetas[0] == "Parada"
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""Gradiente global: casos con solución cerrada y continuidad en los nudos."""
+
+import numpy as np
+from scipy.optimize import brentq
+
+from red_hidraulica import RedHidraulica, HW, DW
+
+
+def _r_hw(D, L, C):
+    return 10.67 * L / (C**1.852 * D**4.87)
+
+
+def _residuo_continuidad(red, sol):
+    """Entradas - salidas - demanda (m³/s) en los nudos de consumo."""
+    c = red._compilar()
+    Q = sol.Q_lps / 1000.0
+    neto = np.bincount(c["hasta"], weights=Q, minlength=red.n_nudos) - \
+           np.bincount(c["desde"], weights=Q, minlength=red.n_nudos) - c["demanda"]
+    return np.abs(neto[~c["fijo"]]).max()
+
+
+def test_tuberias_en_serie():
+    red = RedHidraulica(friccion=HW)
+    red.agregar_depositos([50.0, 0.0], nombres=["A", "B"])
+    red.agregar_nudos(nombres=["J"])
+    red.agregar_tuberias(["A", "J"], ["J", "B"], [0.3, 0.2], [800.0, 500.0], [120.0, 130.0])
+    sol = red.resolver(tol=1e-10)
+    r = _r_hw(0.3, 800.0, 120.0) + _r_hw(0.2, 500.0, 130.0)
+    Q = (50.0 / r)**(1.0 / 1.852)
+    assert sol.convergido
+    assert np.allclose(sol.Q_lps / 1000.0, Q, rtol=1e-8)
+    assert np.isclose(sol.H[2], 50.0 - _r_hw(0.3, 800.0, 120.0) * Q**1.852, atol=1e-6)
+
+
+def test_dos_tuberias_en_paralelo_se_reparten_por_conductancia():
+    # A -> J, y de J a K por dos tuberías en paralelo (malla); K consume 80 l/s
+    red = RedHidraulica(friccion=HW)
+    red.agregar_depositos([60.0], nombres=["A"])
+    red.agregar_nudos(nombres=["J"])
+    red.agregar_nudos(demanda_lps=80.0, nombres=["K"])
+    red.agregar_tuberias(["A", "J", "J"], ["J", "K", "K"], [0.35, 0.25, 0.15], [300.0, 600.0, 600.0], 120.0)
+    sol = red.resolver(tol=1e-10)
+    Q = sol.Q_lps
+    assert sol.convergido
+    assert np.isclose(Q[1] + Q[2], 80.0, atol=1e-8)
+    r1, r2 = _r_hw(0.25, 600.0, 120.0), _r_hw(0.15, 600.0, 120.0)
+    assert np.isclose(Q[1] / Q[2], (r2 / r1)**(1.0 / 1.852), rtol=1e-8)
+
+
+def test_bomba_y_tuberia_frente_al_punto_de_funcionamiento():
+    Qc = np.linspace(0.0, 60.0, 13)
+    Hc = 40.0 - 0.006 * Qc**2
+    red = RedHidraulica(friccion=HW)
+    red.agregar_depositos([0.0, 20.0], nombres=["A", "B"])
+    red.agregar_nudos(nombres=["imp"])
+    red.agregar_bomba("A", "imp", Qc, Hc)
+    red.agregar_tuberias(["imp"], ["B"], 0.2, 1000.0, 130.0)
+    sol = red.resolver(tol=1e-10)
+    r = _r_hw(0.2, 1000.0, 130.0)
+    Q = brentq(lambda q: np.interp(q, Qc, Hc) - 20.0 - r * (q / 1000.0)**1.852, 0.0, 60.0, xtol=1e-12)
+    assert sol.convergido
+    assert np.allclose(sol.Q_lps, Q, rtol=1e-7)
+
+
+def test_continuidad_en_red_mallada_con_ramas():
+    # Cuadrícula 6×6 mallada alimentada por dos depósitos, más un ramal en árbol (bosque)
+    rng = np.random.default_rng(0)
+    n = 6
+    red = RedHidraulica(friccion=DW)
+    red.agregar_depositos([60.0, 55.0])
+    malla = red.agregar_nudos(demanda_lps=rng.uniform(0.5, 3.0, n*n), cota=0.0).reshape(n, n)
+    desde = np.concatenate([malla[:, :-1].ravel(), malla[:-1, :].ravel(), [0, 1]])
+    hasta = np.concatenate([malla[:, 1:].ravel(), malla[1:, :].ravel(), [malla[0, 0], malla[-1, -1]]])
+    D = rng.uniform(0.1, 0.3, len(desde))
+    red.agregar_tuberias(desde, hasta, D, 200.0, 1e-4)
+    rama = red.agregar_nudos(demanda_lps=[1.0, 2.0, 0.5])
+    red.agregar_tuberias([malla[2, 3], rama[0], rama[1]], rama, 0.1, 100.0, 1e-4)
+    sol = red.resolver(tol=1e-10)
+    assert sol.convergido
+    assert _residuo_continuidad(red, sol) < 1e-8
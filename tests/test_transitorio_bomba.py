@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""Arranque con motor: el paso no lo fija la rigidez del par junto al sincronismo."""
+
+import numpy as np
+
+from Problema_1 import N_BOMBA_RPM, tabla_bomba
+from transitorio_bomba import CurvasHomologas, MotorInduccion, simular_arranque_parada
+
+
+def _arranque(dt, t_total=1.0):
+    curvas = CurvasHomologas(*tabla_bomba(1e-6), N_BOMBA_RPM)
+    motor = MotorInduccion(1.15 * curvas.P.max(), N_BOMBA_RPM)
+    return simular_arranque_parada(curvas, [0.2, 1.0], 5e4, 10.0, lambda q: 2000.0 * q**2, t_total,
+                                   arranque=True, motor=motor, dt=dt, n_guardar=10**6)
+
+
+def test_arranque_con_paso_de_la_hidraulica():
+    r = _arranque(None)
+    ref = _arranque(2e-4)
+    # Con la rigidez del motor el paso sería ~1e-3 s; ahora lo fija la hidráulica
+    assert r.t[1] > 5e-3
+    alfa_ref = np.column_stack([np.interp(r.t, ref.t, ref.alfa[:, j]) for j in range(2)])
+    assert np.abs(r.alfa - alfa_ref).max() < 1e-2
+    assert np.allclose(r.t_hasta(0.95), ref.t_hasta(0.95), atol=r.t[1], equal_nan=True)
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""Corrección HI 9.6.7: sin corrección con B ≤ 1, caso resuelto y aviso con B > 40."""
+
+import numpy as np
+
+from viscosidad_bomba import CorreccionHI, factores_HI, parametro_B, B_MAX
+
+Q = np.array([0.0, 30.0, 60.0, 100.0, 120.0])     # l/s
+H = np.array([62.0, 60.0, 56.0, 50.0, 45.0])      # m
+ETA = np.array([0.0, 45.0, 70.0, 82.0, 78.0])     # %, BEP en 100 l/s
+
+
+def test_sin_correccion_con_B_menor_que_1():
+    c = CorreccionHI(Q, H, ETA, 1e-6, 1450.0)
+    assert c.B <= 1.0 and not c.corregida
+    assert np.array_equal(c.Q, Q) and np.array_equal(c.H, H) and np.array_equal(c.eta, ETA)
+    assert factores_HI(0.5) == (1.0, 1.0)
+
+
+def test_caso_resuelto_hi():
+    # BEP 360 m³/h, 50 m, 1450 rpm, 200 cSt, resuelto a mano con las ecuaciones de HI 9.6.7:
+    # B = 16.5·√200·50^0.0625 / (360^0.375·1450^0.25) = 5.312
+    # C_Q = 2.71^(-0.165·(log B)^3.15) = 0.942;  C_η = B^(-0.0547·B^0.69) = 0.749
+    # C_H a 0.6·Q_BEP = 1 - (1 - C_Q)·0.6^0.75 = 0.960
+    c = CorreccionHI(Q, H, ETA, 200e-6, 1450.0)
+    assert np.isclose(c.B, 5.312, atol=2e-3)
+    assert np.isclose(parametro_B(200e-6, 100.0, 50.0, 1450.0), c.B)
+    assert np.isclose(c.C_Q, 0.942, atol=1e-3)
+    assert np.isclose(c.C_eta, 0.749, atol=1e-3)
+    assert np.isclose(c.C_H[2], 0.960, atol=1e-3)
+    assert np.isclose(c.C_H[3], c.C_Q)                 # en el BEP C_H = C_Q
+    assert np.allclose(c.Q, Q * c.C_Q) and np.allclose(c.H, H * c.C_H) and np.allclose(c.eta, ETA * c.C_eta)
+    assert not c.fuera_de_rango
+
+
+def test_fuera_de_rango_con_B_mayor_que_40():
+    c = CorreccionHI(Q, H, ETA, 0.05, 1450.0)
+    assert c.B > B_MAX and c.fuera_de_rango
+    # Los factores se limitan a los de B = 40
+    assert np.allclose((c.C_Q, c.C_eta), factores_HI(B_MAX))
+    assert "fuera del método HI" in c.resumen()
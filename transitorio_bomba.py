@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""
+Arranque y disparo (fallo de alimentación) de una bomba con columna rígida.
+
+Modelo de dos ecuaciones por escenario:
+- Columna rígida:   (Σ L/(g·A))·dQ/dt = H_bomba(Q, α) - H_estática - hf(Q)
+- Rotor:            I·ω0·dα/dt = T_motor(α) - T_bomba(Q, α)
+con α = n/n0. La bomba se describe con curvas homólogas obtenidas de las tablas
+Q-H-η a n0 (H = α²·h(Q/α), T = α²·t(Q/α)). Fuera de la zona tabulada (caudal
+inverso o caudal mayor que el de la tabla a la velocidad actual) se prolongan
+con términos cuadráticos continuos, equivalentes al rotor bloqueado cuando
+α → 0; no se dispone de curvas de Suter de cuatro cuadrantes, así que se
+supone un trinquete antirretorno (α ≥ 0).
+
+Todos los escenarios (inercias, longitudes, válvulas de retención) se integran a
+la vez: el estado es un par de arrays y cada paso de Runge-Kutta es una
+operación NumPy sobre todos ellos.
+"""
+
+import numpy as np
+
+G = 9.81
+RHO_AGUA = 1000.0
+
+
+class CurvasHomologas:
+    """Curvas de la bomba a n0 (tablas en l/s, m, %) extendidas a cualquier velocidad."""
+    def __init__(self, Q_lps, H_m, eta_pct, n_rpm, s_rel=1.0):
+        self.Q = np.asarray(Q_lps, dtype=float) / 1000.0
+        self.H = np.asarray(H_m, dtype=float)
+        self.n_rpm = float(n_rpm)
+        self.omega0 = 2.0 * np.pi * self.n_rpm / 60.0
+        self.Q_max = self.Q[-1]
+        # Prolongación cuadrática con la pendiente del último tramo (continua en H y dH/dQ)
+        pendiente = (self.H[-1] - self.H[-2]) / (self.Q[-1] - self.Q[-2])
+        self.c = max(-pendiente / (2.0 * self.Q_max), 1e-9)
+
+        # Potencia en el eje donde η > 0; en los extremos (η = 0) se extrapola linealmente
+        eta = np.asarray(eta_pct, dtype=float) / 100.0
+        ok = eta > 0
+        P = np.empty_like(self.Q)
+        P[ok] = RHO_AGUA * s_rel * G * self.Q[ok] * self.H[ok] / eta[ok]
+        i = np.flatnonzero(ok)
+        for j in np.flatnonzero(~ok):
+            a, b = (i[0], i[1]) if j < i[0] else (i[-2], i[-1])
+            P[j] = P[a] + (P[b] - P[a]) / (self.Q[b] - self.Q[a]) * (self.Q[j] - self.Q[a])
+        self.P = P                          # W a n0
+        self.T = P / self.omega0            # N·m a n0
+        self.T_max = self.T[-1]
+
+    def altura_par(self, Q, alfa):
+        """(H en m, T en N·m) para Q (m³/s) y α = n/n0; una sola pasada para el integrador."""
+        alfa = np.maximum(alfa, 0.0)
+        a2 = alfa**2
+        q = Q / np.maximum(alfa, 1e-12)
+        inversa = Q < 0.0
+        exceso = Q > alfa * self.Q_max
+        Q2 = Q**2
+        H = np.where(inversa, a2 * self.H[0] + self.c * Q2,
+                     np.where(exceso, -self.c * (Q2 - a2 * self.Q_max**2), a2 * np.interp(q, self.Q, self.H)))
+        fuera = self.T_max * Q2 / self.Q_max**2
+        T = np.where(inversa, a2 * self.T[0] + fuera,
+                     np.where(exceso, fuera, a2 * np.interp(q, self.Q, self.T)))
+        return H, T
+
+    def altura(self, Q, alfa):
+        return self.altura_par(Q, alfa)[0]
+
+    def par(self, Q, alfa):
+        return self.altura_par(Q, alfa)[1]
+
+
+class MotorInduccion:
+    """
+    Par del motor asíncrono con la fórmula de Kloss, T = 2·Tk / (s/sk + sk/s).
+    P_nominal_W: potencia en el eje a la velocidad nominal n0 (con deslizamiento s_n).
+    f_red:       frecuencia de red (Hz); la velocidad de sincronismo es la inmediata superior a n0.
+    """
+    def __init__(self, P_nominal_W, n_rpm, par_maximo_rel=2.5, f_red=50.0):
+        self.n_rpm = float(n_rpm)
+        pares_polos = max(int(60.0 * f_red // self.n_rpm), 1)
+        self.n_sinc = 60.0 * f_red / pares_polos
+        self.s_n = 1.0 - self.n_rpm / self.n_sinc
+        self.T_n = P_nominal_W / (2.0 * np.pi * self.n_rpm / 60.0)
+        lam = float(par_maximo_rel)
+        self.T_k = lam * self.T_n
+        self.s_k = self.s_n * (lam + np.sqrt(lam**2 - 1.0))
+
+    def par(self, alfa):
+        s = 1.0 - alfa * self.n_rpm / self.n_sinc
+        s = np.where(np.abs(s) < 1e-9, 1e-9, s)
+        return 2.0 * self.T_k / (s / self.s_k + self.s_k / s)
+
+    def rigidez(self, alfa):
+        """
+        Pendiente (N·m, < 0) de la cuerda entre T(α) y el sincronismo, donde T = 0;
+        en el sincronismo es dT/dα = -2·Tk/sk·n0/n_sinc. Linealizar con la cuerda
+        en vez de con la tangente hace que el motor, solo, se acerque al sincronismo
+        sin pasarse, también al atravesar el par máximo.
+        """
+        a_sinc = self.n_sinc / self.n_rpm
+        d = a_sinc - alfa
+        cerca = np.abs(d) < 1e-9
+        return np.where(cerca, -2.0 * self.T_k / self.s_k / a_sinc, -self.par(alfa) / np.where(cerca, 1.0, d))
+
+
+class ResultadoArranqueParada:
+    """Historia de caudal, velocidad y altura de cada escenario (columnas) frente a t."""
+    def __init__(self, t, Q, alfa, H, Q0, Q_inversa, t_retencion, n_rpm):
+        self.t = t                          # (n_t,)
+        self.Q_lps = Q * 1000.0             # (n_t, n_esc)
+        self.alfa = alfa                    # (n_t, n_esc)
+        self.n_rpm = alfa * n_rpm
+        self.H_bomba = H                    # (n_t, n_esc)
+        self.Q0_lps = Q0 * 1000.0           # caudal inicial de cada escenario
+        self.Q_inversa_lps = Q_inversa * 1000.0  # caudal inverso al cerrar la retención (≤ 0)
+        self.t_retencion = t_retencion      # instante de cierre de la retención (nan si no cierra)
+
+    def t_hasta(self, fraccion_n):
+        """Primer instante en que α cruza fraccion_n (bajando en disparo, subiendo en arranque)."""
+        a = self.alfa
+        cruza = (a <= fraccion_n) if a[0].mean() > fraccion_n else (a >= fraccion_n)
+        return np.where(cruza.any(axis=0), self.t[np.argmax(cruza, axis=0)], np.nan)
+
+
+def _regimen_permanente(curvas, H_est, perdidas, n_esc, iters=60):
+    """Q de funcionamiento a α = 1 para cada escenario (bisección vectorizada; 0 si no hay)."""
+    a = np.zeros(n_esc); b = np.full(n_esc, curvas.Q_max)
+    uno = np.ones(n_esc)
+    f = lambda q: curvas.altura(q, uno) - H_est - perdidas(q)
+    hay = f(a) > 0
+    for _ in range(iters):
+        m = 0.5 * (a + b)
+        pos = f(m) > 0
+        a = np.where(pos, m, a); b = np.where(pos, b, m)
+    return np.where(hay, 0.5 * (a + b), 0.0)
+
+
+def _phi(z):
+    """φ1, φ2, φ3 de los integradores exponenciales (φk(z) = Σ z^j/(j+k)!), elemento a elemento."""
+    z = np.asarray(z, dtype=float)
+    serie = np.abs(z) < 0.5
+    zs = np.where(serie, z, 0.0)
+    zc = np.where(serie, 1.0, z)
+    p1, p2, p3 = np.zeros_like(z), np.zeros_like(z), np.zeros_like(z)
+    termino = np.ones_like(z)
+    fact = 1.0
+    for j in range(10):
+        p1 += termino / (fact * (j + 1))
+        p2 += termino / (fact * (j + 1) * (j + 2))
+        p3 += termino / (fact * (j + 1) * (j + 2) * (j + 3))
+        termino = termino * zs
+        fact *= j + 1
+    e = np.expm1(zc)
+    c1 = e / zc
+    c2 = (e - zc) / zc**2
+    c3 = (e - zc - 0.5 * zc**2) / zc**3
+    return np.where(serie, p1, c1), np.where(serie, p2, c2), np.where(serie, p3, c3)
+
+
+def simular_arranque_parada(curvas, inercia, inercia_columna, H_est, perdidas, t_total,
+                            arranque=False, motor=None, t_retencion=0.0, dt=None, n_guardar=2000):
+    """
+    Integra (RK4, paso fijo) todos los escenarios a la vez. En el arranque el par del
+    motor es rígido junto al sincronismo: la ecuación del rotor se integra con ETDRK4
+    (Cox-Matthews), tratando de forma exacta su parte lineal λ·(α - α_n), con
+    λ = motor.rigidez(α_n)/(I·ω0) congelado en cada paso. La columna sigue con RK4
+    (ETDRK4 con λ = 0 es el mismo esquema), así que el paso lo fija la hidráulica.
+    inercia:         I del grupo motor-bomba (kg·m²), escalar o array (n_esc,)
+    inercia_columna: Σ L_i/(g·A_i) (s²/m²), escalar o array
+    H_est:           altura estática a vencer (m), escalar o array
+    perdidas:        función Q (m³/s, ≥ 0, forma (n_esc,)) -> hf (m) de cada escenario
+    arranque:        False = disparo desde el régimen permanente; True = arranque desde reposo
+                     con el motor (obligatorio en ese caso)
+    t_retencion:     retraso (s) entre la inversión del caudal y el cierre de la retención;
+                     np.inf = sin válvula de retención
+    dt:              paso (s); por defecto una fracción de la constante de tiempo más corta
+                     (columna y rotor frente al par de la bomba)
+    """
+    I, M, H_est, t_ret = np.broadcast_arrays(*(np.atleast_1d(np.asarray(v, dtype=float))
+                                               for v in (inercia, inercia_columna, H_est, t_retencion)))
+    n_esc = I.size
+    if arranque and motor is None:
+        raise ValueError("El arranque necesita un modelo de motor.")
+    perd = lambda q: np.sign(q) * perdidas(np.abs(q))
+    par_motor = (lambda a: motor.par(a)) if arranque else (lambda a: 0.0)
+    Iw = I * curvas.omega0
+    if dt is None:
+        dH_dQ = np.max(np.abs(np.diff(curvas.H) / np.diff(curvas.Q)))
+        Qm = np.full(n_esc, curvas.Q_max)
+        tau = min(np.min(M / (dH_dQ + 2.0 * perdidas(Qm) / Qm)), np.min(Iw / curvas.T.max()))
+        dt = min(0.01, 0.05 * tau)
+
+    if arranque:
+        Q = np.zeros(n_esc); alfa = np.zeros(n_esc)
+    else:
+        Q = _regimen_permanente(curvas, H_est, perdidas, n_esc); alfa = np.ones(n_esc)
+    Q0 = Q.copy()
+    abierta = Q > 0.0                       # retención abierta (o ausente)
+    abierta |= ~np.isfinite(t_ret)
+    t_inv = np.full(n_esc, np.nan)
+    Q_inv = np.zeros(n_esc)
+    t_cierre = np.full(n_esc, np.nan)
+
+    def deriv(Q, alfa):
+        H, T = curvas.altura_par(Q, alfa)
+        dQ = (H - H_est - perd(Q)) / M
+        da = (par_motor(alfa) - T) / Iw
+        return np.where(abierta, dQ, 0.0), np.where(alfa <= 0.0, np.maximum(da, 0.0), da)
+
+    n_pasos = int(np.ceil(t_total / dt))
+    cada = max(1, n_pasos // n_guardar)
+    n_t = n_pasos // cada + 1
+    t_g = np.empty(n_t); Q_g = np.empty((n_t, n_esc)); a_g = np.empty((n_t, n_esc)); H_g = np.empty((n_t, n_esc))
+    t_g[0], Q_g[0], a_g[0], H_g[0] = 0.0, Q, alfa, curvas.altura(Q, alfa)
+    g = 1
+    # Sin motor (disparo) λ = 0 y los coeficientes son los del RK4 clásico
+    lam, m1, E2, b1, b2, b3 = 0.0, 0.5*dt, 1.0, 1.0/6.0, 1.0/3.0, 1.0/6.0
+    for k in range(1, n_pasos + 1):
+        if arranque:
+            # ETDRK4 en α con v = α - α_n:  v' = λ·v + N,  N = F - λ·v  (pesos de Hochbruck-Ostermann)
+            lam = motor.rigidez(alfa) / Iw
+            z = lam * dt
+            m1 = 0.5 * dt * _phi(0.5 * z)[0]
+            E2 = np.exp(0.5 * z)
+            p1, p2, p3 = _phi(z)
+            b1, b2, b3 = p1 - 3.0*p2 + 4.0*p3, 2.0*(p2 - 2.0*p3), 4.0*p3 - p2
+        k1 = deriv(Q, alfa)
+        n1 = k1[1]
+        Qa, aa = Q + 0.5*dt*k1[0], alfa + m1*n1
+        k2 = deriv(Qa, aa)
+        n2 = k2[1] - lam*(aa - alfa)
+        Qb, ab = Q + 0.5*dt*k2[0], alfa + m1*n2
+        k3 = deriv(Qb, ab)
+        n3 = k3[1] - lam*(ab - alfa)
+        Qc, ac = Q + dt*k3[0], alfa + E2*(aa - alfa) + m1*(2.0*n3 - n1)
+        k4 = deriv(Qc, ac)
+        n4 = k4[1] - lam*(ac - alfa)
+        Q = Q + dt/6.0 * (k1[0] + 2*k2[0] + 2*k3[0] + k4[0])
+        alfa = np.maximum(alfa + dt * (b1*n1 + b2*(n2 + n3) + b3*n4), 0.0)
+        t = k * dt
+
+        # Válvula de retención: cierra t_ret después de invertirse el caudal y reabre
+        # cuando la bomba vuelve a superar la altura estática a caudal nulo
+        inv = abierta & (Q < 0.0)
+        t_inv = np.where(inv & np.isnan(t_inv), t, np.where(abierta & (Q > 0.0), np.nan, t_inv))
+        cerrar = inv & (t - t_inv >= t_ret)
+        if cerrar.any():
+            Q_inv = np.where(cerrar, Q, Q_inv)
+            t_cierre = np.where(cerrar & np.isnan(t_cierre), t, t_cierre)
+            abierta = abierta & ~cerrar
+            Q = np.where(cerrar, 0.0, Q)
+        abre = ~abierta & (curvas.altura(np.zeros(n_esc), alfa) > H_est)
+        if abre.any():
+            abierta = abierta | abre
+            t_inv = np.where(abre, np.nan, t_inv)
+
+        if k % cada == 0:
+            t_g[g], Q_g[g], a_g[g], H_g[g] = t, Q, alfa, curvas.altura(Q, alfa)
+            g += 1
+
+    return ResultadoArranqueParada(t_g[:g], Q_g[:g], a_g[:g], H_g[:g], Q0, Q_inv, t_cierre, curvas.n_rpm)
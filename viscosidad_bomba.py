@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Corrección de las curvas de una bomba centrífuga para líquidos viscosos con el
+método del Hydraulic Institute (ANSI/HI 9.6.7).
+
+Las curvas del fabricante son con agua. Con un líquido viscoso se calcula el
+parámetro B a partir del punto de rendimiento máximo (BEP), de la velocidad y de
+la viscosidad. Con B se obtienen los factores:
+- C_Q = 2.71^(-0.165·(log10 B)^3.15)            (caudal; C_H en el BEP vale lo mismo)
+- C_H(Q) = 1 - (1 - C_Q)·(Q_agua/Q_BEP)^0.75     (altura, punto a punto)
+- C_η = B^(-0.0547·B^0.69)                       (rendimiento)
+y la tabla corregida es Q·C_Q, H·C_H y η·C_η. Con B ≤ 1 (agua y líquidos poco
+viscosos) no hay corrección. El método vale hasta B = 40; por encima se limita a 40 y
+se avisa. La densidad no entra en la corrección (solo en la potencia).
+Las correcciones se guardan en una caché acotada (LRU) por tabla, velocidad y
+viscosidad: mover un deslizador o repetir un barrido con la misma ν no recalcula
+nada, y escribir muchas ν distintas no la hace crecer sin límite.
+"""
+
+from functools import lru_cache
+import numpy as np
+
+B_MAX = 40.0
+
+
+def parametro_B(nu_m2s, Q_bep_lps, H_bep_m, n_rpm):
+    """Parámetro B del HI (unidades SI: ν en cSt, Q en m³/h, H por etapa en m, n en rpm); vectorizado."""
+    nu_cSt = np.asarray(nu_m2s, dtype=float) * 1e6
+    return 16.5 * np.sqrt(nu_cSt) * np.asarray(H_bep_m, dtype=float)**0.0625 / (
+        (np.asarray(Q_bep_lps, dtype=float) * 3.6)**0.375 * np.asarray(n_rpm, dtype=float)**0.25)
+
+
+def factores_HI(B):
+    """(C_Q, C_η) para cada B; 1 donde B ≤ 1. C_H en el BEP es igual a C_Q."""
+    B = np.asarray(B, dtype=float)
+    Bc = np.clip(B, 1.0, B_MAX)
+    C_Q = np.where(B > 1.0, 2.71**(-0.165 * np.log10(Bc)**3.15), 1.0)
+    C_eta = np.where(B > 1.0, Bc**(-(0.0547 * Bc**0.69)), 1.0)
+    return C_Q, C_eta
+
+
+class CorreccionHI:
+    """
+    Tabla de la bomba corregida por viscosidad. Q_lps, H_m y eta_pct son las curvas con
+    agua; el BEP se toma en el máximo de eta_pct. etapas: número de etapas (B usa la
+    altura por etapa), el parámetro propio de la bomba junto con la velocidad n_rpm.
+    """
+    def __init__(self, Q_lps, H_m, eta_pct, nu, n_rpm, etapas=1):
+        Q = np.asarray(Q_lps, dtype=float); H = np.asarray(H_m, dtype=float)
+        eta = np.asarray(eta_pct, dtype=float)
+        i_bep = int(np.argmax(eta))
+        self.nu = float(nu)
+        self.Q_bep, self.H_bep = float(Q[i_bep]), float(H[i_bep])
+        self.B = float(parametro_B(nu, self.Q_bep, self.H_bep / etapas, n_rpm))
+        C_Q, C_eta = factores_HI(self.B)
+        self.C_Q, self.C_eta = float(C_Q), float(C_eta)
+        self.C_H = 1.0 - (1.0 - self.C_Q) * (Q / self.Q_bep)**0.75
+        self.Q = Q * self.C_Q
+        self.H = H * self.C_H
+        self.eta = eta * self.C_eta
+        self.fuera_de_rango = self.B > B_MAX
+
+    @property
+    def corregida(self):
+        return self.B > 1.0
+
+    def resumen(self):
+        if not self.corregida:
+            return f"B = {self.B:.2f} ≤ 1: sin corrección por viscosidad"
+        texto = (f"B = {self.B:.2f}: C_Q = {self.C_Q:.3f}, C_H(BEP) = {self.C_Q:.3f}, "
+                 f"C_η = {self.C_eta:.3f}")
+        return texto + (f" (B > {B_MAX:.0f}: fuera del método HI)" if self.fuera_de_rango else "")
+
+
+TAMANO_CACHE = 64
+
+@lru_cache(maxsize=TAMANO_CACHE)
+def _correccion_en_cache(nu, n_rpm, etapas, Q_b, H_b, eta_b):
+    Q, H, eta = (np.frombuffer(b, dtype=float) for b in (Q_b, H_b, eta_b))
+    return CorreccionHI(Q, H, eta, nu, n_rpm, etapas)
+
+def correccion_hi(Q_lps, H_m, eta_pct, nu, n_rpm, etapas=1):
+    """CorreccionHI en caché (LRU, segura entre hilos) por (tabla, ν, n, etapas)."""
+    tablas = tuple(np.asarray(v, dtype=float).tobytes() for v in (Q_lps, H_m, eta_pct))
+    return _correccion_en_cache(float(nu), float(n_rpm), int(etapas), *tablas)